@@ -1,12 +1,10 @@
-from scipy.spatial.distance import squareform, pdist
-
-from tspgrasp import Grasp, read_tsp_file
+from tspgrasp import CoordinateProblem, Grasp, LocalSearch, read_tsp_file
 
 
 if __name__ == "__main__":
     X = read_tsp_file("instances/xqc2175.txt")
-    D = squareform(pdist(X))
-    grasp = Grasp(seed=42)
-    sol = grasp(D, max_iter=1000, time_limit=180)
+    problem = CoordinateProblem(X)
+    grasp = Grasp(local_search=LocalSearch(seed=42, n_neighbors=10), seed=42)
+    sol = grasp(problem, max_iter=1000, time_limit=180)
     print(sol.cost)
     print(sol.tour)
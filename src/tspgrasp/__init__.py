@@ -1,6 +1,7 @@
 from tspgrasp.environ import (
-    Grasp, CheapestArc, SemiGreedyArc, CheapestInsertion, SemiGreedyInsertion,
-    RandomInsertion, LocalSearch, SimulatedAnnealing,
+    Grasp, CoordinateProblem, CheapestArc, SemiGreedyArc, CheapestInsertion, SemiGreedyInsertion,
+    RandomInsertion, SpaceFillingCurve, GreedyEdge, Savings, LocalSearch, SimulatedAnnealing,
+    LinKernighan,
     cythonized
 )
-from tspgrasp.dataloader import read_tsp_file
+from tspgrasp.dataloader import read_tsp_file, save_distance_matrix, load_distance_matrix
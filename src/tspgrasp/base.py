@@ -1,11 +1,13 @@
 from abc import abstractmethod
 import time
 import logging
-from typing import List
+from typing import Callable, List, Optional, Sequence
 
 import numpy as np
 
-from tspgrasp.solution import Solution
+from tspgrasp.cache import TourCache
+from tspgrasp.elite import ElitePool, relink
+from tspgrasp.solution import SearchStats, Solution
 
 
 MAX_MOVES = 100000
@@ -22,9 +24,12 @@ class BaseGrasp:
     local_search: object
     costs: List[float]
     """List of costs generated throughout iterations"""
+    n_jobs: int
+    backend: str
+    _problem: object
 
     @abstractmethod
-    def __init__(self, constructive=None, local_search=None, seed=None):
+    def __init__(self, constructive=None, local_search=None, seed=None, n_jobs=1, backend="processes"):
         """Greedy Randomized Adaptive Search Procedure for the TSP.
 
         Parameters
@@ -36,12 +41,22 @@ class BaseGrasp:
             By default None, which instantiates a `CheapestArc` operator.
 
         local_search : Any, optional
-            Local search heuristic. Current options available are `LocalSearch`
-            and `SimulatedAnnealing`, which should be instantiated beforehand.
+            Local search heuristic. Current options available are `LocalSearch`,
+            `SimulatedAnnealing`, and `LinKernighan`, which should be instantiated beforehand.
             By default None, which uses `LocalSearch`, a VNS with first improvement
 
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_jobs : int, optional
+            Number of worker processes running independent iterations, by default 1.
+            Use -1 for all available CPUs. Parallel results are reproducible for a given
+            seed and `n_jobs`, but differ from the sequential ones.
+
+        backend : str, optional
+            Either "processes" or "threads", by default "processes".
+            Threads share the problem in memory and scale as far as the local search,
+            which runs without the GIL in the Cython implementation, dominates iterations.
         """
         pass
 
@@ -53,14 +68,22 @@ class BaseGrasp:
         max_moves: int = MAX_MOVES,
         time_limit: float = float("inf"),
         target: float = -float("inf"),
-        verbose: bool = False
+        verbose: bool = False,
+        stats: bool = False,
+        initial_tour: Optional[Sequence[int]] = None,
+        perturbation: float = 0.0,
+        elite_size: int = 0,
+        cache_size: int = 0
     ) -> Solution:
         """Solves a TSP based on a generic 2-dimensional distance matrix
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix, its condensed upper triangle for symmetric problems
+            (as returned by pdist, in half the memory), or a problem defined by coordinates.
+            Float32 and integer matrices are stored in 32 bits, and integer distances
+            only accept moves that improve the cost by whole units.
 
         max_iter : int
             Maximum number of complete iterations, by default 10000
@@ -69,7 +92,8 @@ class BaseGrasp:
             Maximum number of local search moves, by default 100000
 
         time_limit : float, optional
-            Time limit (s) to interrupt the solution, by default float("inf")
+            Time limit (s) to interrupt the solution, also enforced within the local search,
+            which then keeps its current tour, by default float("inf")
 
         target : float, optional
             Taget value for objective which interrupts optimization process, by default -float("inf")
@@ -77,15 +101,102 @@ class BaseGrasp:
         verbose : bool, optional
             Either or not to print messages during solution
 
+        stats : bool, optional
+            Either or not to collect counters of construction and local search, such as
+            evaluations and acceptances of each move type, by default False
+
+        initial_tour : Sequence[int], optional
+            Tour visiting every node once (optionally repeating the first at the end), such as
+            a previous solution. It is improved by local search before the first iteration and
+            becomes the incumbent. By default None
+
+        perturbation : float, optional
+            Probability that an iteration starts from a double-bridge kick of the improved
+            `initial_tour` instead of the constructive heuristic, by default 0.0
+
+        elite_size : int, optional
+            Size of a pool of local optima kept diverse by their edge distances, by default 0
+            (disabled). Each new local optimum is then relinked with an elite member, applying
+            local search to intermediate tours on the path between them.
+
+        cache_size : int, optional
+            Number of starting tours and local optima remembered by a canonical hash of their
+            edges, by default 0 (disabled). Local search is skipped for repeated starting tours,
+            and repeated local optima are not relinked. Duplicates are counted in `stats`.
+
         Returns
         -------
         Solution
             Attributes:
             - tour : List[int]
             - cost : float
+            - stats : SearchStats | None
+        """
+        pass
+
+    @abstractmethod
+    def solve_many(
+        self,
+        matrices: Sequence[np.ndarray],
+        max_iter: int = MAX_ITER,
+        max_moves: int = MAX_MOVES,
+        time_limit: float = float("inf"),
+        target: float = -float("inf"),
+        stats: bool = False
+    ) -> List[Solution]:
+        """Solves a batch of TSPs, reusing the same operators for every instance
+
+        Instances are distributed over `n_jobs` workers in chunks, and each one restarts
+        the operators from `seed`, so that results do not depend on `n_jobs`.
+
+        Parameters
+        ----------
+        matrices : Sequence[np.ndarray | CoordinateProblem]
+            Distance matrices of possibly different sizes (or a 3-dimensional array of
+            equally sized ones), accepting the same types as `__call__`
+
+        max_iter : int | Sequence[int], optional
+            Maximum number of complete iterations, either for all instances or one per instance,
+            by default 10000
+
+        max_moves : int
+            Maximum number of local search moves, by default 100000
+
+        time_limit : float | Sequence[float], optional
+            Time limit (s) counted from the start of each instance, either for all instances
+            or one per instance, by default float("inf")
+
+        target : float | Sequence[float], optional
+            Taget value for objective, either for all instances or one per instance,
+            by default -float("inf")
+
+        stats : bool, optional
+            Either or not to collect counters of each instance, by default False
+
+        Returns
+        -------
+        List[Solution]
+            Solutions in the same order as matrices
         """
         pass
 
+    def _get_problem(self, D: np.ndarray, as_problem: Callable, problem_type: Callable) -> object:
+        # Problems such as CoordinateProblem are used as given,
+        # while other buffers (such as memory views) are wrapped without copies
+        if not isinstance(D, np.ndarray):
+            try:
+                D = np.asarray(memoryview(D))
+            except TypeError:
+                return D
+
+        # Reuse the previous problem (and its cached neighborhoods) when D is unchanged
+        if (
+            self._problem is None
+            or type(self._problem) is not problem_type(D)
+            or not (self._problem.D is D or np.array_equal(self._problem.D, D))
+        ):
+            self._problem = as_problem(D)
+        return self._problem
 
     def solve(
         self,
@@ -94,32 +205,102 @@ class BaseGrasp:
         max_moves: MAX_MOVES,
         time_limit: float = float("inf"),
         target: float = -float("inf"),
-        verbose: bool = False
+        verbose: bool = False,
+        stats: bool = False,
+        initial_tour: Optional[Sequence[int]] = None,
+        perturbation: float = 0.0,
+        elite_size: int = 0,
+        cache_size: int = 0,
+        stop: Optional[object] = None
     ) -> Solution:
         # Set problem on local search
         self.local_search.set_problem(problem)
+        self.local_search.collect_stats = stats
 
         # Initialize parameters
         best_cost = np.inf
         sol = None
-        start_time = time.time()
+        run_stats = SearchStats() if stats else None
+        rng = np.random.default_rng(self.seed)
+        pool = ElitePool(elite_size) if elite_size > 0 else None
+        starts = TourCache(cache_size) if cache_size > 0 else None
+        optima = TourCache(cache_size) if cache_size > 0 else None
+        start_time = time.monotonic()
+
+        # Warm start from the given tour, which becomes the incumbent
+        warm_seq = None
+        if initial_tour is not None:
+            t0 = time.perf_counter()
+            sol = self._search_from(
+                check_tour(initial_tour, problem.n_nodes), problem, max_moves, time_limit
+            )
+            if run_stats is not None:
+                run_stats.record(self.local_search, 0.0, time.perf_counter() - t0)
+            self.costs.append(sol.cost)
+            best_cost = sol.cost
+            warm_seq = sol.tour[:-1]
+            if pool is not None:
+                pool.add(warm_seq, best_cost)
+            if verbose:
+                log.info(f"Initial tour improved to {best_cost}")
+            if best_cost <= target:
+                max_iter = 0
 
         # Do main loop
         for _ in range(max_iter):
 
-            # Break if exceeds time limit
-            current_time = time.time()
+            # Break if exceeds time limit or another worker reached the target
+            current_time = time.monotonic()
             time_consumed = current_time - start_time
             if time_consumed > time_limit:
                 break
+            if stop is not None and stop.is_set():
+                break
+
+            # Local search also stops at the time limit, keeping its current tour
+            t0 = time.perf_counter()
+            if warm_seq is not None and rng.random() < perturbation:
+                seq = double_bridge(warm_seq, rng)
+                t1 = time.perf_counter()
+                time_left = time_limit - (time.monotonic() - start_time)
+                tour = self._search_from(seq, problem, max_moves, time_left)._tour
+            else:
+                self.constructive.do(problem)
+                t1 = time.perf_counter()
+                tour = self.constructive.tour
+
+                # Repeated starting tours lead to local optima already found
+                if starts is not None:
+                    start_key = tour.canonical_hash(problem.symmetric)
+                    known_cost = starts.get(start_key)
+                    if known_cost is not None:
+                        self.constructive.feedback(known_cost)
+                        self.costs.append(known_cost)
+                        if run_stats is not None:
+                            run_stats.record_duplicate(t1 - t0)
+                        continue
 
-            self.constructive.do(problem)
-            self.local_search.do(self.constructive.tour, max_iter=max_moves)
-            self.costs.append(self.constructive.tour.cost)
+                time_left = time_limit - (time.monotonic() - start_time)
+                self.local_search.do(tour, max_iter=max_moves, time_limit=time_left)
+                self.constructive.feedback(tour.cost)
+                if starts is not None:
+                    starts.put(start_key, tour.cost)
+            if run_stats is not None:
+                run_stats.record(self.local_search, t1 - t0, time.perf_counter() - t1)
+            self.costs.append(tour.cost)
+
+            # Repeated local optima are not worth relinking again
+            duplicate = False
+            if optima is not None:
+                optimum_key = tour.canonical_hash(problem.symmetric)
+                duplicate = optima.get(optimum_key) is not None
+                optima.put(optimum_key)
+                if duplicate and run_stats is not None:
+                    run_stats.n_duplicate_optima = run_stats.n_duplicate_optima + 1
 
             # Replace if it overcomes best so far
-            if self.constructive.tour.cost < best_cost:
-                sol = Solution(self.constructive.tour)
+            if tour.cost < best_cost:
+                sol = Solution(tour)
                 best_cost = sol.cost
                 if verbose:
                     log.info(f"New best solution {best_cost}")
@@ -128,4 +309,72 @@ class BaseGrasp:
                 if best_cost <= target:
                     break
 
+            # Intensification by path relinking with the elite pool
+            if pool is not None and not duplicate:
+                time_left = time_limit - (time.monotonic() - start_time)
+                relinked = self._relink(pool, tour.solution[:-1], tour.cost, problem, max_moves, time_left, rng)
+                if relinked is not None and relinked.cost < best_cost:
+                    sol = relinked
+                    best_cost = sol.cost
+                    if verbose:
+                        log.info(f"New best solution {best_cost} from path relinking")
+                    if best_cost <= target:
+                        break
+
+        if verbose and starts is not None:
+            log.info(
+                f"Duplicate starting tours {starts.hit_rate:.1%}, duplicate local optima {optima.hit_rate:.1%}"
+            )
+        if sol is not None:
+            sol.stats = run_stats
         return sol
+
+    def _relink(
+        self,
+        pool: ElitePool,
+        seq: List[int],
+        cost: float,
+        problem: object,
+        max_moves: int,
+        time_limit: float,
+        rng: np.random.Generator
+    ) -> Optional[Solution]:
+        # Best local optimum from intermediate tours between seq and an elite member,
+        # starting from the better one of the two
+        start_time = time.monotonic()
+        partner = pool.pick(seq, rng)
+        pool.add(seq, cost)
+        if partner is None:
+            return None
+        source, target = (seq, partner.seq) if cost <= partner.cost else (partner.seq, seq)
+        best = None
+        for point in relink(source, target):
+            time_left = time_limit - (time.monotonic() - start_time)
+            if time_left <= 0:
+                break
+            relinked = self._search_from(point, problem, max_moves, time_left)
+            pool.add(relinked.tour[:-1], relinked.cost)
+            if best is None or relinked.cost < best.cost:
+                best = relinked
+        return best
+
+    def _search_from(self, seq: List[int], problem: object, max_moves: int, time_limit: float) -> Solution:
+        # Local search on a tour given as a sequence of nodes
+        return self.local_search(seq, problem, max_iter=max_moves, time_limit=time_limit)
+
+
+def check_tour(tour: Sequence[int], n_nodes: int) -> List[int]:
+    """Sequence of nodes of a tour, without the first node repeated at the end"""
+    seq = [int(node) for node in tour]
+    if len(seq) == n_nodes + 1 and seq[0] == seq[-1]:
+        seq = seq[:-1]
+    assert sorted(seq) == list(range(n_nodes)), "initial_tour must visit every node once"
+    return seq
+
+
+def double_bridge(seq: List[int], rng: np.random.Generator) -> List[int]:
+    """Kick of a tour reconnecting its segments A B C D as A C B D"""
+    if len(seq) < 4:
+        return list(seq)
+    i, j, k = np.sort(rng.choice(len(seq) - 1, size=3, replace=False) + 1)
+    return seq[:i] + seq[j:k] + seq[i:j] + seq[k:]
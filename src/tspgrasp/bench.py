@@ -0,0 +1,389 @@
+"""Benchmarks of constructive and local search combinations
+
+Run a benchmark and store its results::
+
+    python -m tspgrasp.bench run -o results.json --sizes 100 1000 --instances examples/instances/*.txt
+
+Compare results of two releases, listing regressions::
+
+    python -m tspgrasp.bench compare baseline.json results.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+import numpy as np
+
+from tspgrasp.dataloader import read_tsp_file
+from tspgrasp.environ import (
+    CoordinateProblem, CheapestArc, SemiGreedyArc, CheapestInsertion, RandomInsertion, SemiGreedyInsertion,
+    SpaceFillingCurve, GreedyEdge, Savings, LocalSearch, SimulatedAnnealing, LinKernighan,
+    cythonized
+)
+
+
+# Factories of operators from (seed, n_neighbors)
+CONSTRUCTIVES: Dict[str, Callable] = {
+    "CheapestArc": lambda seed, n_neighbors: CheapestArc(seed=seed),
+    "SemiGreedyArc": lambda seed, n_neighbors: SemiGreedyArc(seed=seed),
+    "CheapestInsertion": lambda seed, n_neighbors: CheapestInsertion(seed=seed, n_neighbors=n_neighbors),
+    "RandomInsertion": lambda seed, n_neighbors: RandomInsertion(seed=seed, n_neighbors=n_neighbors),
+    "SemiGreedyInsertion": lambda seed, n_neighbors: SemiGreedyInsertion(seed=seed, n_neighbors=n_neighbors),
+    "SpaceFillingCurve": lambda seed, n_neighbors: SpaceFillingCurve(seed=seed),
+    "GreedyEdge": lambda seed, n_neighbors: GreedyEdge(seed=seed, n_neighbors=n_neighbors or 10),
+    "Savings": lambda seed, n_neighbors: Savings(seed=seed, n_neighbors=n_neighbors or 10),
+}
+
+LOCAL_SEARCHES: Dict[str, Callable] = {
+    "LocalSearch": lambda seed, n_neighbors: LocalSearch(seed=seed, n_neighbors=n_neighbors),
+    "SimulatedAnnealing": lambda seed, n_neighbors: SimulatedAnnealing(seed=seed, n_neighbors=n_neighbors),
+    "LinKernighan": lambda seed, n_neighbors: LinKernighan(seed=seed, n_neighbors=n_neighbors),
+}
+
+SIZES = (100, 1000)
+MAX_ITER = 10
+MAX_MOVES = 100000
+N_NEIGHBORS = 10
+TARGET_GAP = 0.05
+
+# Relative changes tolerated by compare before reporting a regression
+COST_TOLERANCE = 0.01
+TIME_TOLERANCE = 0.2
+
+
+# Initialize logger
+log = logging.getLogger(__name__)
+
+
+def make_instances(
+    sizes: Sequence[int] = SIZES,
+    files: Sequence[str] = (),
+    seed: int = 12
+) -> Dict[str, np.ndarray]:
+    """Coordinates of benchmark instances by name
+
+    Parameters
+    ----------
+    sizes : Sequence[int], optional
+        Numbers of uniformly distributed random points in the unit square, by default (100, 1000)
+
+    files : Sequence[str], optional
+        Paths of TSPLIB-style files with a NODE_COORD_SECTION, by default ()
+
+    seed : int, optional
+        Random generator seed of generated instances, by default 12
+
+    Returns
+    -------
+    Dict[str, np.ndarray]
+        Coordinates of each instance, named "uniform<size>" or by file name
+    """
+    instances = {}
+    for size in sizes:
+        rng = np.random.default_rng(seed + size)
+        instances[f"uniform{size}"] = rng.random((size, 2))
+    for file_path in files:
+        name = os.path.splitext(os.path.basename(file_path))[0]
+        instances[name] = np.array(read_tsp_file(file_path), dtype=np.double)
+    return instances
+
+
+def run_case(
+    problem: object,
+    constructive: object,
+    local_search: object,
+    max_iter: int = MAX_ITER,
+    max_moves: int = MAX_MOVES,
+    time_limit: float = float("inf")
+) -> dict:
+    """Runs a GRASP loop recording the time spent on each phase
+
+    Parameters
+    ----------
+    problem : Problem | CoordinateProblem
+        Problem solved
+
+    constructive : Any
+        Constructive heuristic instance
+
+    local_search : Any
+        Local search heuristic instance
+
+    max_iter : int, optional
+        Maximum number of iterations, by default 10
+
+    max_moves : int, optional
+        Maximum number of local search moves, by default 100000
+
+    time_limit : float, optional
+        Time limit (s) of the case, by default float("inf")
+
+    Returns
+    -------
+    dict
+        Keys "n_iter", "construction_time" (mean per iteration, s), "search_time" (total, s),
+        "moves_per_second", "cost" and "trace" (pairs of elapsed time and best cost)
+    """
+    local_search.set_problem(problem)
+    construction_time = 0.0
+    search_time = 0.0
+    n_moves = 0
+    n_iter = 0
+    best_cost = float("inf")
+    trace = []
+    start_time = time.perf_counter()
+    for _ in range(max_iter):
+        if time.perf_counter() - start_time > time_limit:
+            break
+        t0 = time.perf_counter()
+        constructive.do(problem)
+        t1 = time.perf_counter()
+        time_left = time_limit - (t1 - start_time)
+        local_search.do(constructive.tour, max_iter=max_moves, time_limit=time_left)
+        t2 = time.perf_counter()
+        construction_time += t1 - t0
+        search_time += t2 - t1
+        n_moves += local_search.n_moves
+        n_iter += 1
+        if constructive.tour.cost < best_cost:
+            best_cost = constructive.tour.cost
+            trace.append([t2 - start_time, best_cost])
+    return {
+        "n_iter": n_iter,
+        "construction_time": construction_time / max(n_iter, 1),
+        "search_time": search_time,
+        "moves_per_second": n_moves / search_time if search_time > 0 else 0.0,
+        "cost": best_cost,
+        "trace": trace,
+    }
+
+
+def run_benchmark(
+    instances: Dict[str, np.ndarray],
+    constructives: Sequence[str] = tuple(CONSTRUCTIVES),
+    local_searches: Sequence[str] = tuple(LOCAL_SEARCHES),
+    max_iter: int = MAX_ITER,
+    max_moves: int = MAX_MOVES,
+    time_limit: float = float("inf"),
+    n_neighbors: Optional[int] = N_NEIGHBORS,
+    target_gap: float = TARGET_GAP,
+    seed: int = 12
+) -> dict:
+    """Runs every constructive and local search combination on each instance
+
+    The gap of each case refers to the best cost found among all combinations for the same
+    instance, and time-to-target is the time elapsed until a case reaches
+    ``(1 + target_gap)`` times this reference (None if never reached).
+
+    Parameters
+    ----------
+    instances : Dict[str, np.ndarray]
+        Coordinates of instances by name, as returned by `make_instances`
+
+    constructives : Sequence[str], optional
+        Names of constructive heuristics in `CONSTRUCTIVES`, by default all
+
+    local_searches : Sequence[str], optional
+        Names of local search heuristics in `LOCAL_SEARCHES`, by default all
+
+    max_iter : int, optional
+        Maximum number of iterations of each case, by default 10
+
+    max_moves : int, optional
+        Maximum number of local search moves, by default 100000
+
+    time_limit : float, optional
+        Time limit (s) of each case, by default float("inf")
+
+    n_neighbors : int, optional
+        Neighborhood size of local searches and insertions, by default 10
+
+    target_gap : float, optional
+        Relative gap defining time-to-target, by default 0.05
+
+    seed : int, optional
+        Random generator seed of operators, by default 12
+
+    Returns
+    -------
+    dict
+        Run settings under "meta" and a list of results under "cases"
+    """
+    cases = []
+    for name, X in instances.items():
+        problem = CoordinateProblem(X)
+        for constr_name in constructives:
+            for ls_name in local_searches:
+                log.info(f"Running {name} with {constr_name} and {ls_name}")
+                constructive = CONSTRUCTIVES[constr_name](seed, n_neighbors)
+                local_search = LOCAL_SEARCHES[ls_name](seed, n_neighbors)
+                result = run_case(problem, constructive, local_search, max_iter, max_moves, time_limit)
+                cases.append({
+                    "instance": name,
+                    "n_nodes": problem.n_nodes,
+                    "constructive": constr_name,
+                    "local_search": ls_name,
+                    **result
+                })
+
+    # Gaps and time-to-target refer to the best cost of each instance
+    reference = {}
+    for case in cases:
+        reference[case["instance"]] = min(reference.get(case["instance"], float("inf")), case["cost"])
+    for case in cases:
+        ref = reference[case["instance"]]
+        case["gap"] = case["cost"] / ref - 1.0
+        target = ref * (1.0 + target_gap)
+        case["time_to_target"] = next((t for t, cost in case["trace"] if cost <= target), None)
+
+    meta = {
+        "cythonized": cythonized,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "max_iter": max_iter,
+        "max_moves": max_moves,
+        "time_limit": time_limit if np.isfinite(time_limit) else None,
+        "n_neighbors": n_neighbors,
+        "target_gap": target_gap,
+        "seed": seed,
+    }
+    return {"meta": meta, "cases": cases}
+
+
+def save_results(file_path: str, results: dict):
+    """Write benchmark results to a JSON file"""
+    with open(file_path, mode="w", encoding="utf8") as file:
+        json.dump(results, file, indent=2)
+
+
+def load_results(file_path: str) -> dict:
+    """Read benchmark results from a JSON file"""
+    with open(file_path, mode="r", encoding="utf8") as file:
+        return json.load(file)
+
+
+def compare_results(
+    baseline: dict,
+    results: dict,
+    cost_tolerance: float = COST_TOLERANCE,
+    time_tolerance: float = TIME_TOLERANCE
+) -> List[str]:
+    """Lists regressions of results with respect to a baseline
+
+    Cases are matched by instance, constructive and local search. Costs regress when they
+    increase by more than `cost_tolerance`, construction time and time-to-target when they
+    increase by more than `time_tolerance`, and moves per second when they decrease by more
+    than `time_tolerance` (all relative to the baseline).
+
+    Parameters
+    ----------
+    baseline : dict
+        Results of reference, as returned by `run_benchmark`
+
+    results : dict
+        New results
+
+    cost_tolerance : float, optional
+        Relative cost increase tolerated, by default 0.01
+
+    time_tolerance : float, optional
+        Relative change of time measurements tolerated, by default 0.2
+
+    Returns
+    -------
+    List[str]
+        Description of each regression (empty if none)
+    """
+    def key(case):
+        return case["instance"], case["constructive"], case["local_search"]
+
+    old_cases = {key(case): case for case in baseline["cases"]}
+    regressions = []
+    for case in results["cases"]:
+        old = old_cases.get(key(case))
+        if old is None:
+            continue
+        label = "/".join(key(case))
+        if case["cost"] > old["cost"] * (1.0 + cost_tolerance):
+            regressions.append(f"{label}: cost {old['cost']:.6g} -> {case['cost']:.6g}")
+        if case["construction_time"] > old["construction_time"] * (1.0 + time_tolerance):
+            regressions.append(
+                f"{label}: construction time {old['construction_time']:.3g}s -> {case['construction_time']:.3g}s"
+            )
+        if case["moves_per_second"] < old["moves_per_second"] * (1.0 - time_tolerance):
+            regressions.append(
+                f"{label}: moves per second {old['moves_per_second']:.4g} -> {case['moves_per_second']:.4g}"
+            )
+        if old["time_to_target"] is not None and (
+            case["time_to_target"] is None
+            or case["time_to_target"] > old["time_to_target"] * (1.0 + time_tolerance)
+        ):
+            new_time = "never" if case["time_to_target"] is None else f"{case['time_to_target']:.3g}s"
+            regressions.append(f"{label}: time to target {old['time_to_target']:.3g}s -> {new_time}")
+    return regressions
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(prog="python -m tspgrasp.bench", description=__doc__.splitlines()[0])
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = subparsers.add_parser("run", help="Run benchmarks and write results to a JSON file")
+    run_parser.add_argument("-o", "--output", default="bench_results.json", help="Results file")
+    run_parser.add_argument("--sizes", type=int, nargs="*", default=list(SIZES), help="Generated instance sizes")
+    run_parser.add_argument("--instances", nargs="*", default=[], help="TSPLIB-style instance files")
+    run_parser.add_argument(
+        "--constructives", nargs="+", default=list(CONSTRUCTIVES), choices=list(CONSTRUCTIVES)
+    )
+    run_parser.add_argument(
+        "--local-searches", nargs="+", default=list(LOCAL_SEARCHES), choices=list(LOCAL_SEARCHES)
+    )
+    run_parser.add_argument("--max-iter", type=int, default=MAX_ITER)
+    run_parser.add_argument("--max-moves", type=int, default=MAX_MOVES)
+    run_parser.add_argument("--time-limit", type=float, default=float("inf"), help="Time limit (s) per case")
+    run_parser.add_argument("--n-neighbors", type=int, default=N_NEIGHBORS)
+    run_parser.add_argument("--target-gap", type=float, default=TARGET_GAP)
+    run_parser.add_argument("--seed", type=int, default=12)
+
+    compare_parser = subparsers.add_parser("compare", help="Compare two results files")
+    compare_parser.add_argument("baseline", help="Results file of reference")
+    compare_parser.add_argument("results", help="New results file")
+    compare_parser.add_argument("--cost-tolerance", type=float, default=COST_TOLERANCE)
+    compare_parser.add_argument("--time-tolerance", type=float, default=TIME_TOLERANCE)
+
+    args = parser.parse_args(argv)
+    if args.command == "run":
+        logging.basicConfig(level=logging.INFO, format="%(message)s")
+        instances = make_instances(args.sizes, args.instances, args.seed)
+        results = run_benchmark(
+            instances,
+            constructives=args.constructives,
+            local_searches=args.local_searches,
+            max_iter=args.max_iter,
+            max_moves=args.max_moves,
+            time_limit=args.time_limit,
+            n_neighbors=args.n_neighbors,
+            target_gap=args.target_gap,
+            seed=args.seed,
+        )
+        save_results(args.output, results)
+        return 0
+
+    regressions = compare_results(
+        load_results(args.baseline),
+        load_results(args.results),
+        cost_tolerance=args.cost_tolerance,
+        time_tolerance=args.time_tolerance,
+    )
+    for regression in regressions:
+        print(regression)
+    print(f"{len(regressions)} regression(s) found")
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
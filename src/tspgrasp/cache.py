@@ -0,0 +1,50 @@
+from collections import OrderedDict
+from typing import Any, Optional
+
+
+class TourCache:
+
+    size: int
+    n_lookups: int
+    n_hits: int
+
+    def __init__(self, size: int):
+        """Bounded mapping of canonical tour hashes, discarding the least recently used ones
+
+        Parameters
+        ----------
+        size : int
+            Maximum number of tours kept
+        """
+        assert size >= 1, "size must be a positive integer"
+        self.size = size
+        self.n_lookups = 0
+        self.n_hits = 0
+        self._data = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: int) -> bool:
+        return key in self._data
+
+    def get(self, key: int) -> Optional[Any]:
+        """Value stored for key, or None if it was not seen (or was discarded)"""
+        self.n_lookups = self.n_lookups + 1
+        if key not in self._data:
+            return None
+        self.n_hits = self.n_hits + 1
+        self._data.move_to_end(key)
+        return self._data[key]
+
+    def put(self, key: int, value: Any = True):
+        """Store value for key, discarding the least recently used key when full"""
+        self._data[key] = value
+        self._data.move_to_end(key)
+        if len(self._data) > self.size:
+            self._data.popitem(last=False)
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of lookups of keys already seen"""
+        return self.n_hits / self.n_lookups if self.n_lookups > 0 else 0.0
@@ -4,8 +4,7 @@
 from libcpp cimport bool
 from libcpp.vector cimport vector
 
-from tspgrasp.cython.node cimport Node
-from tspgrasp.cython.problem cimport Problem
+from tspgrasp.cython.problem cimport Problem, CoordinateProblem
 from tspgrasp.cython.tour cimport Tour
 from tspgrasp.cython.random cimport RandomGen
 from tspgrasp.cython.utils cimport cmax, cmin, carg_min, cpop
@@ -16,15 +15,36 @@ cdef class Constructive:
     cdef public:
         Tour tour
         Problem problem
-        object nodes
         vector[int] queue
         RandomGen rng
+        object seed
+
+    cdef:
+        vector[int] _insert_after
+        vector[double] _insert_cost
+        vector[int] _pos
+        vector[int] _unvisited
+        vector[int] _where
+        vector[double] _costs
+        vector[int] _rcl
+        bool _restricted
+        int[:] _nb_ptr
+        int[:] _nb_idx
 
     cpdef void do(self, Problem problem) except *
-    cdef double calc_insertion(Constructive self, Node new) except *
-    cdef void insert(Constructive self, Node new) except *
+    cdef double calc_insertion(Constructive self, int new) except *
+    cdef void insert(Constructive self, int new) except *
     cdef void start(Constructive self) except *
     cdef vector[double] calc_candidates(Constructive self) except *
+    cdef void _init_unvisited(Constructive self) except *
+    cdef void _visit(Constructive self, int node) except *
+    cdef int _nearest_unvisited(Constructive self, int node) except *
+    cdef void _build_tour(Constructive self, vector[int] seq) except *
+    cdef void _init_insertions(Constructive self, object n_neighbors) except *
+    cdef void _scan_insertion(Constructive self, int new) except *
+    cdef bool _scan_neighbors(Constructive self, int new) except *
+    cdef void _try_arc(Constructive self, int new, int node) except *
+    cdef void _insert_cheapest(Constructive self, int new) except *
 
 
 cdef class CheapestArc(Constructive):
@@ -33,14 +53,30 @@ cdef class CheapestArc(Constructive):
 
 cdef class SemiGreedyArc(CheapestArc):
 
+    cdef public:
+        bool reactive
+
     cdef:
         double alpha[2]
+        int _level
+        double _best_cost
+        vector[double] _levels
+        vector[double] _cost_sum
+        vector[int] _counts
+        vector[double] _probs
+
+    cdef double _draw_alpha(SemiGreedyArc self) except *
+    cdef void _reset_feedback(SemiGreedyArc self) except *
 
 
 cdef class CheapestInsertion(CheapestArc):
 
-    cdef double calc_insertion(CheapestInsertion self, Node new) except *
-    cdef void insert(CheapestInsertion self, Node new) except *
+    cdef public:
+        object n_neighbors
+
+    cdef double calc_insertion(CheapestInsertion self, int new) except *
+    cdef void insert(CheapestInsertion self, int new) except *
+    cdef void start(CheapestInsertion self) except *
 
 
 cdef class RandomInsertion(CheapestInsertion):
@@ -49,8 +85,43 @@ cdef class RandomInsertion(CheapestInsertion):
 
 cdef class SemiGreedyInsertion(SemiGreedyArc):
 
-    cdef double calc_insertion(SemiGreedyInsertion self, Node new) except *
-    cdef void insert(SemiGreedyInsertion self, Node new) except *
+    cdef public:
+        object n_neighbors
+
+    cdef double calc_insertion(SemiGreedyInsertion self, int new) except *
+    cdef void insert(SemiGreedyInsertion self, int new) except *
+    cdef void start(SemiGreedyInsertion self) except *
+
+
+cdef class SpaceFillingCurve(Constructive):
+    pass
+
+
+cdef class GreedyEdge(Constructive):
+
+    cdef public:
+        double alpha
+        int n_neighbors
+
+    cdef:
+        vector[int] _adj
+        vector[int] _degree
+        vector[int] _parent
+
+    cdef double edge_cost(GreedyEdge self, int i, int j) except *
+    cdef int _find(GreedyEdge self, int node) except *
+    cdef void _join_fragments(GreedyEdge self, int[:, :] nearest) except *
+
+
+cdef class Savings(GreedyEdge):
+
+    cdef:
+        int _hub
+
+    cdef double edge_cost(Savings self, int i, int j) except *
+
+
+cdef long long hilbert_index(int side, int x, int y) noexcept nogil
 
 
 cdef double clip(double value, double l, double u) except *
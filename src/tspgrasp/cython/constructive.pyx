@@ -3,6 +3,7 @@
 
 from libcpp cimport bool
 from libcpp.vector cimport vector
+from libc.math cimport pow
 
 from cython.operator cimport dereference as deref
 
@@ -10,8 +11,7 @@ from typing import List
 
 import numpy as np
 
-from tspgrasp.cython.node cimport Node
-from tspgrasp.cython.problem cimport Problem
+from tspgrasp.cython.problem cimport Problem, CoordinateProblem, as_problem
 from tspgrasp.cython.tour cimport Tour
 from tspgrasp.cython.random cimport RandomGen
 from tspgrasp.cython.utils cimport cmax, cmin, carg_min, cpop
@@ -23,56 +23,220 @@ cdef extern from "math.h":
     double HUGE_VAL
 
 
+# Size of sorted nearest neighbor rows used to pick the next arc
+cdef int NEAREST_SIZE = 16
+
+# Bits per axis of the space filling curve grid
+cdef int HILBERT_ORDER = 16
+
+# Discrete alpha values of reactive semi-greedy constructions and
+# amplification of their differences in mean cost
+cdef int REACTIVE_LEVELS = 10
+cdef double REACTIVE_AMPLIFICATION = 10.0
+
+
 cdef class Constructive:
 
     def __init__(self, seed=None):
+        self.seed = seed
         self.rng = RandomGen(seed)
-        self.nodes = []
         self.queue = vector[int]()
 
-    def __call__(self, double[:, :] D) -> Solution:
-        cdef int n_nodes = D.shape[0]
-        assert D.shape[0] == D.shape[1], "D must be a squared matrix"
-        problem = Problem(n_nodes, D)
+    def __reduce__(self):
+        return (type(self), (self.seed,))
+
+    def set_seed(self, seed):
+        self.seed = seed
+        self.rng = RandomGen(seed)
+
+    def __call__(self, D) -> Solution:
+        problem = as_problem(D)
         self.do(problem)
-        self.tour.calc_costs(D)
+        self.tour.calc_costs(problem)
         sol = Solution(self.tour)
         return sol
 
-    cdef double calc_insertion(Constructive self, Node new) except *:
-        return self.problem.D[self.tour.depot.prev.index, new.index]
+    def feedback(self, cost: float):
+        # Cost of the local optimum obtained from the last construction
+        pass
+
+    cdef double calc_insertion(Constructive self, int new) except *:
+        return self.problem.dist(self.tour.pred[self.tour.depot], new)
 
-    cdef void insert(Constructive self, Node new) except *:
+    cdef void insert(Constructive self, int new) except *:
         self.tour.insert(new)
 
     cdef void start(Constructive self) except *:
         cdef:
-            Node node
             int *firstptr
-            int idx, first
-        self.nodes = [Node(i) for i in range(self.problem.n_nodes)]
+            int i, idx, first
         self.queue = vector[int]()
-        for node in self.nodes:
-            self.queue.push_back(node.index)
+        for i in range(self.problem.n_nodes):
+            self.queue.push_back(i)
+        self._insert_after.assign(self.problem.n_nodes, -1)
         firstptr = self.rng.choice(self.queue)
         first = deref(firstptr)
         idx = cpop(self.queue, first)
-        node = self.nodes[idx]
-        self.tour = Tour(node)
+        self.tour = Tour(self.problem.n_nodes, idx)
 
     cdef vector[double] calc_candidates(Constructive self) except *:
         cdef:
-            Node node
             vector[double] costs
             int idx
             double cost
         costs = vector[double]()
         for idx in self.queue:
-            node = self.nodes[idx]
-            cost = self.calc_insertion(node)
+            cost = self.calc_insertion(idx)
             costs.push_back(cost)
         return costs
 
+    cdef void _init_unvisited(Constructive self) except *:
+        cdef:
+            int i
+        self._unvisited = self.queue
+        self.queue.clear()
+        self._where.assign(self.problem.n_nodes, -1)
+        for i in range(<int>self._unvisited.size()):
+            self._where[self._unvisited[i]] = i
+
+    cdef void _visit(Constructive self, int node) except *:
+        cdef:
+            int i, last
+        # Swap with the last unvisited node for O(1) removal
+        i = self._where[node]
+        last = self._unvisited.back()
+        self._unvisited[i] = last
+        self._where[last] = i
+        self._unvisited.pop_back()
+        self._where[node] = -1
+
+    cdef int _nearest_unvisited(Constructive self, int node) except *:
+        cdef:
+            int best, i
+            double best_cost, cost
+        best = -1
+        best_cost = HUGE_VAL
+        for i in self._unvisited:
+            cost = self.problem.dist(node, i)
+            if cost < best_cost or (cost == best_cost and i < best):
+                best = i
+                best_cost = cost
+        return best
+
+    cdef void _build_tour(Constructive self, vector[int] seq) except *:
+        cdef:
+            int i
+        self.tour = Tour(self.problem.n_nodes, seq[0])
+        for i in range(1, <int>seq.size()):
+            self.tour.insert(seq[i])
+
+    cdef void _init_insertions(Constructive self, object n_neighbors) except *:
+        cdef:
+            int idx
+
+        # Neighborhoods restrict insertions to arcs next to nearby nodes already in the tour
+        self._restricted = n_neighbors is not None
+        if self._restricted:
+            self._nb_ptr, self._nb_idx = self.problem.neighbors(n_neighbors)
+        self._insert_cost.assign(self.problem.n_nodes, HUGE_VAL)
+        self._pos.assign(self.problem.n_nodes, 0)
+        for idx in self.queue:
+            self._scan_insertion(idx)
+
+    cdef void _scan_insertion(Constructive self, int new) except *:
+        cdef:
+            double cost, cfrom, cnext, cbase, c
+            int node, next_node
+
+        if self._restricted and self._scan_neighbors(new):
+            return
+
+        # First cheapest arc following the tour from the depot
+        cost = HUGE_VAL
+        node = self.tour.depot
+        while True:
+            next_node = self.tour.succ[node]
+            cfrom = self.problem.dist(node, new)
+            cnext = self.problem.dist(new, next_node)
+            cbase = self.problem.dist(node, next_node)
+            c = cfrom + cnext - cbase
+            if c < cost:
+                self._insert_after[new] = node
+                cost = c
+            node = next_node
+            if node == self.tour.depot:
+                break
+        self._insert_cost[new] = cost
+
+    cdef bool _scan_neighbors(Constructive self, int new) except *:
+        cdef:
+            int k, node
+
+        # Arcs entering and leaving neighbors in the tour, or none to scan the whole tour instead
+        self._insert_cost[new] = HUGE_VAL
+        for k in range(self._nb_ptr[new], self._nb_ptr[new + 1]):
+            node = self._nb_idx[k]
+            if self.tour.succ[node] < 0:
+                continue
+            self._try_arc(new, node)
+            self._try_arc(new, self.tour.pred[node])
+        return self._insert_cost[new] < HUGE_VAL
+
+    cdef void _try_arc(Constructive self, int new, int node) except *:
+        cdef:
+            double c
+        c = self.problem.dist(node, new) + self.problem.dist(new, self.tour.succ[node]) \
+            - self.problem.dist(node, self.tour.succ[node])
+        # Without an arc yet (infinite distances), there is no position to compare ties with
+        if c < self._insert_cost[new] or (
+            c == self._insert_cost[new] and (
+                self._insert_after[new] < 0 or self._pos[node] < self._pos[self._insert_after[new]]
+            )
+        ):
+            self._insert_after[new] = node
+            self._insert_cost[new] = c
+
+    cdef void _insert_cheapest(Constructive self, int new) except *:
+        cdef:
+            int a, b, node, idx, k, i
+            int arcs[3]
+
+        # Insert new after a, and renumber the following positions
+        a = self._insert_after[new]
+        b = self.tour.succ[a]
+        self.tour.insert_after(new, a)
+        node = new
+        while node != self.tour.depot:
+            self._pos[node] = self._pos[self.tour.pred[node]] + 1
+            node = self.tour.succ[node]
+
+        # Only arcs leaving a and new changed, and the previous arc leaving a was removed,
+        # so cached insertions are rescanned only when their arc is gone.
+        # Ties keep the arc closest to the depot, as a complete scan would.
+        if self._restricted:
+            for idx in self.queue:
+                if self._insert_after[idx] == a:
+                    self._scan_insertion(idx)
+
+            # New arcs are next to a, new and b, so only their neighbors are updated
+            arcs[0] = a
+            arcs[1] = new
+            arcs[2] = b
+            for i in range(3):
+                for k in range(self._nb_ptr[arcs[i]], self._nb_ptr[arcs[i] + 1]):
+                    idx = self._nb_idx[k]
+                    if self.tour.succ[idx] < 0:
+                        self._try_arc(idx, a)
+                        self._try_arc(idx, new)
+            return
+
+        for idx in self.queue:
+            if self._insert_after[idx] == a:
+                self._scan_insertion(idx)
+                continue
+            self._try_arc(idx, a)
+            self._try_arc(idx, new)
+
     cpdef void do(self, Problem problem) except *:
         pass
 
@@ -81,90 +245,176 @@ cdef class CheapestArc(Constructive):
 
     cpdef void do(self, Problem problem) except *:
         cdef:
-            int choice, idx, qsize
-            vector[double] costs
-            Node node
+            int[:, :] nearest
+            int size, last, node, k
         self.problem = problem
         self.start()
-        qsize = <int>self.queue.size()
-        while qsize > 0:
-            costs = self.calc_candidates()
-            choice = carg_min(costs)
-            idx = cpop(self.queue, choice)
-            node = self.nodes[idx]
+        self._init_unvisited()
+
+        # Nearest unvisited node from rows sorted by distance (ties by index)
+        size = min(NEAREST_SIZE, problem.n_nodes)
+        nearest = problem.nearest_sorted(size)
+        while self._unvisited.size() > 0:
+            last = self.tour.pred[self.tour.depot]
+            node = -1
+            for k in range(size):
+                if self._where[nearest[last, k]] >= 0:
+                    node = nearest[last, k]
+                    break
+
+            # Scan every unvisited node if the row is exhausted or ties may lie beyond it
+            if node < 0 or (
+                size < problem.n_nodes
+                and problem.dist(last, node) >= problem.dist(last, nearest[last, size - 1])
+            ):
+                node = self._nearest_unvisited(last)
+            self._visit(node)
             self.insert(node)
-            qsize = <int>self.queue.size()
 
 
 cdef class SemiGreedyArc(CheapestArc):
 
-    def __init__(self, alpha=(0.0, 1.0), seed=None):
+    def __init__(self, alpha=(0.0, 1.0), seed=None, reactive=False):
+        cdef int k
         super().__init__(seed)
         if isinstance(alpha, float) or isinstance(alpha, int):
             alpha = (alpha, alpha)
         self.alpha[0] = alpha[0]
         self.alpha[1] = alpha[1]
+        self.reactive = reactive
+        self._levels.clear()
+        for k in range(REACTIVE_LEVELS):
+            self._levels.push_back(alpha[0] + k * (alpha[1] - alpha[0]) / (REACTIVE_LEVELS - 1))
+        self._reset_feedback()
+
+    def __reduce__(self):
+        return (type(self), ((self.alpha[0], self.alpha[1]), self.seed, self.reactive))
+
+    @property
+    def alpha_levels(self) -> List[float]:
+        return list(self._levels)
+
+    @property
+    def alpha_probs(self) -> List[float]:
+        return list(self._probs)
+
+    def feedback(self, cost: float):
+        # Mean local optimum cost of each alpha value sets its probability (reactive GRASP)
+        cdef:
+            int k
+            double q, total = 0.0
+        if not self.reactive or self._level < 0:
+            return
+        self._cost_sum[self._level] = self._cost_sum[self._level] + cost
+        self._counts[self._level] = self._counts[self._level] + 1
+        self._best_cost = min(self._best_cost, cost)
+        self._level = -1
+        for k in range(REACTIVE_LEVELS):
+            q = 1.0
+            if self._counts[k] > 0 and self._cost_sum[k] > 0.0:
+                q = pow(self._best_cost * self._counts[k] / self._cost_sum[k], REACTIVE_AMPLIFICATION)
+            self._probs[k] = q
+            total = total + q
+        for k in range(REACTIVE_LEVELS):
+            self._probs[k] = self._probs[k] / total
+
+    cdef void _reset_feedback(SemiGreedyArc self) except *:
+        self._level = -1
+        self._best_cost = HUGE_VAL
+        self._cost_sum.assign(REACTIVE_LEVELS, 0.0)
+        self._counts.assign(REACTIVE_LEVELS, 0)
+        self._probs.assign(REACTIVE_LEVELS, 1.0 / REACTIVE_LEVELS)
+
+    cdef double _draw_alpha(SemiGreedyArc self) except *:
+        cdef:
+            int k = 0
+            double u, acc
+        if not self.reactive:
+            return self.alpha[0] + self.rng.random() * (self.alpha[1] - self.alpha[0])
+        u = self.rng.random()
+        acc = self._probs[0]
+        while k < REACTIVE_LEVELS - 1 and u >= acc:
+            k = k + 1
+            acc = acc + self._probs[k]
+        self._level = k
+        return self._levels[k]
 
     cpdef void do(self, Problem problem) except *:
         cdef:
             int i, idx, choice, qsize
             int *choiceptr
-            double alpha, worst, best, tol
-            vector[double] costs
-            vector[int] rcl
-            Node node
+            double alpha, worst, best, tol, cost
 
+        # Feedback from another problem does not apply
+        if problem is not self.problem:
+            self._reset_feedback()
         self.problem = problem
         self.start()
         qsize = <int>self.queue.size()
-        alpha = self.alpha[0] + self.rng.random() * (self.alpha[1] - self.alpha[0])
+        alpha = self._draw_alpha()
         alpha = clip(alpha, 0.000001, 0.9999)
         while qsize > 0:
-            costs = self.calc_candidates()
-            worst = cmax(costs)
-            best = cmin(costs)
+
+            # Candidate costs and their range in a single pass over reused buffers
+            self._costs.resize(qsize)
+            worst = -HUGE_VAL
+            best = HUGE_VAL
+            for i in range(qsize):
+                cost = self.calc_insertion(self.queue[i])
+                self._costs[i] = cost
+                if cost > worst:
+                    worst = cost
+                if cost < best:
+                    best = cost
             tol = worst - alpha * (worst - best)
-            rcl = vector[int]()
-            for i in range(<int>costs.size()):
-                if costs[i] <= tol:
-                    rcl.push_back(i)
-            choiceptr = self.rng.choice(rcl)
+            self._rcl.clear()
+            for i in range(qsize):
+                if self._costs[i] <= tol:
+                    self._rcl.push_back(i)
+            choiceptr = self.rng.choice(self._rcl)
             choice = deref(choiceptr)
             idx = cpop(self.queue, choice)
-            node = self.nodes[idx]
-            self.insert(node)
+            self.insert(idx)
             qsize = <int>self.queue.size()
 
 
 cdef class CheapestInsertion(CheapestArc):
 
-    cdef double calc_insertion(CheapestInsertion self, Node new) except *:
-        cdef:
-            double cost, cfrom, cnext, cbase, c
-            Node node
-            bool first_iter
-        cost = HUGE_VAL
-        node = self.tour.depot
-        first_iter = True
-        while not node.is_depot or first_iter:
-            cfrom = self.problem.D[node.index, new.index]
-            cnext = self.problem.D[new.index, node.next.index]
-            cbase = self.problem.D[node.index, node.next.index]
-            c = cfrom + cnext - cbase
-            if c < cost:
-                new.prev = node
-                cost = c
-            node = node.next
-            first_iter = False
-        return cost
+    def __init__(self, seed=None, n_neighbors=None):
+        super().__init__(seed)
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        self.n_neighbors = n_neighbors
+
+    def __reduce__(self):
+        return (type(self), (self.seed, self.n_neighbors))
+
+    cdef double calc_insertion(CheapestInsertion self, int new) except *:
+        return self._insert_cost[new]
+
+    cdef void insert(CheapestInsertion self, int new) except *:
+        self._insert_cheapest(new)
+
+    cdef void start(CheapestInsertion self) except *:
+        Constructive.start(self)
+        self._init_insertions(self.n_neighbors)
 
-    cdef void insert(CheapestInsertion self, Node new) except *:
+    cpdef void do(self, Problem problem) except *:
         cdef:
-            Node node
-        node = new.prev
-        new.next = node.next
-        node.next.prev = new
-        node.next = new
+            int choice, idx, qsize, i
+            double best
+        self.problem = problem
+        self.start()
+        qsize = <int>self.queue.size()
+        while qsize > 0:
+            choice = 0
+            best = HUGE_VAL
+            for i in range(qsize):
+                if self._insert_cost[self.queue[i]] < best:
+                    best = self._insert_cost[self.queue[i]]
+                    choice = i
+            idx = cpop(self.queue, choice)
+            self.insert(idx)
+            qsize = <int>self.queue.size()
 
 
 cdef class RandomInsertion(CheapestInsertion):
@@ -174,7 +424,6 @@ cdef class RandomInsertion(CheapestInsertion):
             int choice, idx, qsize
             int *choiceptr
             vector[double] costs
-            Node node
         self.problem = problem
         self.start()
         qsize = <int>self.queue.size()
@@ -182,41 +431,237 @@ cdef class RandomInsertion(CheapestInsertion):
             choiceptr = self.rng.choice(range_idx(self.queue))
             choice = deref(choiceptr)
             idx = cpop(self.queue, choice)
-            node = self.nodes[idx]
-            self.calc_insertion(node)
-            self.insert(node)
+            self.calc_insertion(idx)
+            self.insert(idx)
             qsize = <int>self.queue.size()
 
 
 cdef class SemiGreedyInsertion(SemiGreedyArc):
 
-    cdef double calc_insertion(SemiGreedyInsertion self, Node new) except *:
+    def __init__(self, alpha=(0.0, 1.0), seed=None, n_neighbors=None, reactive=False):
+        super().__init__(alpha, seed, reactive)
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        self.n_neighbors = n_neighbors
+
+    def __reduce__(self):
+        return (type(self), ((self.alpha[0], self.alpha[1]), self.seed, self.n_neighbors, self.reactive))
+
+    cdef double calc_insertion(SemiGreedyInsertion self, int new) except *:
+        return self._insert_cost[new]
+
+    cdef void insert(SemiGreedyInsertion self, int new) except *:
+        self._insert_cheapest(new)
+
+    cdef void start(SemiGreedyInsertion self) except *:
+        Constructive.start(self)
+        self._init_insertions(self.n_neighbors)
+
+
+cdef class SpaceFillingCurve(Constructive):
+
+    cpdef void do(self, Problem problem) except *:
         cdef:
-            double cost, cfrom, cnext, cbase, c
-            Node node
-            bool first_iter
-        cost = HUGE_VAL
-        node = self.tour.depot
-        first_iter = True
-        while not node.is_depot or first_iter:
-            cfrom = self.problem.D[node.index, new.index]
-            cnext = self.problem.D[new.index, node.next.index]
-            cbase = self.problem.D[node.index, node.next.index]
-            c = cfrom + cnext - cbase
-            if c < cost:
-                new.prev = node
-                cost = c
-            node = node.next
-            first_iter = False
-        return cost
+            int i, n, side, half, sym
+            int[:] gx, gy
+            long long[:] keys
+            double u, v
+        assert isinstance(problem, CoordinateProblem), "SpaceFillingCurve requires a CoordinateProblem"
+        self.problem = problem
+        n = problem.n_nodes
+
+        # Coordinates are mapped into a random quadrant sized box of the curve grid
+        # under a random reflection, so that each call follows a different curve
+        X = np.asarray((<CoordinateProblem>problem).X)
+        lower = X.min(axis=0)
+        extent = max(float(np.max(X.max(axis=0) - lower)), 1e-12)
+        side = 1 << HILBERT_ORDER
+        half = side // 2
+        u = self.rng.random()
+        v = self.rng.random()
+        sym = <int>(self.rng.random() * 8)
+        grid = np.floor((X - lower) / extent * (half - 1)).astype(np.intc)
+        grid[:, 0] += <int>(u * half)
+        grid[:, 1] += <int>(v * half)
+        if sym & 1:
+            grid = grid[:, ::-1]
+        if sym & 2:
+            grid[:, 0] = side - 1 - grid[:, 0]
+        if sym & 4:
+            grid[:, 1] = side - 1 - grid[:, 1]
+        gx = np.ascontiguousarray(grid[:, 0])
+        gy = np.ascontiguousarray(grid[:, 1])
+        out = np.empty(n, dtype=np.int64)
+        keys = out
+        for i in range(n):
+            keys[i] = hilbert_index(side, gx[i], gy[i])
+        self._build_tour(np.argsort(out, kind="stable").astype(np.intc))
+
+
+cdef class GreedyEdge(Constructive):
+
+    def __init__(self, alpha=0.1, n_neighbors=10, seed=None):
+        super().__init__(seed)
+        self.alpha = alpha
+        self.n_neighbors = n_neighbors
 
-    cdef void insert(SemiGreedyInsertion self, Node new) except *:
+    def __reduce__(self):
+        return (type(self), (self.alpha, self.n_neighbors, self.seed))
+
+    cdef double edge_cost(GreedyEdge self, int i, int j) except *:
+        if self.problem.symmetric:
+            return self.problem.dist(i, j)
+        return 0.5 * (self.problem.dist(i, j) + self.problem.dist(j, i))
+
+    cpdef void do(self, Problem problem) except *:
+        cdef:
+            int n, size, i, j, k, e, ri, rj, n_edges
+            int[:, :] nearest
+            int[:] first, second
+            double[:] keys
+            int[:] order
+            double cost
+        self.problem = problem
+        n = problem.n_nodes
+        size = min(self.n_neighbors + 1, n)
+        nearest = problem.nearest_sorted(size)
+
+        # Candidate edges of the nearest neighbor graph, with costs randomly increased
+        # in proportion to their length.
+        # Edges listed by both of their nodes are rejected the second time as cycles.
+        first_arr = np.empty(n * size, dtype=np.intc)
+        second_arr = np.empty(n * size, dtype=np.intc)
+        keys_arr = np.empty(n * size, dtype=np.double)
+        first = first_arr
+        second = second_arr
+        keys = keys_arr
+        n_edges = 0
+        for i in range(n):
+            for k in range(size):
+                j = nearest[i, k]
+                if j == i:
+                    continue
+                cost = self.edge_cost(i, j)
+                if cost == HUGE_VAL:
+                    continue
+                first[n_edges] = i
+                second[n_edges] = j
+                keys[n_edges] = cost + self.alpha * self.rng.random() * self.problem.dist(i, j)
+                n_edges = n_edges + 1
+        order = np.argsort(keys_arr[:n_edges], kind="stable").astype(np.intc)
+
+        # Greedy matching of edges into paths
+        self._adj.assign(2 * n, -1)
+        self._degree.assign(n, 0)
+        self._parent.resize(n)
+        for i in range(n):
+            self._parent[i] = i
+        for e in range(n_edges):
+            i = first[order[e]]
+            j = second[order[e]]
+            if self._degree[i] >= 2 or self._degree[j] >= 2:
+                continue
+            ri = self._find(i)
+            rj = self._find(j)
+            if ri == rj:
+                continue
+            self._parent[ri] = rj
+            self._adj[2 * i + self._degree[i]] = j
+            self._adj[2 * j + self._degree[j]] = i
+            self._degree[i] += 1
+            self._degree[j] += 1
+        self._join_fragments(nearest)
+
+    cdef int _find(GreedyEdge self, int node) except *:
         cdef:
-            Node node
-        node = new.prev
-        new.next = node.next
-        node.next.prev = new
-        node.next = new
+            int root = node
+            int parent
+        while self._parent[root] != root:
+            root = self._parent[root]
+
+        # Path compression
+        while node != root:
+            parent = self._parent[node]
+            self._parent[node] = root
+            node = parent
+        return root
+
+    cdef void _join_fragments(GreedyEdge self, int[:, :] nearest) except *:
+        cdef:
+            int i, k, node, prev, nxt, start, size
+            int *startptr
+            vector[int] seq
+
+        # Endpoints of paths (and isolated nodes) are the unvisited nodes to be linked
+        self.queue.clear()
+        for i in range(self.problem.n_nodes):
+            if self._degree[i] < 2:
+                self.queue.push_back(i)
+        self._init_unvisited()
+        size = nearest.shape[1]
+        startptr = self.rng.choice(self._unvisited)
+        start = deref(startptr)
+        while True:
+
+            # Follow the path from one endpoint to the other
+            self._visit(start)
+            prev = -1
+            node = start
+            while True:
+                seq.push_back(node)
+                nxt = self._adj[2 * node]
+                if nxt == prev:
+                    nxt = self._adj[2 * node + 1]
+                if nxt < 0:
+                    break
+                prev = node
+                node = nxt
+            if node != start:
+                self._visit(node)
+            if self._unvisited.size() == 0:
+                break
+
+            # Continue from the nearest endpoint of another path
+            start = -1
+            for k in range(size):
+                if self._where[nearest[node, k]] >= 0:
+                    start = nearest[node, k]
+                    break
+            if start < 0:
+                start = self._nearest_unvisited(node)
+        self._build_tour(seq)
+
+
+cdef class Savings(GreedyEdge):
+
+    cdef double edge_cost(Savings self, int i, int j) except *:
+        # Savings of serving i and j in a single route from the hub, as negative costs
+        if i == self._hub or j == self._hub:
+            return HUGE_VAL
+        return self.problem.dist(i, j) - self.problem.dist(self._hub, i) - self.problem.dist(j, self._hub)
+
+    cpdef void do(self, Problem problem) except *:
+        self._hub = <int>(self.rng.random() * problem.n_nodes)
+        GreedyEdge.do(self, problem)
+
+
+cdef long long hilbert_index(int side, int x, int y) noexcept nogil:
+    cdef:
+        long long d = 0
+        int s, rx, ry, t
+    s = side // 2
+    while s > 0:
+        rx = 1 if (x & s) > 0 else 0
+        ry = 1 if (y & s) > 0 else 0
+        d += <long long>s * s * ((3 * rx) ^ ry)
+        if ry == 0:
+            if rx == 1:
+                x = side - 1 - x
+                y = side - 1 - y
+            t = x
+            x = y
+            y = t
+        s = s // 2
+    return d
 
 
 cdef double clip(double value, double l, double u) except *:
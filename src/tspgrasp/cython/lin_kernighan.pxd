@@ -0,0 +1,28 @@
+# distutils: language = c++
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
+
+from libcpp cimport bool
+from libcpp.vector cimport vector
+
+from tspgrasp.cython.local_search cimport LocalSearch
+
+
+cdef class LinKernighan(LocalSearch):
+
+    cdef public:
+        int max_depth
+        int breadth
+
+    cdef:
+        vector[int] _first
+        vector[int] _last
+        vector[int] _closing
+        vector[int] _candidates
+        vector[double] _values
+
+    cdef bool _improve_node(LinKernighan self, int u) noexcept nogil
+    cdef bool _lk_move(LinKernighan self, int t1, bool forward) noexcept nogil
+    cdef int _next(LinKernighan self, int node, bool forward) noexcept nogil
+    cdef int _prev(LinKernighan self, int node, bool forward) noexcept nogil
+    cdef void _reverse(LinKernighan self, int a, int b, bool forward) noexcept nogil
+    cdef void _undo(LinKernighan self, int level, bool forward) noexcept nogil
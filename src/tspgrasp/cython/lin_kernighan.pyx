@@ -0,0 +1,178 @@
+# distutils: language = c++
+# cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
+
+from libcpp cimport bool
+from libcpp.vector cimport vector
+
+from tspgrasp.cython.local_search cimport LocalSearch
+
+
+cdef extern from "math.h":
+    double HUGE_VAL
+
+
+cdef class LinKernighan(LocalSearch):
+
+    def __init__(
+        self, seed=None, n_neighbors=None, dont_look_bits=False, max_segment=2, reverse_segments=True,
+        max_depth=5, breadth=5
+    ):
+        super().__init__(seed, n_neighbors, dont_look_bits, max_segment, reverse_segments)
+        assert max_depth >= 1, "max_depth must be a positive integer"
+        assert breadth >= 1, "breadth must be a positive integer"
+        self.max_depth = max_depth
+        self.breadth = breadth
+
+    def __reduce__(self):
+        return (
+            type(self),
+            (
+                self.seed, self.n_neighbors, self.dont_look_bits, self.max_segment, self.reverse_segments,
+                self.max_depth, self.breadth
+            )
+        )
+
+    cdef bool _improve_node(LinKernighan self, int u) noexcept nogil:
+        # Sequential exchanges rely on reversals, hence on symmetric distances
+        if not self._symmetric:
+            return False
+        if self._lk_move(u, True):
+            return True
+        return self._lk_move(u, False)
+
+    cdef bool _lk_move(LinKernighan self, int t1, bool forward) noexcept nogil:
+
+        cdef:
+            int e, c, f, k, i, b, best, level, best_level
+            double gain, closed, best_gain, value, best_value
+
+        # Candidates for the first exchange, breaking arc (t1, e) and adding (e, c)
+        e = self._next(t1, forward)
+        self._candidates.clear()
+        self._values.clear()
+        for k in range(self._nb_ptr[e], self._nb_ptr[e + 1]):
+            c = self._nb_idx[k]
+            if c == e or c == t1 or c == self._next(e, forward):
+                continue
+            if self._problem.dist(t1, e) - self._problem.dist(e, c) <= 0:
+                continue
+            f = self._prev(c, forward)
+            self._candidates.push_back(c)
+            self._values.push_back(self._problem.dist(f, c) - self._problem.dist(e, c))
+
+        # Try the most promising first exchanges, each followed by a greedy chain
+        for b in range(self.breadth):
+            best = -1
+            for i in range(<int>self._candidates.size()):
+                if self._candidates[i] >= 0 and (best < 0 or self._values[i] > self._values[best]):
+                    best = i
+            if best < 0:
+                break
+            c = self._candidates[best]
+            self._candidates[best] = -1
+
+            # First exchange
+            self._first.clear()
+            self._last.clear()
+            self._closing.clear()
+            e = self._next(t1, forward)
+            f = self._prev(c, forward)
+            gain = self._problem.dist(t1, e) - self._problem.dist(e, c) + self._problem.dist(f, c)
+            self._reverse(e, f, forward)
+            self._first.push_back(e)
+            self._last.push_back(f)
+            self._closing.push_back(c)
+            level = 1
+            best_gain = self._problem.tolerance
+            best_level = 0
+            closed = gain - self._problem.dist(t1, f)
+            if closed > best_gain:
+                best_gain = closed
+                best_level = level
+
+            # Deeper exchanges, always breaking the arc that closes the tour at t1
+            while level < self.max_depth:
+                e = self._next(t1, forward)
+                c = -1
+                best_value = -HUGE_VAL
+                for k in range(self._nb_ptr[e], self._nb_ptr[e + 1]):
+                    i = self._nb_idx[k]
+                    if i == e or i == t1 or i == self._next(e, forward):
+                        continue
+                    if gain - self._problem.dist(e, i) <= 0:
+                        continue
+                    value = self._problem.dist(self._prev(i, forward), i) - self._problem.dist(e, i)
+                    if value > best_value:
+                        best_value = value
+                        c = i
+                if c < 0:
+                    break
+                f = self._prev(c, forward)
+                gain = gain - self._problem.dist(e, c) + self._problem.dist(f, c)
+                self._reverse(e, f, forward)
+                self._first.push_back(e)
+                self._last.push_back(f)
+                self._closing.push_back(c)
+                level = level + 1
+                closed = gain - self._problem.dist(t1, f)
+                if closed > best_gain:
+                    best_gain = closed
+                    best_level = level
+
+            # Keep the best prefix of the chain
+            self._undo(best_level, forward)
+            if best_level > 0:
+                self._activate(t1)
+                for i in range(best_level):
+                    self._activate(self._first[i])
+                    self._activate(self._last[i])
+                    self._activate(self._closing[i])
+                self._outdated = True
+                self.n_moves = self.n_moves + 1
+                return True
+
+        return False
+
+    cdef int _next(LinKernighan self, int node, bool forward) noexcept nogil:
+        if forward:
+            return self._succ[node]
+        return self._pred[node]
+
+    cdef int _prev(LinKernighan self, int node, bool forward) noexcept nogil:
+        if forward:
+            return self._pred[node]
+        return self._succ[node]
+
+    cdef void _reverse(LinKernighan self, int a, int b, bool forward) noexcept nogil:
+
+        cdef:
+            int p, n, node, temp
+
+        # Path a -> b in the given orientation is path b -> a in the opposite one
+        if not forward:
+            a, b = b, a
+        p = self._pred[a]
+        n = self._succ[b]
+        node = a
+        while True:
+            temp = self._succ[node]
+            self._succ[node] = self._pred[node]
+            self._pred[node] = temp
+            if node == b:
+                break
+            node = temp
+        self._succ[p] = b
+        self._pred[b] = p
+        self._succ[a] = n
+        self._pred[n] = a
+
+    cdef void _undo(LinKernighan self, int level, bool forward) noexcept nogil:
+        cdef:
+            int i
+        i = <int>self._first.size() - 1
+        while i >= level:
+            self._reverse(self._last[i], self._first[i], forward)
+            self._first.pop_back()
+            self._last.pop_back()
+            self._closing.pop_back()
+            i = i - 1
@@ -2,12 +2,11 @@
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
 from libcpp cimport bool
-from libcpp.set cimport set
+from libcpp.deque cimport deque
 from libcpp.vector cimport vector
 
 import numpy as np
 
-from tspgrasp.cython.node cimport Node
 from tspgrasp.cython.problem cimport Problem
 from tspgrasp.cython.random cimport RandomGen
 from tspgrasp.cython.tour cimport Tour
@@ -18,24 +17,64 @@ cdef class LocalSearch:
     cdef public:
         int max_iter
         int n_moves
+        bool timed_out
+        bool collect_stats
+        object seed
+        object n_neighbors
+        bool dont_look_bits
+        int max_segment
+        bool reverse_segments
         Tour tour
 
+    cdef readonly:
+        vector[long] move_evals
+        vector[long] move_accepts
+        long n_passes
+        long n_cost_updates
+        double corr_nodes_time
+
     cdef:
         RandomGen rng
-        double[:, :] _D
+        Problem _problem
         vector[vector[int]] _correlated_nodes
+        int[:] _nb_ptr
+        int[:] _nb_idx
+        bool _symmetric
+        bool _outdated
+        int _depot
+        vector[int] _succ
+        vector[int] _pred
+        vector[int] _pos
+        vector[double] _cum_dist
+        vector[double] _cum_rdist
+        deque[int] _queue
+        vector[bool] _active
+        double _deadline
+        int _n_evals
 
     cpdef void set_problem(LocalSearch self, Problem problem) except *
     cdef void _prepare_search(LocalSearch self, Tour tour) except *
-    cdef bool moves(LocalSearch self, Node u, Node v) except *
-    cdef bool move_1(LocalSearch self, Node u, Node v) except *
-    cdef bool move_2(LocalSearch self, Node u, Node v) except *
-    cdef bool move_3(LocalSearch self, Node u, Node v) except *
-    cdef bool move_4(LocalSearch self, Node u, Node v) except *
-    cdef bool move_5(LocalSearch self, Node u, Node v) except *
-    cdef bool move_6(LocalSearch self, Node u, Node v) except *
-    cdef bool move_7(LocalSearch self, Node u, Node v) except *
-    cdef bool eval_move(LocalSearch self, double cost) except *
-    cdef void insert_node(LocalSearch self, Node u, Node v) except *
-    cdef void swap_node(LocalSearch self, Node u, Node v) except *
+    cdef void _load_tour(LocalSearch self) except *
+    cdef void _store_tour(LocalSearch self) except *
+    cdef void _search(LocalSearch self, int max_iter) noexcept nogil
+    cdef void _search_queue(LocalSearch self, vector[int] &customers, int max_iter) noexcept nogil
+    cdef bool _expired(LocalSearch self) noexcept nogil
+    cdef void _activate(LocalSearch self, int node) noexcept nogil
+    cdef void _on_move(LocalSearch self) noexcept nogil
+    cdef bool _improve_node(LocalSearch self, int u) noexcept nogil
+    cdef void update_costs(LocalSearch self) noexcept nogil
+    cdef bool moves(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_1(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_2(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_3(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_4(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_5(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_6(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_7(LocalSearch self, int u, int v) noexcept nogil
+    cdef bool move_8(LocalSearch self, int u, int v) noexcept nogil
+    cdef void move_segment(LocalSearch self, int u, int e, int v, bool reverse) noexcept nogil
+    cdef double reverse_cost(LocalSearch self, int x, int v) noexcept nogil
+    cdef bool eval_move(LocalSearch self, double cost) noexcept nogil
+    cdef void insert_node(LocalSearch self, int u, int v) noexcept nogil
+    cdef void swap_node(LocalSearch self, int u, int v) noexcept nogil
     cdef void _initialize_corr_nodes(LocalSearch self) except *
@@ -2,132 +2,312 @@
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
 from libcpp cimport bool
-from libcpp.set cimport set
 from libcpp.vector cimport vector
 
 import numpy as np
 
-from tspgrasp.cython.node cimport Node
-from tspgrasp.cython.problem cimport Problem
+from tspgrasp.cython.problem cimport Problem, as_problem
 from tspgrasp.cython.random cimport RandomGen
 from tspgrasp.cython.tour cimport Tour
+from tspgrasp.cython.utils cimport steady_clock
 
 from tspgrasp.solution import Solution
 
 
-cdef extern from "<cmath>" namespace "std":
-    double ceil(double x)
+cdef extern from "math.h":
+    double HUGE_VAL
 
-cdef int compute_ceil(double value):
-    return <int>ceil(value)
+
+# Number of node evaluations between checks of the clock
+cdef int CLOCK_INTERVAL = 256
+
+# Number of pairwise move types (move_1 to move_8)
+cdef int N_MOVE_TYPES = 8
+
+
+cdef inline bool _counted(LocalSearch ls, int k, bool accepted) noexcept nogil:
+    # Evaluations and acceptances per move type, only counted on demand
+    if ls.collect_stats:
+        ls.move_evals[k] = ls.move_evals[k] + 1
+        if accepted:
+            ls.move_accepts[k] = ls.move_accepts[k] + 1
+    return accepted
 
 
 cdef class LocalSearch:
 
     def __cinit__(self):
         self.n_moves = 0
-        self._D = np.empty((0, 0), dtype=np.double)[:, :]
+        self.timed_out = False
+        self.collect_stats = False
+        self.move_evals = vector[long](N_MOVE_TYPES, 0)
+        self.move_accepts = vector[long](N_MOVE_TYPES, 0)
+        self.n_passes = 0
+        self.n_cost_updates = 0
+        self.corr_nodes_time = 0.0
+        self._deadline = HUGE_VAL
+        self._n_evals = 0
+        self._symmetric = False
+        self._outdated = True
+        self._depot = 0
         self._correlated_nodes = vector[vector[int]]()
-
-    def __init__(self, seed=None):
+        self._nb_ptr = np.zeros(1, dtype=np.intc)
+        self._nb_idx = np.zeros(0, dtype=np.intc)
+
+    def __init__(
+        self, seed=None, n_neighbors=None, dont_look_bits=False, max_segment=2, reverse_segments=True
+    ):
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        assert max_segment >= 2, "max_segment must be at least 2"
+        self.seed = seed
+        self.rng = RandomGen(seed)
+        self.n_neighbors = n_neighbors
+        self.dont_look_bits = dont_look_bits
+        self.max_segment = max_segment
+        self.reverse_segments = reverse_segments
+
+    def __reduce__(self):
+        return (
+            type(self),
+            (self.seed, self.n_neighbors, self.dont_look_bits, self.max_segment, self.reverse_segments)
+        )
+
+    def set_seed(self, seed):
+        self.seed = seed
         self.rng = RandomGen(seed)
 
-    def __call__(self, vector[int] seq, double[:, :] D, max_iter=100000) -> Solution:
-        assert D.shape[0] == D.shape[1], "D must be a squared matrix"
-        assert D.shape[0] == seq.size(), "D must be the same length as seq"
-        problem = Problem(seq.size(), D)
+    def __call__(self, vector[int] seq, D, max_iter=100000, time_limit=float("inf")) -> Solution:
+        problem = as_problem(D)
+        assert problem.n_nodes == seq.size(), "D must be the same length as seq"
         self.set_problem(problem)
         tour = Tour.new(seq)
-        self.do(tour, max_iter=max_iter)
+        self.do(tour, max_iter=max_iter, time_limit=time_limit)
         sol = Solution(self.tour)
         return sol
 
-    def do(LocalSearch self, Tour tour, int max_iter = 100000):
+    def do(LocalSearch self, Tour tour, int max_iter = 100000, double time_limit = HUGE_VAL):
+        self._prepare_search(tour)
+        # The search stops with the current tour once time_limit (s) is exhausted
+        self.timed_out = False
+        self._n_evals = 0
+        self._deadline = steady_clock() + time_limit
+        with nogil:
+            self._search(max_iter)
+        self._store_tour()
+
+    cpdef void set_problem(LocalSearch self, Problem problem) except *:
+        self._problem = problem
+        self._symmetric = problem.symmetric
+        self._nb_ptr, self._nb_idx = problem.neighbors(self.n_neighbors)
+
+    cdef void _prepare_search(LocalSearch self, Tour tour) except *:
+        cdef double start
+        self.n_moves = 0
+        self.move_evals.assign(N_MOVE_TYPES, 0)
+        self.move_accepts.assign(N_MOVE_TYPES, 0)
+        self.n_passes = 0
+        self.n_cost_updates = 0
+        self.tour = tour
+        self._outdated = True
+        self._load_tour()
+        start = steady_clock()
+        self._initialize_corr_nodes()
+        self.corr_nodes_time = steady_clock() - start
+
+    cdef void _load_tour(LocalSearch self) except *:
+        # Work on copies of the tour arrays
+        self._depot = self.tour.depot
+        self._succ = self.tour.succ
+        self._pred = self.tour.pred
+        self._pos = self.tour.pos
+        self._cum_dist = self.tour.cum_dist
+        self._cum_rdist = self.tour.cum_rdist
+
+    cdef void _store_tour(LocalSearch self) except *:
+        self.update_costs()
+        self.tour.succ = self._succ
+        self.tour.pred = self._pred
+        self.tour.pos = self._pos
+        self.tour.cum_dist = self._cum_dist
+        self.tour.cum_rdist = self._cum_rdist
+
+    cdef void _search(LocalSearch self, int max_iter) noexcept nogil:
 
         cdef:
             int n_iter = 0
             bool proceed = True
-            int v_index, u_index
-            Node, u, v
+            int u, v, i, n_nodes
             vector[int] customers
             vector[int] correlated_nodes
 
-        self._prepare_search(tour)
-        nodes = sorted(self.tour.nodes, key=lambda x: x.index)
-        customers = [n.index for n in nodes if not n.is_depot]
+        n_nodes = <int>self._succ.size()
+        for i in range(n_nodes):
+            if i != self._depot:
+                customers.push_back(i)
+        if self.dont_look_bits:
+            self._search_queue(customers, max_iter)
+            return
         while proceed and n_iter < max_iter:
             n_iter = n_iter + 1
+            self.n_passes = n_iter
             proceed = False or n_iter <= 1
             self.rng.shuffle(customers)
-            for u_index in customers:
-                u = nodes[u_index]
-                correlated_nodes = self._correlated_nodes[u.index]
+            for u in customers:
+                correlated_nodes = self._correlated_nodes[u]
                 self.rng.shuffle(correlated_nodes)
-                for v_index in correlated_nodes:
-                    v = nodes[v_index]
+                for v in correlated_nodes:
+                    if self._expired():
+                        return
                     if self.moves(u, v):
                         proceed = True
+                        self._on_move()
                         continue
+                if self._expired():
+                    return
+                if self._improve_node(u):
+                    proceed = True
+                    self._on_move()
             if not proceed:
                 break
 
-    cpdef void set_problem(LocalSearch self, Problem problem) except *:
-        self._D = problem.D
+    cdef void _search_queue(LocalSearch self, vector[int] &customers, int max_iter) noexcept nogil:
 
-    cdef void _prepare_search(LocalSearch self, Tour tour) except *:
-        self.n_moves = 0
-        self.tour = tour
-        self._initialize_corr_nodes()
+        cdef:
+            long n_pops = 0
+            long max_pops
+            int u, v
+            vector[int] correlated_nodes
 
-    cdef bool moves(LocalSearch self, Node u, Node v) except *:
-        if self.move_1(u, v):
+        # Every customer starts active in random order
+        self.rng.shuffle(customers)
+        self._queue.clear()
+        self._active.assign(self._succ.size(), False)
+        for u in customers:
+            self._queue.push_back(u)
+            self._active[u] = True
+
+        # Each pass over as many nodes as customers counts as one iteration
+        max_pops = <long>max_iter * <long>customers.size()
+        while not self._queue.empty() and n_pops < max_pops:
+            u = self._queue.front()
+            self._queue.pop_front()
+            self._active[u] = False
+            n_pops = n_pops + 1
+            self.n_passes = (n_pops + customers.size() - 1) / customers.size()
+            correlated_nodes = self._correlated_nodes[u]
+            self.rng.shuffle(correlated_nodes)
+            for v in correlated_nodes:
+                if self._expired():
+                    return
+                if self.moves(u, v):
+                    self._on_move()
+            if self._expired():
+                return
+            if self._improve_node(u):
+                self._on_move()
+
+    cdef bool _expired(LocalSearch self) noexcept nogil:
+        # Polls the clock only every CLOCK_INTERVAL evaluations
+        if self.timed_out:
             return True
-        elif self.move_2(u, v):
+        self._n_evals = self._n_evals + 1
+        if self._n_evals < CLOCK_INTERVAL:
+            return False
+        self._n_evals = 0
+        if steady_clock() >= self._deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    cdef void _activate(LocalSearch self, int node) noexcept nogil:
+        # Queue endpoints of modified arcs again (only used with don't look bits)
+        if self.dont_look_bits and node != self._depot and not self._active[node]:
+            self._active[node] = True
+            self._queue.push_back(node)
+
+    cdef void _on_move(LocalSearch self) noexcept nogil:
+        pass
+
+    cdef bool _improve_node(LocalSearch self, int u) noexcept nogil:
+        # Node based moves of subclasses, applied after pairwise moves of u
+        return False
+
+    cdef void update_costs(LocalSearch self) noexcept nogil:
+        cdef:
+            int node, position = 0
+            double dist = 0.0
+            double rdist = 0.0
+
+        if not self._outdated:
+            return
+        self.n_cost_updates = self.n_cost_updates + 1
+        node = self._depot
+        while True:
+            node = self._succ[node]
+            position = position + 1
+            dist = dist + self._problem.dist(self._pred[node], node)
+            if not self._symmetric:
+                rdist = rdist + self._problem.dist(node, self._pred[node]) - self._problem.dist(self._pred[node], node)
+            self._cum_dist[node] = dist
+            self._cum_rdist[node] = rdist
+            self._pos[node] = position
+            if node == self._depot:
+                break
+        self._pos[self._depot] = 0
+        self._outdated = False
+
+    cdef bool moves(LocalSearch self, int u, int v) noexcept nogil:
+        if _counted(self, 0, self.move_1(u, v)):
             return True
-        elif self.move_3(u, v):
+        elif _counted(self, 1, self.move_2(u, v)):
             return True
-        elif self.move_4(u, v):
+        elif _counted(self, 2, self.move_3(u, v)):
             return True
-        elif self.move_5(u, v):
+        elif _counted(self, 3, self.move_4(u, v)):
             return True
-        elif self.move_6(u, v):
+        elif _counted(self, 4, self.move_5(u, v)):
             return True
-        elif self.move_7(u, v):
+        elif _counted(self, 5, self.move_6(u, v)):
             return True
-        elif v.prev.is_depot:
-            v = v.prev
-            if self.move_1(u, v):
+        elif _counted(self, 6, self.move_7(u, v)):
+            return True
+        elif _counted(self, 7, self.move_8(u, v)):
+            return True
+        elif self._pred[v] == self._depot:
+            v = self._pred[v]
+            if _counted(self, 0, self.move_1(u, v)):
                 return True
-            elif self.move_2(u, v):
+            elif _counted(self, 1, self.move_2(u, v)):
                 return True
-            elif self.move_3(u, v):
+            elif _counted(self, 2, self.move_3(u, v)):
+                return True
+            elif _counted(self, 7, self.move_8(u, v)):
                 return True
             else:
                 return False
         else:
             return False
 
-    cdef bool move_1(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_1(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
 
         # Stop if u follows v
-        if u.index == y.index:
+        if u == y:
             return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.index] - self._D[u.prev.index, u.index] \
-                - self._D[u.index, x.index]
-            cs_v = self._D[v.index, u.index] + self._D[u.index, y.index] \
-                - self._D[v.index, y.index]
+            cs_u = self._problem.dist(p, x) - self._problem.dist(p, u) \
+                - self._problem.dist(u, x)
+            cs_v = self._problem.dist(v, u) + self._problem.dist(u, y) \
+                - self._problem.dist(v, y)
             cost = cs_u + cs_v
 
             # Update
@@ -135,31 +315,31 @@ cdef class LocalSearch:
                 return False
             else:
                 self.insert_node(u, v)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
-    cdef bool move_2(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_2(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
 
         # Stop if u follows v, v follows u, or x is a depot
-        if (u.index == y.index) or (v.index == x.index) or (x.is_depot):
+        if (u == y) or (v == x) or (x == self._depot):
             return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.next.index] - self._D[u.prev.index, u.index] \
-                - self._D[x.index, x.next.index]
-            cs_v = self._D[v.index, u.index] + self._D[x.index, y.index] \
-                - self._D[v.index, y.index]
+            cs_u = self._problem.dist(p, self._succ[x]) - self._problem.dist(p, u) \
+                - self._problem.dist(x, self._succ[x])
+            cs_v = self._problem.dist(v, u) + self._problem.dist(x, y) \
+                - self._problem.dist(v, y)
             cost = cs_u + cs_v
 
             # Update
@@ -168,31 +348,31 @@ cdef class LocalSearch:
             else:
                 self.insert_node(u, v)
                 self.insert_node(x, u)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
-    cdef bool move_3(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_3(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
 
         # Stop if u follows v, v follows u, or x is a depot
-        if (u.index == y.index) or (v.index == x.index) or (x.is_depot):
+        if (u == y) or (v == x) or (x == self._depot):
             return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.next.index] - self._D[u.prev.index, u.index] \
-                - self._D[u.index, x.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.index, x.index] + self._D[x.index, u.index] \
-                + self._D[u.index, y.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(p, self._succ[x]) - self._problem.dist(p, u) \
+                - self._problem.dist(u, x) - self._problem.dist(x, self._succ[x])
+            cs_v = self._problem.dist(v, x) + self._problem.dist(x, u) \
+                + self._problem.dist(u, y) - self._problem.dist(v, y)
             cost = cs_u + cs_v
 
             # Update
@@ -201,31 +381,32 @@ cdef class LocalSearch:
             else:
                 self.insert_node(x, v)
                 self.insert_node(u, x)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
-    cdef bool move_4(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_4(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p, q
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
+        q = self._pred[v]
 
         # Stop if u precedes or follows v, and break symmetry
-        if (u.index == v.prev.index) or (u.index == y.index) or (v.index <= u.index):
+        if (u == q) or (u == y) or (v <= u):
             return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[v.index, x.index] \
-                - self._D[u.prev.index, u.index] - self._D[u.index, x.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[u.index, y.index] \
-                - self._D[v.prev.index, v.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(p, v) + self._problem.dist(v, x) \
+                - self._problem.dist(p, u) - self._problem.dist(u, x)
+            cs_v = self._problem.dist(q, u) + self._problem.dist(u, y) \
+                - self._problem.dist(q, v) - self._problem.dist(v, y)
             cost = cs_u + cs_v
 
             # Update
@@ -233,33 +414,33 @@ cdef class LocalSearch:
                 return False
             else:
                 self.swap_node(u, v)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
 
         return True
 
-    cdef bool move_5(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_5(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p, q
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
+        q = self._pred[v]
 
         # Stop if either u or x precede or follow v, and break symmetry
-        if (u.index == v.prev.index) or (x.index == v.prev.index) or (u.index == y.index)\
-            or (x.is_depot) or (v.prev.is_depot):
-                return False
+        if (u == q) or (x == q) or (u == y) or (x == self._depot) or (q == self._depot):
+            return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[v.index, x.next.index] \
-                - self._D[u.prev.index, u.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[x.index, y.index] \
-                - self._D[v.prev.index, v.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(p, v) + self._problem.dist(v, self._succ[x]) \
+                - self._problem.dist(p, u) - self._problem.dist(x, self._succ[x])
+            cs_v = self._problem.dist(q, u) + self._problem.dist(x, y) \
+                - self._problem.dist(q, v) - self._problem.dist(v, y)
             cost = cs_u + cs_v
 
             # Update
@@ -268,32 +449,33 @@ cdef class LocalSearch:
             else:
                 self.swap_node(u, v)
                 self.insert_node(x, u)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
-    cdef bool move_6(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_6(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
+            int x, y, p, q
             double cost, cs_v, cs_u
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
+        p = self._pred[u]
+        q = self._pred[v]
 
         # Stop if either x or y is depot, y precedes u, u follows v, v follows u, or v follows x
-        if (x.is_depot) or (y.is_depot) or (y.index == u.prev.index) or (u.index == y.index) \
-            or (x.index == v.index) or (v.index == x.next.index) or (v.prev.is_depot):
+        if (x == self._depot) or (y == self._depot) or (y == p) or (u == y) \
+            or (x == v) or (v == self._succ[x]) or (q == self._depot):
                 return False
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[y.index, x.next.index] \
-                - self._D[u.prev.index, u.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[x.index, y.next.index] \
-                - self._D[v.prev.index, v.index] - self._D[y.index, y.next.index]
+            cs_u = self._problem.dist(p, v) + self._problem.dist(y, self._succ[x]) \
+                - self._problem.dist(p, u) - self._problem.dist(x, self._succ[x])
+            cs_v = self._problem.dist(q, u) + self._problem.dist(x, self._succ[y]) \
+                - self._problem.dist(q, v) - self._problem.dist(y, self._succ[y])
             cost = cs_u + cs_v
 
             # Update
@@ -302,128 +484,236 @@ cdef class LocalSearch:
             else:
                 self.swap_node(u, v)
                 self.swap_node(x, y)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
-    cdef bool move_7(LocalSearch self, Node u, Node v) except *:
+    cdef bool move_7(LocalSearch self, int u, int v) noexcept nogil:
 
         cdef:
-            Node x
-            Node y
-            Node node
-            Node temp
+            int x, y, node, temp
             double cost
-            int j
 
         # Set succeeding nodes
-        x = u.next
-        y = v.next
+        x = self._succ[u]
+        y = self._succ[v]
 
         # Stop if u follows v
-        if (u.index == y.index) or (v.prev.is_depot) or (u.next.index == v.index):
+        if (u == y) or (self._pred[v] == self._depot) or (x == v):
             return False
 
-        # Else compute costs
+        # Else compute costs (reverse costs are only required for asymmetric problems)
         else:
-            cost = self._D[u.index, v.index] + self._D[x.index, y.index] \
-                - self._D[u.index, x.index] - self._D[v.index, y.index] \
-                    + v.cum_rdist - x.cum_rdist
+            cost = self._problem.dist(u, v) + self._problem.dist(x, y) \
+                - self._problem.dist(u, x) - self._problem.dist(v, y)
+            if not self._symmetric:
+                self.update_costs()
+                cost = cost + self.reverse_cost(x, v)
 
         # If poor move stop
         if self.eval_move(cost):
             return False
 
         # Moves
-        node = x.next
-        x.prev = node
-        x.next = y
+        node = self._succ[x]
+        self._pred[x] = node
+        self._succ[x] = y
 
         # Iterate until complete reversion
-        while node.index != v.index:
-            temp = node.next
-            node.next = node.prev
-            node.prev = temp
+        while node != v:
+            temp = self._succ[node]
+            self._succ[node] = self._pred[node]
+            self._pred[node] = temp
             node = temp
 
         # Final update
-        v.next = v.prev
-        v.prev = u
-        u.next = v
-        y.prev = x
+        self._succ[v] = self._pred[v]
+        self._pred[v] = u
+        self._succ[u] = v
+        self._pred[y] = x
+        self._activate(u)
+        self._activate(x)
+        self._activate(v)
+        self._activate(y)
 
         # Update
-        self.tour.calc_costs(self._D)
+        self._outdated = True
         self.n_moves = self.n_moves + 1
 
         return True
 
-    cdef bool eval_move(LocalSearch self, double cost) except *:
-        return cost > -0.0001
+    cdef bool move_8(LocalSearch self, int u, int v) noexcept nogil:
+
+        cdef:
+            int e, p, n, y, length
+            double cost, cs_u, cs_v, cs_rev, rdist
+
+        # Segments of up to two nodes are covered by moves 1 to 3
+        if self.max_segment <= 2:
+            return False
+
+        # Set neighbors of u and v
+        p = self._pred[u]
+        y = self._succ[v]
+
+        # Stop if v precedes u
+        if v == p:
+            return False
+
+        # Extend segment u -> e one node at a time, accumulating its reversal cost
+        e = u
+        rdist = 0.0
+        for length in range(2, self.max_segment + 1):
+            n = self._succ[e]
+            if n == self._depot or n == v:
+                return False
+            if not self._symmetric:
+                rdist = rdist + self._problem.dist(n, e) - self._problem.dist(e, n)
+            e = n
+            if length < 3:
+                continue
+
+            # Costs of removing the segment and inserting it after v
+            n = self._succ[e]
+            cs_u = self._problem.dist(p, n) - self._problem.dist(p, u) - self._problem.dist(e, n)
+            cs_v = self._problem.dist(v, u) + self._problem.dist(e, y) - self._problem.dist(v, y)
+            cost = cs_u + cs_v
+            if not self.eval_move(cost):
+                self.move_segment(u, e, v, False)
+                return True
+
+            # Reversed insertion
+            if self.reverse_segments:
+                cs_rev = self._problem.dist(v, e) + self._problem.dist(u, y) - self._problem.dist(v, y)
+                cost = cs_u + cs_rev + rdist
+                if not self.eval_move(cost):
+                    self.move_segment(u, e, v, True)
+                    return True
+
+        return False
+
+    cdef void move_segment(LocalSearch self, int u, int e, int v, bool reverse) noexcept nogil:
+
+        cdef:
+            int p, n, y, node, temp
+
+        # Set neighbors
+        p = self._pred[u]
+        n = self._succ[e]
+        y = self._succ[v]
+        self._activate(u)
+        self._activate(e)
+        self._activate(p)
+        self._activate(n)
+        self._activate(v)
+        self._activate(y)
+
+        # Remove segment
+        self._succ[p] = n
+        self._pred[n] = p
+
+        # Insert after v
+        if reverse:
+            node = u
+            while True:
+                temp = self._succ[node]
+                self._succ[node] = self._pred[node]
+                self._pred[node] = temp
+                if node == e:
+                    break
+                node = temp
+            self._succ[v] = e
+            self._pred[e] = v
+            self._succ[u] = y
+            self._pred[y] = u
+        else:
+            self._succ[v] = u
+            self._pred[u] = v
+            self._succ[e] = y
+            self._pred[y] = e
+
+        # Update
+        self._outdated = True
+        self.n_moves = self.n_moves + 1
 
-    cdef void insert_node(LocalSearch self, Node u, Node v) except *:
+    cdef double reverse_cost(LocalSearch self, int x, int v) noexcept nogil:
+
+        # Segment starting at the depot
+        if x == self._depot:
+            return self._cum_rdist[v]
+
+        # Segment that does not cross the depot
+        elif self._pos[x] <= self._pos[v]:
+            return self._cum_rdist[v] - self._cum_rdist[x]
+
+        # Segment wrapping around the depot
+        else:
+            return self._cum_rdist[v] - self._cum_rdist[x] + self._cum_rdist[self._depot]
+
+    cdef bool eval_move(LocalSearch self, double cost) noexcept nogil:
+        return cost > -self._problem.tolerance
+
+    cdef void insert_node(LocalSearch self, int u, int v) noexcept nogil:
+
+        # Endpoints of removed arcs
+        self._activate(u)
+        self._activate(self._pred[u])
+        self._activate(self._succ[u])
+        self._activate(v)
+        self._activate(self._succ[v])
 
         # Remove u from existing
-        u.prev.next = u.next
-        u.next.prev = u.prev
+        self._succ[self._pred[u]] = self._succ[u]
+        self._pred[self._succ[u]] = self._pred[u]
 
         # Insert u after v
-        v.next.prev = u
-        u.prev = v
-        u.next = v.next
-        v.next = u
+        self._pred[self._succ[v]] = u
+        self._pred[u] = v
+        self._succ[u] = self._succ[v]
+        self._succ[v] = u
+
+    cdef void swap_node(LocalSearch self, int u, int v) noexcept nogil:
 
-    cdef void swap_node(LocalSearch self, Node u, Node v) except *:
+        cdef:
+            int u_preceding, u_succeeding, v_preceding, v_succeeding
 
         # Initialize neighbors
-        u_preceding = u.prev
-        u_succeeding = u.next
-        v_preceding = v.prev
-        v_succeeding = v.next
+        u_preceding = self._pred[u]
+        u_succeeding = self._succ[u]
+        v_preceding = self._pred[v]
+        v_succeeding = self._succ[v]
+        self._activate(u)
+        self._activate(u_preceding)
+        self._activate(u_succeeding)
+        self._activate(v)
+        self._activate(v_preceding)
+        self._activate(v_succeeding)
 
         # Swap on neighbors
-        u_preceding.next = v
-        u_succeeding.prev = v
-        v_preceding.next = u
-        v_succeeding.prev = u
+        self._succ[u_preceding] = v
+        self._pred[u_succeeding] = v
+        self._succ[v_preceding] = u
+        self._pred[v_succeeding] = u
 
         # Swap on nodes
-        u.prev = v_preceding
-        u.next = v_succeeding
-        v.prev = u_preceding
-        v.next = u_succeeding
+        self._pred[u] = v_preceding
+        self._succ[u] = v_succeeding
+        self._pred[v] = u_preceding
+        self._succ[v] = u_succeeding
 
     cdef void _initialize_corr_nodes(LocalSearch self) except *:
         cdef:
-            int n_nodes, mid_size, i, j
-            Node n
-            vector[vector[int]] corr_nodes
-            vector[int] customers
-
-        n_nodes = self._D.shape[0]
-        mid_size = compute_ceil(self._D.shape[0] / 2)
-        corr_nodes = np.argpartition(self._D, mid_size, axis=1)[:, :mid_size].tolist()
-        corr_sets = start_corr_sets(n_nodes)
-        customers = [n.index for n in self.tour.nodes if not n.is_depot]
-        for i in customers:
-            for j in corr_nodes[i]:
-                if (j != self.tour.depot.index) and (i != j):
-                    corr_sets[i].insert(j)
-                    corr_sets[j].insert(i)
-        self._correlated_nodes = [list(corr_sets[i]) for i in range(n_nodes)]
-
-
-cdef vector[set[int]] start_corr_sets(int n_nodes):
-    cdef:
-        vector[set[int]] out
-        set[int] s
-        int i
-
-    i = 0
-    while i < n_nodes:
-        s = set[int]()
-        out.push_back(s)
-        i = i + 1
-
-    return out
-
+            int n_nodes, depot, i, k, j
+
+        # Copy cached neighbors from problem skipping the depot
+        n_nodes = self._nb_ptr.shape[0] - 1
+        depot = self._depot
+        self._correlated_nodes.resize(n_nodes)
+        for i in range(n_nodes):
+            self._correlated_nodes[i].clear()
+            if i == depot:
+                continue
+            for k in range(self._nb_ptr[i], self._nb_ptr[i + 1]):
+                j = self._nb_idx[k]
+                if j != depot:
+                    self._correlated_nodes[i].push_back(j)
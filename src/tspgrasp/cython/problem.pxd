@@ -1,11 +1,83 @@
 # distutils: language = c++
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
+cimport cython
+from libcpp cimport bool
+
 import numpy as np
 
 
+# Storage of pairwise distances
+cdef enum:
+    MATRIX_NONE = 0
+    MATRIX_DOUBLE = 1
+    MATRIX_FLOAT32 = 2
+    MATRIX_INT32 = 3
+    MATRIX_CONDENSED = 4
+
+
 cdef class Problem:
 
     cdef public:
         int n_nodes
-        double[:, :] D
+        object D
+        bool symmetric
+        double tolerance
+
+    cdef:
+        dict _neighbors
+        dict _nearest
+        int _matrix
+        const double[:, :] _D
+        const float[:, :] _DF
+        const int[:, :] _DI
+        const double[:] _DC
+
+    cdef void _set_matrix(Problem self, int n_nodes, object D, object dtype, bool copy) except *
+    cdef double _dist(Problem self, int i, int j) noexcept nogil
+
+    @cython.final
+    cdef inline double dist(Problem self, int i, int j) noexcept nogil:
+        # Dense matrices are indexed directly and other problems compute distances on demand
+        if self._matrix == MATRIX_DOUBLE:
+            return self._D[i, j]
+        elif self._matrix == MATRIX_FLOAT32:
+            return self._DF[i, j]
+        elif self._matrix == MATRIX_INT32:
+            return self._DI[i, j]
+        elif self._matrix == MATRIX_CONDENSED:
+            # Upper triangle of the matrix stored row by row
+            if i == j:
+                return 0.0
+            elif i > j:
+                i, j = j, i
+            return self._DC[<Py_ssize_t>i * (2 * self.n_nodes - i - 1) // 2 + j - i - 1]
+        return self._dist(i, j)
+
+
+cdef class CoordinateProblem(Problem):
+
+    cdef public:
+        double[:, :] X
+        str metric
+
+    cdef:
+        int _metric
+        double[:, :] _coords
+
+    cdef double _dist(CoordinateProblem self, int i, int j) noexcept nogil
+
+
+cdef class Float32Problem(Problem):
+    pass
+
+
+cdef class Int32Problem(Problem):
+    pass
+
+
+cdef class CondensedProblem(Problem):
+    pass
+
+
+cpdef Problem as_problem(D)
@@ -1,11 +1,422 @@
 # distutils: language = c++
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
+from libc.math cimport acos, ceil, cos, sqrt
+from libcpp cimport bool
+from libcpp.pair cimport pair
+from libcpp.queue cimport priority_queue
+from libcpp.vector cimport vector
+
+import math
+import mmap
+
 import numpy as np
 
 
+# Metrics available for coordinates, named as in TSPLIB
+METRICS = {"euclidean": 0, "euc_2d": 1, "ceil_2d": 2, "geo": 3, "att": 4}
+
+cdef enum:
+    EUCLIDEAN = 0
+    EUC_2D = 1
+    CEIL_2D = 2
+    GEO = 3
+    ATT = 4
+
+# Number of distances evaluated at once when searching for nearest nodes
+cdef int BLOCK_SIZE = 4194304
+
+# Nearest nodes of planar coordinates are searched on a grid when at most this fraction of nodes
+cdef double GRID_FRACTION = 0.125
+
+# Average number of nodes per cell of the grid
+cdef int GRID_OCCUPANCY = 2
+
+# Smallest cost reduction of an improving move
+cdef double TOLERANCE = 0.0001
+
+# Constants of TSPLIB geographical distances
+cdef double PI = 3.141592
+cdef double RRR = 6378.388
+
+
 cdef class Problem:
 
-    def __cinit__(self, int n_nodes, D: np.ndarray) -> None:
+    def __cinit__(self, *args, **kwargs):
+        self._neighbors = {}
+        self._nearest = {}
+        self._matrix = MATRIX_NONE
+        self.tolerance = TOLERANCE
+
+    def __init__(self, int n_nodes, D: np.ndarray, copy: bool = True) -> None:
+        self._set_matrix(n_nodes, D, np.double, copy)
+        self._D = self.D
+        self._matrix = MATRIX_DOUBLE
+
+    def __reduce__(self):
+        # Memory-mapped matrices are reopened from their file instead of copied
+        if is_file_backed(self.D):
+            return (from_memmap, (type(self), self.n_nodes) + memmap_args(self.D))
+        return (type(self), (self.n_nodes, self.D))
+
+    cdef void _set_matrix(Problem self, int n_nodes, object D, object dtype, bool copy) except *:
+        self.n_nodes = n_nodes
+        if copy:
+            self.D = np.array(D, dtype=dtype)
+        else:
+            self.D = np.asanyarray(D, dtype=dtype)
+        assert self.D.ndim == 2, "D must be a 2-dimensional matrix"
+        self.symmetric = np.array_equal(self.D, np.transpose(self.D))
+
+    cdef double _dist(Problem self, int i, int j) noexcept nogil:
+        return self._D[i, j]
+
+    def nearest(self, int size):
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+        cdef int kth = min(size, self.n_nodes - 1)
+        return np.argpartition(self.D, kth, axis=1)[:, :size]
+
+    def nearest_sorted(self, int size):
+        """Indexes of the `size` nearest nodes of each node sorted by distance and then by index,
+        computed once per value of `size`"""
+        cdef:
+            int i, k
+            int[:, :] rows
+            double[:, :] d
+        if size not in self._nearest:
+            rows = np.sort(self.nearest(size), axis=1).astype(np.intc)
+            dist = np.empty((self.n_nodes, size), dtype=np.double)
+            d = dist
+            for i in range(self.n_nodes):
+                for k in range(size):
+                    d[i, k] = self.dist(i, rows[i, k])
+            order = np.argsort(dist, axis=1, kind="stable")
+            self._nearest[size] = np.ascontiguousarray(
+                np.take_along_axis(np.asarray(rows), order, axis=1)
+            )
+        return self._nearest[size]
+
+    def neighbors(self, n_neighbors=None):
+        """Symmetric neighborhood of each node in compressed sparse row format.
+
+        Parameters
+        ----------
+        n_neighbors : int, optional
+            Number of nearest nodes of each node, by default None, which uses half of the nodes
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Row pointers and sorted neighbor indexes, computed once per value of `n_neighbors`
+        """
+        if n_neighbors not in self._neighbors:
+            if n_neighbors is None:
+                # Half of the nodes rounded down, as in the original neighborhood of local search
+                size = self.n_nodes // 2
+            else:
+                size = min(n_neighbors + 1, self.n_nodes)
+            self._neighbors[n_neighbors] = symmetric_neighbors(self.nearest(size))
+        return self._neighbors[n_neighbors]
+
+
+cdef class CoordinateProblem(Problem):
+
+    def __init__(self, X: np.ndarray, metric: str = "euclidean") -> None:
+        metric = metric.lower()
+        assert metric in METRICS, f"metric must be one of {list(METRICS)}"
+        X = np.array(X, dtype=np.double)
+        assert X.ndim == 2 and X.shape[1] == 2, "X must be a (n, 2) array of coordinates"
+        self.n_nodes = X.shape[0]
+        self.D = np.empty((0, 0), dtype=np.double)
+        self.symmetric = True
+        self.X = X
+        self.metric = metric
+        self._metric = METRICS[metric]
+        if self._metric == GEO:
+            self._coords = geo_coordinates(X)
+        else:
+            self._coords = X
+
+        # TSPLIB metrics other than the Euclidean are rounded to integers
+        if self._metric != EUCLIDEAN:
+            self.tolerance = 0.5
+
+    def __reduce__(self):
+        return (type(self), (np.asarray(self.X), self.metric))
+
+    cdef double _dist(CoordinateProblem self, int i, int j) noexcept nogil:
+        cdef:
+            double dx, dy, r, q1, q2, q3
+            int t
+
+        # Latitude and longitude (radians) distance on the idealized sphere
+        if self._metric == GEO:
+            if i == j:
+                return 0.0
+            q1 = cos(self._coords[i, 1] - self._coords[j, 1])
+            q2 = cos(self._coords[i, 0] - self._coords[j, 0])
+            q3 = cos(self._coords[i, 0] + self._coords[j, 0])
+            return <int>(RRR * acos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0)
+
+        dx = self._coords[i, 0] - self._coords[j, 0]
+        dy = self._coords[i, 1] - self._coords[j, 1]
+        if self._metric == EUCLIDEAN:
+            return sqrt(dx * dx + dy * dy)
+        elif self._metric == EUC_2D:
+            return <int>(sqrt(dx * dx + dy * dy) + 0.5)
+        elif self._metric == CEIL_2D:
+            return ceil(sqrt(dx * dx + dy * dy))
+        else:
+            r = sqrt((dx * dx + dy * dy) / 10.0)
+            t = <int>(r + 0.5)
+            if t < r:
+                return t + 1
+            return t
+
+    def nearest(self, int size):
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+        cdef:
+            int kth, chunk, start, stop, i, j
+            double[:, :] block
+
+        # Planar metrics do not decrease with the Euclidean distance, so a grid finds the same nodes
+        if self._metric != GEO and size <= GRID_FRACTION * self.n_nodes:
+            return grid_nearest(self._coords, size)
+
+        # Distances are evaluated for blocks of rows to keep memory bounded
+        kth = min(size, self.n_nodes - 1)
+        chunk = max(1, BLOCK_SIZE // self.n_nodes)
+        out = np.empty((self.n_nodes, size), dtype=np.intp)
+        for start in range(0, self.n_nodes, chunk):
+            stop = min(start + chunk, self.n_nodes)
+            rows = np.empty((stop - start, self.n_nodes), dtype=np.double)
+            block = rows
+            for i in range(start, stop):
+                for j in range(self.n_nodes):
+                    block[i - start, j] = self.dist(i, j)
+            out[start:stop] = np.argpartition(rows, kth, axis=1)[:, :size]
+        return out
+
+
+cdef class Float32Problem(Problem):
+
+    def __init__(self, int n_nodes, D: np.ndarray, copy: bool = True) -> None:
+        self._set_matrix(n_nodes, D, np.float32, copy)
+        self._DF = self.D
+        self._matrix = MATRIX_FLOAT32
+
+
+cdef class Int32Problem(Problem):
+
+    def __init__(self, int n_nodes, D: np.ndarray, copy: bool = True) -> None:
+        assert fits_int32(D), "D must have integer distances within the int32 range"
+        self._set_matrix(n_nodes, D, np.intc, copy)
+        self._DI = self.D
+        self._matrix = MATRIX_INT32
+
+        # Integer costs only improve by whole units
+        self.tolerance = 0.5
+
+
+cdef class CondensedProblem(Problem):
+
+    def __init__(self, int n_nodes, D: np.ndarray, copy: bool = True) -> None:
         self.n_nodes = n_nodes
-        self.D = np.array(D, dtype=np.double)[:, :]
+        if copy:
+            self.D = np.array(D, dtype=np.double)
+        else:
+            self.D = np.asanyarray(D, dtype=np.double)
+        assert self.D.shape == (n_nodes * (n_nodes - 1) // 2,), \
+            "D must be the condensed upper triangle of a symmetric matrix, as returned by pdist"
+        self.symmetric = True
+        self._DC = self.D
+        self._matrix = MATRIX_CONDENSED
+
+    def nearest(self, int size):
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+        cdef:
+            int kth, chunk, start, stop, n
+
+        # Rows are expanded from the condensed vector in blocks to keep memory bounded
+        n = self.n_nodes
+        kth = min(size, n - 1)
+        chunk = max(1, BLOCK_SIZE // n)
+        cols = np.arange(n, dtype=np.int64)
+        out = np.empty((n, size), dtype=np.intp)
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            rows = np.arange(start, stop, dtype=np.int64)[:, None]
+            a = np.minimum(rows, cols)
+            b = np.maximum(rows, cols)
+            index = a * (2 * n - a - 1) // 2 + b - a - 1
+            block = np.where(a == b, 0.0, self.D[np.maximum(index, 0)])
+            out[start:stop] = np.argpartition(block, kth, axis=1)[:, :size]
+        return out
+
+
+def condensed_size(D) -> int:
+    """Number of nodes of a condensed upper triangle with the length of D"""
+    n_nodes = int(round((1 + math.sqrt(1 + 8 * len(D))) / 2))
+    assert n_nodes * (n_nodes - 1) // 2 == len(D), "D is not a condensed upper triangle"
+    return n_nodes
+
+
+def fits_int32(D) -> bool:
+    """Whether all distances of D are integers within the int32 range"""
+    D = np.asarray(D)
+    if D.size == 0:
+        return True
+    if not np.issubdtype(D.dtype, np.integer) and not np.array_equal(D, np.round(D)):
+        return False
+    return np.iinfo(np.intc).min <= D.min() and D.max() <= np.iinfo(np.intc).max
+
+
+def grid_nearest(double[:, :] X, int size):
+    """Indexes of the `size` nearest points of each point by Euclidean distance
+    (unordered and including itself), searched on a uniform grid in O(n k log k)"""
+    cdef:
+        int n, gx, gy, i, j, k, r, cx, cy, x, y, step
+        double xmin, xmax, ymin, ymax, h, dx, dy, d
+        vector[int] cell, start, items
+        priority_queue[pair[double, int]] heap
+        int[:, :] out
+
+    n = X.shape[0]
+    size = min(size, n)
+    xmin, xmax = np.min(X[:, 0]), np.max(X[:, 0])
+    ymin, ymax = np.min(X[:, 1]), np.max(X[:, 1])
+
+    # Square cells for the target occupancy, not too thin for nearly collinear points
+    h = max(
+        sqrt((xmax - xmin) * (ymax - ymin) * GRID_OCCUPANCY / n),
+        max(xmax - xmin, ymax - ymin) * GRID_OCCUPANCY / n,
+    )
+    if h <= 0.0:
+        h = 1.0
+    gx = <int>((xmax - xmin) / h) + 1
+    gy = <int>((ymax - ymin) / h) + 1
+
+    # Nodes sorted by cell, with cell c holding items[start[c]:start[c + 1]]
+    cell.resize(n)
+    start.assign(gx * gy + 1, 0)
+    items.resize(n)
+    for i in range(n):
+        cx = min(<int>((X[i, 0] - xmin) / h), gx - 1)
+        cy = min(<int>((X[i, 1] - ymin) / h), gy - 1)
+        cell[i] = cy * gx + cx
+        start[cell[i] + 1] += 1
+    for k in range(gx * gy):
+        start[k + 1] += start[k]
+    for i in range(n):
+        items[start[cell[i]]] = i
+        start[cell[i]] += 1
+    for k in range(gx * gy, 0, -1):
+        start[k] = start[k - 1]
+    start[0] = 0
+
+    result = np.empty((n, size), dtype=np.intc)
+    out = result
+    for i in range(n):
+        cx = cell[i] % gx
+        cy = cell[i] // gx
+        r = 0
+        while True:
+
+            # Cells at Chebyshev distance r from the cell of i
+            for y in range(max(cy - r, 0), min(cy + r, gy - 1) + 1):
+                step = 1 if (y == cy - r or y == cy + r) else max(2 * r, 1)
+                for x in range(cx - r, cx + r + 1, step):
+                    if x < 0 or x >= gx:
+                        continue
+                    for k in range(start[y * gx + x], start[y * gx + x + 1]):
+                        j = items[k]
+                        dx = X[j, 0] - X[i, 0]
+                        dy = X[j, 1] - X[i, 1]
+                        d = dx * dx + dy * dy
+                        if <int>heap.size() < size:
+                            heap.push(pair[double, int](d, j))
+                        elif d < heap.top().first or (d == heap.top().first and j < heap.top().second):
+                            heap.pop()
+                            heap.push(pair[double, int](d, j))
+
+            # Nodes in cells not visited are farther than r cells away
+            if <int>heap.size() == size and heap.top().first <= (r * h) * (r * h):
+                break
+            if r > gx and r > gy:
+                break
+            r = r + 1
+
+        k = 0
+        while not heap.empty():
+            out[i, k] = heap.top().second
+            heap.pop()
+            k = k + 1
+    return result
+
+
+cpdef Problem as_problem(D):
+    """Problem from a pairwise distance matrix, or the problem itself if one is given.
+    Float32 and integer matrices are kept in 32 bits instead of converted to double,
+    and memory-mapped or read-only matrices are used without copies when their type fits."""
+    if isinstance(D, Problem):
+        return D
+    D = np.asanyarray(D)
+    if D.ndim == 1:
+        return CondensedProblem(condensed_size(D), D, copy=not is_shared(D))
+    assert D.shape[0] == D.shape[1], "D must be a squared matrix"
+    return problem_type(D)(D.shape[0], D, copy=not is_shared(D))
+
+
+def is_shared(D) -> bool:
+    """Whether D is memory-mapped or read-only, so a problem may use it without a copy"""
+    return isinstance(D, np.memmap) or not D.flags.writeable
+
+
+def is_file_backed(D) -> bool:
+    """Whether D maps a whole file region, so that it can be reopened by file name"""
+    return isinstance(D, np.memmap) and isinstance(D.base, mmap.mmap)
+
+
+def memmap_args(D):
+    order = "F" if D.flags.f_contiguous and not D.flags.c_contiguous else "C"
+    return (D.filename, D.dtype.str, D.shape, D.offset, order)
+
+
+def from_memmap(problem_class, n_nodes, filename, dtype, shape, offset, order):
+    """Problem backed by a memory-mapped distance matrix, opened read-only"""
+    D = np.memmap(filename, dtype=dtype, mode="r", shape=shape, offset=offset, order=order)
+    return problem_class(n_nodes, D, copy=False)
+
+
+def problem_type(D):
+    """Problem class matching the data type of the pairwise distance matrix D"""
+    if D.ndim == 1:
+        return CondensedProblem
+    if D.dtype == np.float32:
+        return Float32Problem
+    if np.issubdtype(D.dtype, np.integer) and fits_int32(D):
+        return Int32Problem
+    return Problem
+
+
+def geo_coordinates(X: np.ndarray):
+    # TSPLIB convention: integer part in degrees and decimal part in minutes
+    deg = np.trunc(X)
+    return PI * (deg + 5.0 * (X - deg) / 3.0) / 180.0
+
+
+def symmetric_neighbors(nearest: np.ndarray):
+    n_nodes, size = nearest.shape
+    rows = np.repeat(np.arange(n_nodes, dtype=np.int64), size)
+    cols = np.asarray(nearest, dtype=np.int64).ravel()
+    keep = rows != cols
+    rows = rows[keep]
+    cols = cols[keep]
+    keys = np.sort(np.concatenate((rows * n_nodes + cols, cols * n_nodes + rows)))
+    unique = np.ones(keys.size, dtype=np.bool_)
+    unique[1:] = keys[1:] != keys[:-1]
+    keys = keys[unique]
+    indptr = np.zeros(n_nodes + 1, dtype=np.intc)
+    np.cumsum(np.bincount(keys // n_nodes, minlength=n_nodes), out=indptr[1:])
+    indices = (keys % n_nodes).astype(np.intc)
+    return indptr, indices
@@ -10,6 +10,6 @@ cdef class RandomGen:
     cdef:
         mt19937 _rng
 
-    cdef void shuffle(RandomGen self, vector[int] &v) except *
-    cdef double random(RandomGen self) except *
-    cdef int* choice(RandomGen self, vector[int] &v) except *
+    cdef void shuffle(RandomGen self, vector[int] &v) noexcept nogil
+    cdef double random(RandomGen self) noexcept nogil
+    cdef int* choice(RandomGen self, vector[int] &v) noexcept nogil
@@ -10,13 +10,13 @@ cdef class RandomGen:
     def __cinit__(self, seed=None):
         self._rng = initialize_rng(seed=seed)
 
-    cdef void shuffle(RandomGen self, vector[int] &v) except *:
+    cdef void shuffle(RandomGen self, vector[int] &v) noexcept nogil:
         shuffle_inplace(v, self._rng)
 
-    cdef double random(RandomGen self) except *:
+    cdef double random(RandomGen self) noexcept nogil:
         return random_value(self._rng)
 
-    cdef int* choice(RandomGen self, vector[int] &v) except *:
+    cdef int* choice(RandomGen self, vector[int] &v) noexcept nogil:
         return random_choice(v, self._rng)
 
 
@@ -38,7 +38,7 @@ cdef mt19937 rng_from_rd() except *:
     return mt19937(rd())
 
 
-cdef void shuffle_inplace(vector[int] &v, mt19937 &rng) except *:
+cdef void shuffle_inplace(vector[int] &v, mt19937 &rng) noexcept nogil:
     cdef int i, j
     cdef int n = <int>v.size()
     cdef uniform_int_distribution[int] dist
@@ -49,7 +49,7 @@ cdef void shuffle_inplace(vector[int] &v, mt19937 &rng) except *:
         v[i], v[j] = v[j], v[i]
 
 
-cdef int* random_choice(vector[int] &v, mt19937 &rng) except *:
+cdef int* random_choice(vector[int] &v, mt19937 &rng) noexcept nogil:
     cdef:
         int n
         uniform_int_distribution[int] dist
@@ -68,7 +68,7 @@ cdef int* random_choice(vector[int] &v, mt19937 &rng) except *:
     return &v[random_index]
 
 
-cdef double random_value(mt19937 &rng):
+cdef double random_value(mt19937 &rng) noexcept nogil:
     cdef uniform_real_distribution[double] dist
     dist = uniform_real_distribution[double](0.0, 1.0)
     return dist(rng)
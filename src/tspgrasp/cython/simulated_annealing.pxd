@@ -9,7 +9,6 @@ from libcpp.vector cimport vector
 import numpy as np
 
 from tspgrasp.cython.local_search cimport LocalSearch
-from tspgrasp.cython.node cimport Node
 from tspgrasp.cython.tour cimport Tour
 from tspgrasp.cython.utils cimport ExpApproxTable
 
@@ -26,4 +25,5 @@ cdef class SimulatedAnnealing(LocalSearch):
         ExpApproxTable expt
 
     cdef void _prepare_search(SimulatedAnnealing self, Tour tour) except *
-    cdef bool eval_move(SimulatedAnnealing self, double cost) except *
+    cdef void _on_move(SimulatedAnnealing self) noexcept nogil
+    cdef bool eval_move(SimulatedAnnealing self, double cost) noexcept nogil
@@ -1,13 +1,24 @@
 # distutils: language = c++
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
-from tspgrasp.cython.node cimport Node
+from libcpp.vector cimport vector
+
+from tspgrasp.cython.problem cimport Problem
 
 
 cdef class Tour:
 
     cdef public:
-        Node depot
+        int depot
+        int size
+
+    cdef:
+        vector[int] succ
+        vector[int] pred
+        vector[int] pos
+        vector[double] cum_dist
+        vector[double] cum_rdist
 
-    cdef public void insert(Tour self, Node new) except *
-    cdef public void calc_costs(Tour self, double[:, :] D) except *
+    cdef public void insert(Tour self, int new) except *
+    cdef public void insert_after(Tour self, int new, int node) except *
+    cdef public void calc_costs(Tour self, Problem problem) except *
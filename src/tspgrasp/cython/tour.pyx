@@ -1,21 +1,24 @@
 # distutils: language = c++
 # cython: language_level=3, boundscheck=False, wraparound=False, cdivision=True, embedsignature=True, initializedcheck=False
 
-from libcpp cimport bool
 from libcpp.vector cimport vector
 
-import copy
-
-from tspgrasp.cython.node cimport Node
+from tspgrasp.cython.problem cimport Problem
 
 
 cdef class Tour:
 
-    def __init__(self, Node depot) -> None:
-        depot.next = depot
-        depot.prev = depot
-        depot.is_depot = True
+    def __init__(self, int n_nodes, int depot) -> None:
+        # Nodes out of the tour have no successor nor predecessor
+        self.succ = vector[int](n_nodes, -1)
+        self.pred = vector[int](n_nodes, -1)
+        self.pos = vector[int](n_nodes, 0)
+        self.cum_dist = vector[double](n_nodes, 0.0)
+        self.cum_rdist = vector[double](n_nodes, 0.0)
+        self.succ[depot] = depot
+        self.pred[depot] = depot
         self.depot = depot
+        self.size = 1
 
     def __repr__(self) -> str:
         return str(self.solution)
@@ -23,68 +26,100 @@ cdef class Tour:
     @classmethod
     def new(cls, vector[int] seq):
         cdef:
-            Node node
             Tour tour
             int i
-        i = seq.front()
-        seq.erase(seq.begin())
-        node = Node(i, is_depot=True)
-        tour = cls(node)
-        for i in seq:
-            node = Node(i, is_depot=False)
-            tour.insert(node)
+        tour = cls(<int>seq.size(), seq[0])
+        for i in range(1, <int>seq.size()):
+            tour.insert(seq[i])
         return tour
 
     @property
     def solution(self):
-        sol = []
-        first_it = True
-        node = self.depot
-        while (not node.is_depot) or (first_it):
-            sol.append(node.index)
-            node = node.next
-            first_it = False
-        sol.append(sol[0])
+        sol = self.nodes
+        sol.append(self.depot)
         return sol
 
     @property
     def nodes(self):
-        sol = []
-        first_it = True
-        node = self.depot
-        while (not node.is_depot) or (first_it):
+        cdef:
+            int node = self.depot
+        sol = [node]
+        node = self.succ[node]
+        while node != self.depot:
             sol.append(node)
-            node = node.next
-            first_it = False
+            node = self.succ[node]
         return sol
 
     def copy(self):
-        return copy.deepcopy(self)
+        cdef:
+            Tour other = Tour.__new__(Tour)
+        other.depot = self.depot
+        other.size = self.size
+        other.succ = self.succ
+        other.pred = self.pred
+        other.pos = self.pos
+        other.cum_dist = self.cum_dist
+        other.cum_rdist = self.cum_rdist
+        return other
 
     @property
     def cost(self):
-        return self.depot.cum_dist
+        return self.cum_dist[self.depot]
 
-    cdef public void insert(Tour self, Node new) except *:
-        new.prev = self.depot.prev
-        self.depot.prev.next = new
-        new.next = self.depot
-        self.depot.prev = new
-
-    cdef public void calc_costs(Tour self, double[:, :] D) except *:
+    def canonical_hash(self, bint symmetric=True) -> int:
+        """64-bit hash of the set of arcs of the tour, which does not depend on its starting node,
+        nor on its direction if symmetric (arcs are then taken as undirected edges)"""
+        cdef:
+            int i, j
+            unsigned long long n = self.succ.size()
+            unsigned long long h = 0
+        for i in range(<int>n):
+            j = self.succ[i]
+            if j < 0:
+                continue
+            if symmetric and j < i:
+                h = h + mix64(<unsigned long long>j * n + <unsigned long long>i)
+            else:
+                h = h + mix64(<unsigned long long>i * n + <unsigned long long>j)
+        return h
+
+    cdef public void insert(Tour self, int new) except *:
+        self.insert_after(new, self.pred[self.depot])
+
+    cdef public void insert_after(Tour self, int new, int node) except *:
+        self.pred[new] = node
+        self.succ[new] = self.succ[node]
+        self.pred[self.succ[node]] = new
+        self.succ[node] = new
+        self.size = self.size + 1
+
+    cdef public void calc_costs(Tour self, Problem problem) except *:
 
         cdef:
-            bool first_it = True
-            Node node = self.depot
+            int node = self.depot
             double dist = 0.0
             double rdist = 0.0
-
-        node.cum_dist = dist
-        node.cum_rdist = rdist
-        while (not node.is_depot) or (first_it):
-            node = node.next
-            dist = dist + D[node.prev.index, node.index]
-            rdist = rdist + D[node.index, node.prev.index] - D[node.prev.index, node.index]
-            node.cum_dist = dist
-            node.cum_rdist = rdist
-            first_it = False
+            int position = 0
+
+        # Costs accumulate from the depot, which holds the totals
+        while True:
+            node = self.succ[node]
+            position = position + 1
+            dist = dist + problem.dist(self.pred[node], node)
+
+            # Reversing segments only changes costs of asymmetric problems
+            if not problem.symmetric:
+                rdist = rdist + problem.dist(node, self.pred[node]) - problem.dist(self.pred[node], node)
+            self.cum_dist[node] = dist
+            self.cum_rdist[node] = rdist
+            self.pos[node] = position
+            if node == self.depot:
+                break
+        self.pos[self.depot] = 0
+
+
+cdef inline unsigned long long mix64(unsigned long long x) noexcept nogil:
+    # Finalizer of splitmix64, so that sums of keys rarely collide
+    x = (x ^ (x >> 30)) * 0xbf58476d1ce4e5b9ULL
+    x = (x ^ (x >> 27)) * 0x94d049bb133111ebULL
+    return x ^ (x >> 31)
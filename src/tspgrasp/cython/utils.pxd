@@ -21,10 +21,13 @@ cdef int carg_min(vector[double] v)
 cdef int cpop(vector[int] &v, size_t index) except *
 
 
+cdef double steady_clock() noexcept nogil
+
+
 cdef class ExpApproxTable:
 
     cdef:
         vector[double] table
         double l, u, step
 
-    cdef double calc(self, double x) except *
+    cdef double calc(self, double x) noexcept nogil
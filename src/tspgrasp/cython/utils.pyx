@@ -12,6 +12,21 @@ cdef extern from "math.h":
     double HUGE_VAL
 
 
+cdef extern from *:
+    """
+    #include <chrono>
+    static inline double _steady_seconds(void) {
+        return std::chrono::duration<double>(std::chrono::steady_clock::now().time_since_epoch()).count();
+    }
+    """
+    double _steady_seconds() nogil
+
+
+cdef double steady_clock() noexcept nogil:
+    # Monotonic wall clock (s), cheap enough to poll from nogil loops
+    return _steady_seconds()
+
+
 def python_cmax(v: List[int]):
     return cmax(v)
 
@@ -115,7 +130,7 @@ cdef class ExpApproxTable:
         for i in range(size):
             self.table.push_back(exp(l + i * self.step))
 
-    cdef double calc(self, double x) except *:
+    cdef double calc(self, double x) noexcept nogil:
         cdef:
             double quantile, alpha
             int lower, upper
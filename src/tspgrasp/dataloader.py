@@ -1,3 +1,6 @@
+import numpy as np
+
+
 def read_tsp_file(file_path: str):
     # Store the coordinates
     coordinates = []
@@ -19,8 +22,56 @@ def read_tsp_file(file_path: str):
                 if line == "EOF" or line.endswith("_SECTION"):
                     break
 
-                # Split the line into components and convert them to integers
+                # Split the line into components and convert them to numbers
                 _, x, y = line.split()
-                coordinates.append([int(x), int(y)])
+                coordinates.append([_to_number(x), _to_number(y)])
 
     return coordinates
+
+
+def _to_number(value: str):
+    # Integer coordinates are kept as such, while GEO instances use decimals
+    try:
+        return int(value)
+    except ValueError:
+        return float(value)
+
+
+def save_distance_matrix(file_path: str, D: np.ndarray, dtype=None):
+    """Write a pairwise distance matrix to a .npy file, which can be memory-mapped when loaded.
+
+    Parameters
+    ----------
+    file_path : str
+        Destination path
+
+    D : np.ndarray
+        2-dimensional distance matrix, or its condensed upper triangle as returned by pdist
+
+    dtype : type, optional
+        Data type stored, such as np.float32 or np.int32 for half the size, by default None,
+        which keeps the type of D
+    """
+    D = np.ascontiguousarray(D, dtype=dtype)
+    assert D.ndim == 1 or (D.ndim == 2 and D.shape[0] == D.shape[1]), "D must be a squared matrix"
+    np.save(file_path, D, allow_pickle=False)
+
+
+def load_distance_matrix(file_path: str, mmap: bool = True) -> np.ndarray:
+    """Read a pairwise distance matrix written by `save_distance_matrix`.
+
+    Parameters
+    ----------
+    file_path : str
+        Path of the .npy file
+
+    mmap : bool, optional
+        Whether to memory-map the file read-only instead of reading it into memory, by default True.
+        Problems use mapped matrices without copies, so several processes share the page cache.
+
+    Returns
+    -------
+    np.ndarray
+        Distance matrix, a np.memmap if `mmap` is True
+    """
+    return np.load(file_path, mmap_mode="r" if mmap else None, allow_pickle=False)
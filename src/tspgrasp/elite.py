@@ -0,0 +1,123 @@
+from typing import List, Optional
+
+import numpy as np
+
+
+# Number of intermediate tours along each relinking path improved by local search
+RELINK_POINTS = 2
+
+
+class EliteMember:
+
+    seq: List[int]
+    cost: float
+    edges: set
+
+    def __init__(self, seq: List[int], cost: float):
+        self.seq = seq
+        self.cost = cost
+        self.edges = tour_edges(seq)
+
+
+class ElitePool:
+
+    size: int
+    members: List[EliteMember]
+    """Members sorted by cost"""
+
+    def __init__(self, size: int):
+        """Pool of diverse local optima, ranked by cost and by edge distance from each other
+
+        Parameters
+        ----------
+        size : int
+            Maximum number of members
+        """
+        assert size >= 1, "size must be a positive integer"
+        self.size = size
+        self.members = []
+
+    def add(self, seq: List[int], cost: float) -> bool:
+        """Insert a tour unless it is already in the pool or worse than every member of a full pool.
+        In a full pool, it replaces the most similar member among those that are not better.
+
+        Returns
+        -------
+        bool
+            Whether the tour was inserted
+        """
+        new = EliteMember(seq, cost)
+        distances = [edge_distance(new.edges, member.edges) for member in self.members]
+        if 0 in distances:
+            return False
+        if len(self.members) >= self.size:
+            candidates = [i for i, member in enumerate(self.members) if member.cost >= cost]
+            if not candidates:
+                return False
+            self.members.pop(min(candidates, key=lambda i: (distances[i], -self.members[i].cost)))
+        self.members.append(new)
+        self.members.sort(key=lambda member: member.cost)
+        return True
+
+    def pick(self, seq: List[int], rng: np.random.Generator) -> Optional[EliteMember]:
+        """Random member different from seq, with probabilities proportional to edge distances"""
+        edges = tour_edges(seq)
+        distances = np.array([edge_distance(edges, member.edges) for member in self.members], dtype=float)
+        if distances.sum() == 0:
+            return None
+        return self.members[rng.choice(len(self.members), p=distances / distances.sum())]
+
+
+def tour_edges(seq: List[int]) -> set:
+    """Undirected edges of a tour, encoded as integers"""
+    a = np.asarray(seq, dtype=np.int64)
+    b = np.roll(a, -1)
+    return set((np.minimum(a, b) * len(a) + np.maximum(a, b)).tolist())
+
+
+def edge_distance(a: set, b: set) -> int:
+    """Number of edges of a tour missing from another"""
+    return len(a) - len(a & b)
+
+
+def relink(source: List[int], target: List[int], n_points: int = RELINK_POINTS) -> List[List[int]]:
+    """Intermediate tours on a path from source to target.
+
+    Both tours are rotated to start at the same node and target is oriented to share more
+    positions with source. Each step reverses a segment of the current tour so that the next
+    position matches target, introducing an edge of target while removing two edges at most.
+    The tours returned are evenly spaced along the path, excluding its ends.
+    """
+    n = len(source)
+    start = source[0]
+    k = target.index(start)
+    target = target[k:] + target[:k]
+    reverse = [start] + target[1:][::-1]
+    if sum(x == y for x, y in zip(source, reverse)) > sum(x == y for x, y in zip(source, target)):
+        target = reverse
+
+    steps = [i for i in range(1, n) if source[i] != target[i]]
+    if len(steps) <= 1:
+        return []
+    stops = set(int(round(len(steps) * (p + 1) / (n_points + 1))) for p in range(n_points))
+    stops.discard(0)
+    stops.discard(len(steps))
+
+    target = np.array(target, dtype=np.int64)
+    cur = np.array(source, dtype=np.int64)
+    pos = np.empty(n, dtype=np.int64)
+    pos[cur] = np.arange(n)
+    points = []
+    n_steps = 0
+    for i in range(1, n):
+        if n_steps >= max(stops, default=0):
+            break
+        if cur[i] == target[i]:
+            continue
+        j = pos[target[i]]
+        cur[i:j + 1] = cur[i:j + 1][::-1].copy()
+        pos[cur[i:j + 1]] = np.arange(i, j + 1)
+        n_steps = n_steps + 1
+        if n_steps in stops and not np.array_equal(cur, target):
+            points.append(cur.tolist())
+    return points
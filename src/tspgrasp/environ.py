@@ -7,19 +7,45 @@ from tspgrasp.solution import Solution
 
 try:
     from tspgrasp.grasp import Grasp
+    import tspgrasp.cython.problem as tspprob
     import tspgrasp.cython.constructive as tspconstr
     import tspgrasp.cython.simulated_annealing as tspsa
     import tspgrasp.cython.local_search as tspls
+    import tspgrasp.cython.lin_kernighan as tsplk
     cythonized = True
 except ModuleNotFoundError as e:
     warnings.warn(f"Failed to import Cython implementations - Using pure Python - {e}")
     from tspgrasp.pypure.grasp import GrasPy as Grasp
+    import tspgrasp.pypure.problem as tspprob
     import tspgrasp.pypure.constructive as tspconstr
     import tspgrasp.pypure.simulated_annealing as tspsa
     import tspgrasp.pypure.local_search as tspls
+    import tspgrasp.pypure.lin_kernighan as tsplk
     cythonized = False
 
 
+class CoordinateProblem(tspprob.CoordinateProblem):
+
+    def __init__(self, X: np.ndarray, metric: str = "euclidean"):
+        """TSP defined by 2-dimensional coordinates, whose distances are computed on demand
+        instead of stored in a dense matrix. It can be passed in place of `D` to `Grasp`,
+        constructive heuristics and local search operators.
+        Nearest neighbors of planar metrics are searched on a uniform grid, so candidate lists
+        of local search and insertion operators avoid computing all pairwise distances.
+
+        Parameters
+        ----------
+        X : np.ndarray
+            Coordinates of nodes with shape (n, 2)
+
+        metric : str, optional
+            Distance function, one of "euclidean", "euc_2d" (rounded), "ceil_2d",
+            "geo" (latitude and longitude) and "att" (pseudo-Euclidean), as defined in TSPLIB.
+            By default "euclidean".
+        """
+        super().__init__(X, metric)
+
+
 class CheapestArc(tspconstr.CheapestArc):
 
     def __init__(self, seed: int = None):
@@ -38,8 +64,8 @@ class CheapestArc(tspconstr.CheapestArc):
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
 
         Returns
         -------
@@ -53,7 +79,7 @@ class CheapestArc(tspconstr.CheapestArc):
 
 class SemiGreedyArc(tspconstr.SemiGreedyArc):
 
-    def __init__(self, alpha=(0.0, 1.0), seed=None):
+    def __init__(self, alpha=(0.0, 1.0), seed=None, reactive=False):
         """Greedy-randomized constructive heuristic for the TSP. It inserts the next node
         at the end of the partial tour.
         Depot nodes are randomly chosen.
@@ -66,16 +92,21 @@ class SemiGreedyArc(tspconstr.SemiGreedyArc):
 
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        reactive : bool, optional
+            Either or not to draw alpha among 10 values evenly spaced in its range, with probabilities
+            favoring values that led to lower mean local optimum costs (reactive GRASP),
+            updated by `Grasp` after each local search. By default False
         """
-        super().__init__(alpha=alpha, seed=seed)
+        super().__init__(alpha=alpha, seed=seed, reactive=reactive)
 
     def __call__(self, D: np.ndarray) -> Solution:
         """Solves a TSP based on a pairwise distance matrix.
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
 
         Returns
         -------
@@ -89,7 +120,7 @@ class SemiGreedyArc(tspconstr.SemiGreedyArc):
 
 class CheapestInsertion(tspconstr.CheapestInsertion):
 
-    def __init__(self, seed=None):
+    def __init__(self, seed=None, n_neighbors=None):
         """Greedy adaptive construction for the TSP inserting the next node at the best position
         between two existing nodes of the partial tour.
         Depot nodes are randomly chosen.
@@ -98,16 +129,21 @@ class CheapestInsertion(tspconstr.CheapestInsertion):
         ----------
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes of each node next to which it may be inserted,
+            by default None, which considers every arc of the partial tour.
+            Nodes with no neighbor in the partial tour are inserted at the cheapest arc overall.
         """
-        super().__init__(seed)
+        super().__init__(seed, n_neighbors)
 
     def __call__(self, D: np.ndarray) -> Solution:
         """Solves a TSP based on a pairwise distance matrix.
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
 
         Returns
         -------
@@ -121,7 +157,7 @@ class CheapestInsertion(tspconstr.CheapestInsertion):
 
 class RandomInsertion(tspconstr.RandomInsertion):
 
-    def __init__(self, seed=None):
+    def __init__(self, seed=None, n_neighbors=None):
         """Constructive heuristic for the TSP inserting a random next node at the best position
         between two existing nodes of the partial tour.
         Depot nodes are randomly chosen.
@@ -130,16 +166,21 @@ class RandomInsertion(tspconstr.RandomInsertion):
         ----------
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes of each node next to which it may be inserted,
+            by default None, which considers every arc of the partial tour.
+            Nodes with no neighbor in the partial tour are inserted at the cheapest arc overall.
         """
-        super().__init__(seed)
+        super().__init__(seed, n_neighbors)
 
     def __call__(self, D: np.ndarray) -> Solution:
         """Solves a TSP based on a pairwise distance matrix.
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
 
         Returns
         -------
@@ -153,7 +194,7 @@ class RandomInsertion(tspconstr.RandomInsertion):
 
 class SemiGreedyInsertion(tspconstr.SemiGreedyInsertion):
 
-    def __init__(self, alpha=(0.0, 1.0), seed=None):
+    def __init__(self, alpha=(0.0, 1.0), seed=None, n_neighbors=None, reactive=False):
         """Greedy-randomized constructive heuristic for the TSP based on inserting the next node
         between two existing nodes of the partial tour.
 
@@ -165,16 +206,136 @@ class SemiGreedyInsertion(tspconstr.SemiGreedyInsertion):
 
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes of each node next to which it may be inserted,
+            by default None, which considers every arc of the partial tour.
+            Nodes with no neighbor in the partial tour are inserted at the cheapest arc overall.
+
+        reactive : bool, optional
+            Either or not to draw alpha among 10 values evenly spaced in its range, with probabilities
+            favoring values that led to lower mean local optimum costs (reactive GRASP),
+            updated by `Grasp` after each local search. By default False
         """
-        super().__init__(alpha, seed)
+        super().__init__(alpha, seed, n_neighbors, reactive)
 
     def __call__(self, D: np.ndarray) -> Solution:
         """Solves a TSP based on a pairwise distance matrix.
 
         Parameters
         ----------
-        D : np.ndarray
-            2-dimensional distance matrix
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
+
+        Returns
+        -------
+        Solution
+            Attributes:
+            - tour : List[int]
+            - cost : float
+        """
+        return super().__call__(D)
+
+
+class SpaceFillingCurve(tspconstr.SpaceFillingCurve):
+
+    def __init__(self, seed=None):
+        """Constructive heuristic for large TSPs defined by coordinates, which visits nodes
+        in the order of a Hilbert curve in O(n log n).
+        Each call uses a randomly shifted and reflected curve.
+
+        Parameters
+        ----------
+        seed : int, optional
+            Random generator seed (differs behavior from cython to python), by default None
+        """
+        super().__init__(seed)
+
+    def __call__(self, D: CoordinateProblem) -> Solution:
+        """Solves a TSP defined by coordinates.
+
+        Parameters
+        ----------
+        D : CoordinateProblem
+            Problem defined by coordinates
+
+        Returns
+        -------
+        Solution
+            Attributes:
+            - tour : List[int]
+            - cost : float
+        """
+        return super().__call__(D)
+
+
+class GreedyEdge(tspconstr.GreedyEdge):
+
+    def __init__(self, alpha=0.1, n_neighbors=10, seed=None):
+        """Greedy matching constructive heuristic for large TSPs. Edges of the nearest neighbor
+        graph are added by increasing cost while they form paths, which are then linked
+        from each endpoint to the nearest endpoint of another path.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            Random perturbation of edge costs, each increased by up to `alpha` times
+            its length, by default 0.1
+
+        n_neighbors : int, optional
+            Number of nearest nodes of each node considered as candidate edges, by default 10
+
+        seed : int, optional
+            Random generator seed (differs behavior from cython to python), by default None
+        """
+        super().__init__(alpha=alpha, n_neighbors=n_neighbors, seed=seed)
+
+    def __call__(self, D: np.ndarray) -> Solution:
+        """Solves a TSP based on a pairwise distance matrix.
+
+        Parameters
+        ----------
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
+
+        Returns
+        -------
+        Solution
+            Attributes:
+            - tour : List[int]
+            - cost : float
+        """
+        return super().__call__(D)
+
+
+class Savings(tspconstr.Savings):
+
+    def __init__(self, alpha=0.1, n_neighbors=10, seed=None):
+        """Clarke and Wright savings constructive heuristic for large TSPs. Edges of the nearest
+        neighbor graph are added by decreasing savings with respect to a randomly chosen hub
+        while they form paths, which are then linked as in `GreedyEdge`.
+
+        Parameters
+        ----------
+        alpha : float, optional
+            Random perturbation of savings, each decreased by up to `alpha` times
+            the length of its edge, by default 0.1
+
+        n_neighbors : int, optional
+            Number of nearest nodes of each node considered as candidate edges, by default 10
+
+        seed : int, optional
+            Random generator seed (differs behavior from cython to python), by default None
+        """
+        super().__init__(alpha=alpha, n_neighbors=n_neighbors, seed=seed)
+
+    def __call__(self, D: np.ndarray) -> Solution:
+        """Solves a TSP based on a pairwise distance matrix.
+
+        Parameters
+        ----------
+        D : np.ndarray | CoordinateProblem
+            2-dimensional distance matrix or a problem defined by coordinates
 
         Returns
         -------
@@ -188,17 +349,40 @@ class SemiGreedyInsertion(tspconstr.SemiGreedyInsertion):
 
 class LocalSearch(tspls.LocalSearch):
 
-    def __init__(self, seed: int = None):
+    def __init__(
+        self,
+        seed: int = None,
+        n_neighbors: int = None,
+        dont_look_bits: bool = False,
+        max_segment: int = 2,
+        reverse_segments: bool = True,
+    ):
         """Local Search (VNS with first improvement) implementation for TSP.
 
         Parameters
         ----------
         seed : int, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes considered as move candidates for each node.
+            Smaller values (10-20) lead to much faster searches on large instances.
+            By default None, which uses the nearest half of the nodes.
+
+        dont_look_bits : bool, optional
+            Either or not to keep a queue of active nodes, in which only endpoints of arcs
+            modified by accepted moves are searched again. By default False.
+
+        max_segment : int, optional
+            Maximum number of consecutive nodes relocated by Or-opt moves, by default 2.
+            Values above 2 add relocations of segments from 3 up to `max_segment` nodes.
+
+        reverse_segments : bool, optional
+            Either or not Or-opt moves also try to insert segments reversed, by default True
         """
-        super().__init__(seed)
+        super().__init__(seed, n_neighbors, dont_look_bits, max_segment, reverse_segments)
 
-    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000):
+    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000, time_limit=float("inf")):
         """Solve a TSP based on an initial solution and a distance matrix
 
         Parameters
@@ -206,12 +390,15 @@ class LocalSearch(tspls.LocalSearch):
         seq : List[int]
             Initial solution
 
-        D : np.ndarray
-            2d-distance matrix
+        D : np.ndarray | CoordinateProblem
+            2d-distance matrix or a problem defined by coordinates
 
         max_iter : int, optional
             Max number of moves, by default 100000
 
+        time_limit : float, optional
+            Time limit (s) after which the search stops with its current tour, by default float("inf")
+
         Returns
         -------
         Solution
@@ -219,12 +406,15 @@ class LocalSearch(tspls.LocalSearch):
             - tour : List[int]
             - cost : float
         """
-        return super().__call__(seq, D, max_iter)
+        return super().__call__(seq, D, max_iter, time_limit)
 
 
 class SimulatedAnnealing(tspsa.SimulatedAnnealing):
 
-    def __init__(self, T_start=10.0, T_final=0.001, decay=0.99, seed=None):
+    def __init__(
+        self, T_start=10.0, T_final=0.001, decay=0.99, seed=None, n_neighbors=None, dont_look_bits=False,
+        max_segment=2, reverse_segments=True
+    ):
         """Simulated Annealing for the TSP using a VNS.
 
         Parameters
@@ -240,10 +430,102 @@ class SimulatedAnnealing(tspsa.SimulatedAnnealing):
 
         seed : _type_, optional
             Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes considered as move candidates for each node.
+            By default None, which uses the nearest half of the nodes.
+
+        dont_look_bits : bool, optional
+            Either or not to keep a queue of active nodes, in which only endpoints of arcs
+            modified by accepted moves are searched again. By default False.
+
+        max_segment : int, optional
+            Maximum number of consecutive nodes relocated by Or-opt moves, by default 2.
+
+        reverse_segments : bool, optional
+            Either or not Or-opt moves also try to insert segments reversed, by default True
+        """
+        super().__init__(
+            T_start, T_final, decay, seed, n_neighbors, dont_look_bits, max_segment, reverse_segments
+        )
+
+    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000, time_limit=float("inf")):
+        """Solve a TSP based on an initial solution and a distance matrix.
+
+        Parameters
+        ----------
+        seq : List[int]
+            Initial solution
+
+        D : np.ndarray | CoordinateProblem
+            2d-distance matrix or a problem defined by coordinates
+
+        max_iter : int, optional
+            Max number of moves, by default 100000
+
+        time_limit : float, optional
+            Time limit (s) after which the search stops with its current tour, by default float("inf")
+
+        Returns
+        -------
+        Solution
+            Attributes:
+            - tour : List[int]
+            - cost : float
+        """
+        return super().__call__(seq, D, max_iter, time_limit)
+
+
+class LinKernighan(tsplk.LinKernighan):
+
+    def __init__(
+        self,
+        seed: int = None,
+        n_neighbors: int = None,
+        dont_look_bits: bool = False,
+        max_segment: int = 2,
+        reverse_segments: bool = True,
+        max_depth: int = 5,
+        breadth: int = 5,
+    ):
+        """Local Search combining the VNS of `LocalSearch` with Lin-Kernighan style
+        variable depth exchanges for symmetric TSPs.
+
+        From each node, a chain of sequential 2-opt exchanges is built over the candidate lists,
+        and the prefix of the chain with the largest gain is kept. Exchanges are skipped on
+        asymmetric problems, in which case it behaves as `LocalSearch`.
+
+        Parameters
+        ----------
+        seed : int, optional
+            Random generator seed (differs behavior from cython to python), by default None
+
+        n_neighbors : int, optional
+            Number of nearest nodes considered as move candidates for each node.
+            Smaller values (5-10) are recommended on large instances.
+            By default None, which uses the nearest half of the nodes.
+
+        dont_look_bits : bool, optional
+            Either or not to keep a queue of active nodes, in which only endpoints of arcs
+            modified by accepted moves are searched again. By default False.
+
+        max_segment : int, optional
+            Maximum number of consecutive nodes relocated by Or-opt moves, by default 2.
+
+        reverse_segments : bool, optional
+            Either or not Or-opt moves also try to insert segments reversed, by default True
+
+        max_depth : int, optional
+            Maximum number of sequential exchanges in a chain, by default 5
+
+        breadth : int, optional
+            Number of alternatives tried for the first exchange of a chain, by default 5
         """
-        super().__init__(T_start, T_final, decay, seed)
+        super().__init__(
+            seed, n_neighbors, dont_look_bits, max_segment, reverse_segments, max_depth, breadth
+        )
 
-    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000):
+    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000, time_limit=float("inf")):
         """Solve a TSP based on an initial solution and a distance matrix.
 
         Parameters
@@ -251,12 +533,15 @@ class SimulatedAnnealing(tspsa.SimulatedAnnealing):
         seq : List[int]
             Initial solution
 
-        D : np.ndarray
-            2d-distance matrix
+        D : np.ndarray | CoordinateProblem
+            2d-distance matrix or a problem defined by coordinates
 
         max_iter : int, optional
             Max number of moves, by default 100000
 
+        time_limit : float, optional
+            Time limit (s) after which the search stops with its current tour, by default float("inf")
+
         Returns
         -------
         Solution
@@ -264,4 +549,4 @@ class SimulatedAnnealing(tspsa.SimulatedAnnealing):
             - tour : List[int]
             - cost : float
         """
-        return super().__call__(seq, D, max_iter)
+        return super().__call__(seq, D, max_iter, time_limit)
@@ -0,0 +1,335 @@
+import os
+import copy
+import time
+import logging
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from multiprocessing import shared_memory
+from typing import Callable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from tspgrasp.solution import SearchStats, Solution
+
+
+# Initialize logger
+log = logging.getLogger(__name__)
+
+# Number of chunks submitted per worker, so that early stopping is not delayed by long chunks
+CHUNKS_PER_JOB = 4
+
+# Worker state, set once per process or thread by its initializer
+_worker = threading.local()
+
+
+def n_workers(n_jobs: int) -> int:
+    """Resolve the number of workers, with -1 meaning all available CPUs"""
+    if n_jobs is None or n_jobs == 0:
+        return 1
+    if n_jobs < 0:
+        return max(1, (os.cpu_count() or 1) + 1 + n_jobs)
+    return n_jobs
+
+
+def _init_worker(grasp_class, constructive, local_search, shm_args, problem, stop=None):
+    # Dense matrices are attached from shared memory instead of pickled per worker
+    if shm_args is not None:
+        name, shape, dtype, problem_class, n_nodes = shm_args
+        shm = shared_memory.SharedMemory(name=name)
+        D = np.ndarray(shape, dtype=dtype, buffer=shm.buf)
+        problem = problem_class(n_nodes, D, copy=False)
+        _worker.shm = shm
+    _worker.problem = problem
+    _worker.stop = stop
+    _worker.grasp = grasp_class(constructive=constructive, local_search=local_search)
+
+
+def _init_thread(grasp_class, constructive, local_search, problem, stop=None):
+    # Threads share the problem, but each one needs its own operators
+    _worker.problem = problem
+    _worker.stop = stop
+    _worker.grasp = grasp_class(
+        constructive=copy.deepcopy(constructive),
+        local_search=copy.deepcopy(local_search),
+    )
+
+
+def _run_chunk(
+    seeds: Tuple[int, int],
+    max_iter: int,
+    max_moves: int,
+    deadline: float,
+    target: float,
+    stats: bool,
+    initial_tour: Optional[List[int]],
+    perturbation: float,
+    elite_size: int,
+    cache_size: int,
+) -> Tuple[Solution, List[float]]:
+    grasp = _worker.grasp
+    grasp.seed = seeds[0]
+    grasp.constructive.set_seed(seeds[0])
+    grasp.local_search.set_seed(seeds[1])
+    grasp.costs = []
+    sol = grasp.solve(
+        _worker.problem,
+        max_iter=max_iter,
+        max_moves=max_moves,
+        time_limit=deadline - time.monotonic(),
+        target=target,
+        stats=stats,
+        initial_tour=initial_tour,
+        perturbation=perturbation,
+        elite_size=elite_size,
+        cache_size=cache_size,
+        stop=_worker.stop,
+    )
+    return sol, grasp.costs
+
+
+def _chunk_sizes(max_iter: int, n_chunks: int) -> List[int]:
+    base, extra = divmod(max_iter, n_chunks)
+    return [base + (1 if i < extra else 0) for i in range(n_chunks)]
+
+
+def solve_parallel(
+    grasp,
+    problem: object,
+    problem_type: Callable,
+    n_jobs: int,
+    max_iter: int,
+    max_moves: int,
+    time_limit: float = float("inf"),
+    target: float = -float("inf"),
+    verbose: bool = False,
+    backend: str = "processes",
+    stats: bool = False,
+    initial_tour: Optional[Sequence[int]] = None,
+    perturbation: float = 0.0,
+    elite_size: int = 0,
+    cache_size: int = 0
+) -> Solution:
+    """Run independent GRASP iterations of `grasp` on a pool of workers.
+
+    Iterations are split into chunks, each with its own constructive and local search seeds
+    spawned from `grasp.seed`, so results are reproducible for a given seed and `n_jobs`.
+    The best solution is selected in chunk order, hence ties are broken deterministically.
+    With `backend="threads"` workers share the problem in memory, which pays off when the
+    local search (that releases the GIL) dominates the run time.
+    An `initial_tour` is improved once before dispatching, and chunks start from the result.
+    Each chunk keeps its own elite pool and tour caches when `elite_size` or `cache_size` are positive.
+    """
+    assert backend in ("processes", "threads"), "backend must be either 'processes' or 'threads'"
+    warm = None
+    if initial_tour is not None:
+        start_time = time.monotonic()
+        warm = grasp.solve(
+            problem, max_iter=0, max_moves=max_moves, time_limit=time_limit, target=target,
+            stats=stats, initial_tour=initial_tour
+        )
+        time_limit = time_limit - (time.monotonic() - start_time)
+        initial_tour = warm.tour
+        if warm.cost <= target:
+            return warm
+    n_jobs = n_workers(n_jobs)
+    n_chunks = max(1, min(max_iter, CHUNKS_PER_JOB * n_jobs))
+    sizes = _chunk_sizes(max_iter, n_chunks)
+    seeds = [
+        tuple(int(s) or 1 for s in child.generate_state(2))
+        for child in np.random.SeedSequence(grasp.seed).spawn(n_chunks)
+    ]
+    deadline = time.monotonic() + time_limit
+
+    shm = None
+    if backend == "threads":
+        # Compute cached neighborhoods once before sharing the problem
+        grasp.local_search.set_problem(problem)
+        stop = threading.Event()
+        executor = ThreadPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_thread,
+            initargs=(type(grasp), grasp.constructive, grasp.local_search, problem, stop),
+        )
+
+    else:
+        # Share dense distance matrices, other problems are pickled to workers
+        # (memory-mapped matrices are pickled by file name and shared by the page cache)
+        shm_args = None
+        init_problem = problem
+        if type(problem) is problem_type(problem.D) and not isinstance(problem.D, np.memmap):
+            D = np.asarray(problem.D)
+            shm = shared_memory.SharedMemory(create=True, size=max(D.nbytes, 1))
+            np.ndarray(D.shape, dtype=D.dtype, buffer=shm.buf)[:] = D
+            shm_args = (shm.name, D.shape, D.dtype, type(problem), problem.n_nodes)
+            init_problem = None
+        # Passed at worker creation, as process events cannot be pickled with each chunk
+        stop = multiprocessing.Event()
+        executor = ProcessPoolExecutor(
+            max_workers=n_jobs,
+            initializer=_init_worker,
+            initargs=(
+                type(grasp), grasp.constructive, grasp.local_search,
+                shm_args, init_problem, stop
+            ),
+        )
+
+    results = [None] * n_chunks
+    try:
+        futures = {
+            executor.submit(
+                _run_chunk, seeds[i], sizes[i], max_moves, deadline, target, stats, initial_tour,
+                perturbation, elite_size, cache_size
+            ): i
+            for i in range(n_chunks)
+        }
+        pending = set(futures)
+        best_cost = np.inf
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for fut in done:
+                if fut.cancelled():
+                    continue
+                sol, costs = fut.result()
+                results[futures[fut]] = (sol, costs)
+                if sol is not None and sol.cost < best_cost:
+                    best_cost = sol.cost
+                    if verbose:
+                        log.info(f"New best solution {best_cost}")
+
+            # Stop remaining chunks once target is reached, running ones at their next iteration
+            if best_cost <= target:
+                stop.set()
+                break
+    finally:
+        # Chunks still running after the target was reached are not waited for
+        executor.shutdown(wait=not stop.is_set(), cancel_futures=True)
+        if shm is not None:
+            shm.close()
+            shm.unlink()
+
+    # Collect in chunk order, after the warm start if any
+    best = warm
+    run_stats = SearchStats() if stats else None
+    if warm is not None and run_stats is not None:
+        run_stats.merge(warm.stats)
+    for res in results:
+        if res is None:
+            continue
+        sol, costs = res
+        grasp.costs.extend(costs)
+        if sol is not None and run_stats is not None:
+            run_stats.merge(sol.stats)
+        if sol is not None and (best is None or sol.cost < best.cost):
+            best = sol
+    if best is not None:
+        best.stats = run_stats
+    return best
+
+
+def _per_instance(value, n: int, name: str) -> list:
+    # Scalars apply to every instance, sequences give one budget per instance
+    if np.ndim(value) == 0:
+        return [value] * n
+    assert len(value) == n, f"{name} must be a scalar or have one value per instance"
+    return list(value)
+
+
+def _solve_instance(
+    grasp,
+    D: object,
+    max_iter: int,
+    time_limit: float,
+    target: float,
+    as_problem: Callable,
+    max_moves: int,
+    stats: bool,
+) -> Tuple[Solution, List[float]]:
+    # Operators restart from the seed of grasp, so results do not depend on scheduling
+    grasp.constructive.set_seed(grasp.seed)
+    grasp.local_search.set_seed(grasp.seed)
+    grasp.costs = []
+    sol = grasp.solve(
+        as_problem(D),
+        max_iter=max_iter,
+        max_moves=max_moves,
+        time_limit=time_limit,
+        target=target,
+        stats=stats,
+    )
+    return sol, grasp.costs
+
+
+def _run_batch(
+    items: list,
+    as_problem: Callable,
+    seed: int,
+    max_moves: int,
+    stats: bool,
+) -> List[Tuple[Solution, List[float]]]:
+    grasp = _worker.grasp
+    grasp.seed = seed
+    return [_solve_instance(grasp, *item, as_problem, max_moves, stats) for item in items]
+
+
+def solve_batch(
+    grasp,
+    matrices: Sequence,
+    as_problem: Callable,
+    n_jobs: int,
+    max_iter,
+    max_moves: int,
+    time_limit=float("inf"),
+    target=-float("inf"),
+    backend: str = "processes",
+    stats: bool = False
+) -> List[Solution]:
+    """Solve each problem in `matrices` with the operators of `grasp`, returning solutions in order.
+
+    Budgets `max_iter`, `time_limit` and `target` are either scalars or sequences with one value
+    per instance, and time limits count from the start of each instance. Workers create their
+    operators once and reuse them for every instance of their chunks, which are sized so that
+    small problems are not dominated by dispatch. Each instance restarts the operators from
+    `grasp.seed`, hence results do not depend on `n_jobs`.
+    """
+    assert backend in ("processes", "threads"), "backend must be either 'processes' or 'threads'"
+    n = len(matrices)
+    items = list(zip(
+        matrices,
+        _per_instance(max_iter, n, "max_iter"),
+        _per_instance(time_limit, n, "time_limit"),
+        _per_instance(target, n, "target"),
+    ))
+    n_jobs = min(n_workers(n_jobs), max(n, 1))
+
+    if n_jobs == 1:
+        results = [_solve_instance(grasp, *item, as_problem, max_moves, stats) for item in items]
+    else:
+        if backend == "threads":
+            executor = ThreadPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_thread,
+                initargs=(type(grasp), grasp.constructive, grasp.local_search, None),
+            )
+        else:
+            executor = ProcessPoolExecutor(
+                max_workers=n_jobs,
+                initializer=_init_worker,
+                initargs=(type(grasp), grasp.constructive, grasp.local_search, None, None),
+            )
+        sizes = _chunk_sizes(n, min(n, CHUNKS_PER_JOB * n_jobs))
+        bounds = np.cumsum([0] + sizes)
+        with executor:
+            futures = [
+                executor.submit(_run_batch, items[start:end], as_problem, grasp.seed, max_moves, stats)
+                for start, end in zip(bounds[:-1], bounds[1:])
+            ]
+            results = [res for fut in futures for res in fut.result()]
+
+    # Collect in instance order
+    sols = []
+    grasp.costs = []
+    for sol, costs in results:
+        grasp.costs.extend(costs)
+        sols.append(sol)
+    return sols
@@ -4,11 +4,23 @@ from typing import List
 import numpy as np
 
 from tspgrasp.pypure.node import Node
-from tspgrasp.pypure.problem import Problem
+from tspgrasp.pypure.problem import Problem, CoordinateProblem, as_problem
 from tspgrasp.pypure.tour import Tour
 from tspgrasp.solution import Solution
 
 
+# Size of sorted nearest neighbor rows used to pick the next arc
+NEAREST_SIZE = 16
+
+# Bits per axis of the space filling curve grid
+HILBERT_ORDER = 16
+
+# Discrete alpha values of reactive semi-greedy constructions and
+# amplification of their differences in mean cost
+REACTIVE_LEVELS = 10
+REACTIVE_AMPLIFICATION = 10.0
+
+
 class Constructive:
 
     nodes: List[Node]
@@ -17,23 +29,33 @@ class Constructive:
     tour: Tour
 
     def __init__(self, seed=None):
+        self.seed = seed
         self.rng = np.random.default_rng(seed)
         self.problem = None
         self.tour = None
         self.nodes = []
         self.queue = []
 
+    def __reduce__(self):
+        return (type(self), (self.seed,))
+
+    def set_seed(self, seed):
+        self.seed = seed
+        self.rng = np.random.default_rng(seed)
+
     def __call__(self, D: np.ndarray) -> Solution:
-        n_nodes = D.shape[0]
-        assert D.shape[0] == D.shape[1], "D must be a squared matrix"
-        problem = Problem(n_nodes, D)
+        problem = as_problem(D)
         self.do(problem)
-        self.tour.calc_costs(D)
+        self.tour.calc_costs(problem)
         sol = Solution(self.tour)
         return sol
 
+    def feedback(self, cost: float):
+        # Cost of the local optimum obtained from the last construction
+        pass
+
     def calc_insertion(self, new: Node) -> float:
-        cost = self.problem.D[self.tour.depot.prev.index, new.index]
+        cost = self.problem.dist(self.tour.depot.prev.index, new.index)
         return cost
 
     def insert(self, new: Node):
@@ -46,12 +68,105 @@ class Constructive:
         node = self.queue.pop(first)
         self.tour = Tour(node)
 
+    def _build_tour(self, seq: List[int]):
+        self.nodes = [Node(i) for i in range(self.problem.n_nodes)]
+        self.queue = []
+        self.tour = Tour(self.nodes[seq[0]])
+        for i in seq[1:]:
+            self.tour.insert(self.nodes[i])
+
     def calc_candidates(self) -> List[float]:
         costs = []
         for node in self.queue:
             costs.append(self.calc_insertion(node))
         return costs
 
+    def _init_insertions(self, n_neighbors: int):
+        # Neighborhoods restrict insertions to arcs next to nearby nodes already in the tour
+        self._restricted = n_neighbors is not None
+        if self._restricted:
+            self._nb_ptr, self._nb_idx = self.problem.neighbors(n_neighbors)
+        self._insert_after = [None] * self.problem.n_nodes
+        self._insert_cost = [float("inf")] * self.problem.n_nodes
+        self._pos = [0] * self.problem.n_nodes
+        for new in self.queue:
+            self._scan_insertion(new)
+
+    def _scan_insertion(self, new: Node):
+        if self._restricted and self._scan_neighbors(new):
+            return
+
+        # First cheapest arc following the tour from the depot
+        cost = float("inf")
+        for node in self.tour._linked_nodes:
+            cfrom = self.problem.dist(node.index, new.index)
+            cnext = self.problem.dist(new.index, node.next.index)
+            cbase = self.problem.dist(node.index, node.next.index)
+            c = cfrom + cnext - cbase
+            if c < cost:
+                self._insert_after[new.index] = node
+                cost = c
+        self._insert_cost[new.index] = cost
+
+    def _scan_neighbors(self, new: Node) -> bool:
+        # Arcs entering and leaving neighbors in the tour, or none to scan the whole tour instead
+        self._insert_cost[new.index] = float("inf")
+        for j in self._nb_idx[self._nb_ptr[new.index]:self._nb_ptr[new.index + 1]]:
+            node = self.nodes[j]
+            if node.next is None:
+                continue
+            self._try_arc(new, node)
+            self._try_arc(new, node.prev)
+        return self._insert_cost[new.index] < float("inf")
+
+    def _try_arc(self, new: Node, node: Node):
+        c = self.problem.dist(node.index, new.index) + self.problem.dist(new.index, node.next.index) \
+            - self.problem.dist(node.index, node.next.index)
+        cost = self._insert_cost[new.index]
+        after = self._insert_after[new.index]
+
+        # Without an arc yet (infinite distances), there is no position to compare ties with
+        if c < cost or (c == cost and (after is None or self._pos[node.index] < self._pos[after.index])):
+            self._insert_after[new.index] = node
+            self._insert_cost[new.index] = c
+
+    def _insert_cheapest(self, new: Node):
+        # Insert new after a, and renumber the following positions
+        a = self._insert_after[new.index]
+        b = a.next
+        new.prev = a
+        new.next = b
+        b.prev = new
+        a.next = new
+        node = new
+        while not node.is_depot:
+            self._pos[node.index] = self._pos[node.prev.index] + 1
+            node = node.next
+
+        # Only arcs leaving a and new changed, and the previous arc leaving a was removed,
+        # so cached insertions are rescanned only when their arc is gone.
+        # Ties keep the arc closest to the depot, as a complete scan would.
+        if self._restricted:
+            for nd in self.queue:
+                if self._insert_after[nd.index] is a:
+                    self._scan_insertion(nd)
+
+            # New arcs are next to a, new and b, so only their neighbors are updated
+            for node in (a, new, b):
+                for j in self._nb_idx[self._nb_ptr[node.index]:self._nb_ptr[node.index + 1]]:
+                    nd = self.nodes[j]
+                    if nd.next is None:
+                        self._try_arc(nd, a)
+                        self._try_arc(nd, new)
+            return
+
+        for nd in self.queue:
+            if self._insert_after[nd.index] is a:
+                self._scan_insertion(nd)
+                continue
+            self._try_arc(nd, a)
+            self._try_arc(nd, new)
+
     @abstractmethod
     def do(self, problem: Problem):
         pass
@@ -62,26 +177,82 @@ class CheapestArc(Constructive):
     def do(self, problem: Problem):
         self.problem = problem
         self.start()
-        while len(self.queue) > 0:
-            costs = self.calc_candidates()
-            choice = np.argmin(costs)
-            nd = self.queue.pop(choice)
-            self.insert(nd)
+        unvisited = {nd.index: nd for nd in self.queue}
+        self.queue = []
+
+        # Nearest unvisited node from rows sorted by distance (ties by index)
+        size = min(NEAREST_SIZE, problem.n_nodes)
+        nearest = problem.nearest_sorted(size)
+        while len(unvisited) > 0:
+            last = self.tour.depot.prev.index
+            node = next((j for j in nearest[last] if j in unvisited), None)
+
+            # Scan every unvisited node if the row is exhausted or ties may lie beyond it
+            if node is None or (
+                size < problem.n_nodes
+                and problem.dist(last, node) >= problem.dist(last, nearest[last, size - 1])
+            ):
+                node = min(unvisited, key=lambda j: (problem.dist(last, j), j))
+            self.insert(unvisited.pop(node))
         return self.tour.cost
 
 
 class SemiGreedyArc(CheapestArc):
 
-    def __init__(self, alpha=(0.0, 1.0), seed=None):
+    def __init__(self, alpha=(0.0, 1.0), seed=None, reactive=False):
         super().__init__(seed)
         if isinstance(alpha, float) or isinstance(alpha, int):
             alpha = (alpha, alpha)
         self.alpha = alpha
+        self.reactive = reactive
+        self.alpha_levels = [
+            alpha[0] + k * (alpha[1] - alpha[0]) / (REACTIVE_LEVELS - 1) for k in range(REACTIVE_LEVELS)
+        ]
+        self._reset_feedback()
+
+    def __reduce__(self):
+        return (type(self), (tuple(self.alpha), self.seed, self.reactive))
+
+    def feedback(self, cost: float):
+        # Mean local optimum cost of each alpha value sets its probability (reactive GRASP)
+        if not self.reactive or self._level < 0:
+            return
+        self._cost_sum[self._level] = self._cost_sum[self._level] + cost
+        self._counts[self._level] = self._counts[self._level] + 1
+        self._best_cost = min(self._best_cost, cost)
+        self._level = -1
+        q = [
+            (self._best_cost * n / total) ** REACTIVE_AMPLIFICATION if n > 0 and total > 0 else 1.0
+            for n, total in zip(self._counts, self._cost_sum)
+        ]
+        self.alpha_probs = [qk / sum(q) for qk in q]
+
+    def _reset_feedback(self):
+        self._level = -1
+        self._best_cost = float("inf")
+        self._cost_sum = [0.0] * REACTIVE_LEVELS
+        self._counts = [0] * REACTIVE_LEVELS
+        self.alpha_probs = [1.0 / REACTIVE_LEVELS] * REACTIVE_LEVELS
+
+    def _draw_alpha(self) -> float:
+        if not self.reactive:
+            return self.alpha[0] + self.rng.random() * (self.alpha[1] - self.alpha[0])
+        u = self.rng.random()
+        k = 0
+        acc = self.alpha_probs[0]
+        while k < REACTIVE_LEVELS - 1 and u >= acc:
+            k = k + 1
+            acc = acc + self.alpha_probs[k]
+        self._level = k
+        return self.alpha_levels[k]
 
     def do(self, problem: Problem):
+        # Feedback from another problem does not apply
+        if problem is not self.problem:
+            self._reset_feedback()
         self.problem = problem
         self.start()
-        alpha = self.alpha[0] + self.rng.random() * (self.alpha[1] - self.alpha[0])
+        alpha = self._draw_alpha()
         alpha = np.clip(alpha, 0.000001, 0.99999)
         while len(self.queue) > 0:
             costs = self.calc_candidates()
@@ -97,24 +268,33 @@ class SemiGreedyArc(CheapestArc):
 
 class CheapestInsertion(CheapestArc):
 
+    def __init__(self, seed=None, n_neighbors=None):
+        super().__init__(seed)
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        self.n_neighbors = n_neighbors
+
+    def __reduce__(self):
+        return (type(self), (self.seed, self.n_neighbors))
+
     def calc_insertion(self, new: Node) -> float:
-        node: Node
-        cost = float("inf")
-        for node in self.tour.nodes:
-            cfrom = self.problem.D[node.index, new.index]
-            cnext = self.problem.D[new.index, node.next.index]
-            cbase = self.problem.D[node.index, node.next.index]
-            c = cfrom + cnext - cbase
-            if c < cost:
-                new.prev = node
-                cost = c
-        return cost
+        return self._insert_cost[new.index]
 
     def insert(self, new: Node):
-        node = new.prev
-        new.next = node.next
-        node.next.prev = new
-        node.next = new
+        self._insert_cheapest(new)
+
+    def start(self):
+        Constructive.start(self)
+        self._init_insertions(self.n_neighbors)
+
+    def do(self, problem: Problem):
+        self.problem = problem
+        self.start()
+        while len(self.queue) > 0:
+            costs = self.calc_candidates()
+            choice = np.argmin(costs)
+            nd = self.queue.pop(choice)
+            self.insert(nd)
+        return self.tour.cost
 
 
 class RandomInsertion(CheapestInsertion):
@@ -132,13 +312,154 @@ class RandomInsertion(CheapestInsertion):
 
 class SemiGreedyInsertion(CheapestInsertion, SemiGreedyArc):
 
-    def __init__(self, alpha=(0, 1), seed=None):
-        SemiGreedyArc.__init__(self, alpha, seed)
+    def __init__(self, alpha=(0, 1), seed=None, n_neighbors=None, reactive=False):
+        SemiGreedyArc.__init__(self, alpha, seed, reactive)
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        self.n_neighbors = n_neighbors
+
+    def __reduce__(self):
+        return (type(self), (tuple(self.alpha), self.seed, self.n_neighbors, self.reactive))
 
     def do(self, problem: Problem):
         return SemiGreedyArc.do(self, problem)
 
 
+class SpaceFillingCurve(Constructive):
+
+    def do(self, problem: Problem):
+        assert isinstance(problem, CoordinateProblem), "SpaceFillingCurve requires a CoordinateProblem"
+        self.problem = problem
+
+        # Coordinates are mapped into a random quadrant sized box of the curve grid
+        # under a random reflection, so that each call follows a different curve
+        X = problem.X
+        lower = X.min(axis=0)
+        extent = max(float(np.max(X.max(axis=0) - lower)), 1e-12)
+        side = 1 << HILBERT_ORDER
+        half = side // 2
+        u = self.rng.random()
+        v = self.rng.random()
+        sym = int(self.rng.random() * 8)
+        grid = np.floor((X - lower) / extent * (half - 1)).astype(np.int64)
+        grid[:, 0] += int(u * half)
+        grid[:, 1] += int(v * half)
+        if sym & 1:
+            grid = grid[:, ::-1].copy()
+        if sym & 2:
+            grid[:, 0] = side - 1 - grid[:, 0]
+        if sym & 4:
+            grid[:, 1] = side - 1 - grid[:, 1]
+        keys = hilbert_index(side, grid[:, 0], grid[:, 1])
+        self._build_tour(list(np.argsort(keys, kind="stable")))
+        return self.tour.cost
+
+
+class GreedyEdge(Constructive):
+
+    def __init__(self, alpha=0.1, n_neighbors=10, seed=None):
+        super().__init__(seed)
+        self.alpha = alpha
+        self.n_neighbors = n_neighbors
+
+    def __reduce__(self):
+        return (type(self), (self.alpha, self.n_neighbors, self.seed))
+
+    def edge_cost(self, i: int, j: int) -> float:
+        if self.problem.symmetric:
+            return self.problem.dist(i, j)
+        return 0.5 * (self.problem.dist(i, j) + self.problem.dist(j, i))
+
+    def do(self, problem: Problem):
+        self.problem = problem
+        n = problem.n_nodes
+        size = min(self.n_neighbors + 1, n)
+        nearest = problem.nearest_sorted(size)
+
+        # Candidate edges of the nearest neighbor graph, with costs randomly increased
+        # in proportion to their length.
+        # Edges listed by both of their nodes are rejected the second time as cycles.
+        edges = []
+        for i in range(n):
+            for j in nearest[i]:
+                if j == i:
+                    continue
+                cost = self.edge_cost(i, j)
+                if cost == float("inf"):
+                    continue
+                edges.append((cost + self.alpha * self.rng.random() * problem.dist(i, j), i, j))
+        edges.sort(key=lambda e: e[0])
+
+        # Greedy matching of edges into paths
+        adj = [[] for _ in range(n)]
+        parent = list(range(n))
+        for _, i, j in edges:
+            if len(adj[i]) >= 2 or len(adj[j]) >= 2:
+                continue
+            ri = self._find(parent, i)
+            rj = self._find(parent, j)
+            if ri == rj:
+                continue
+            parent[ri] = rj
+            adj[i].append(j)
+            adj[j].append(i)
+        self._join_fragments(adj, nearest)
+        return self.tour.cost
+
+    @staticmethod
+    def _find(parent: List[int], node: int) -> int:
+        root = node
+        while parent[root] != root:
+            root = parent[root]
+
+        # Path compression
+        while node != root:
+            parent[node], node = root, parent[node]
+        return root
+
+    def _join_fragments(self, adj: List[List[int]], nearest: np.ndarray):
+
+        # Endpoints of paths (and isolated nodes) are the unvisited nodes to be linked
+        endpoints = [i for i in range(self.problem.n_nodes) if len(adj[i]) < 2]
+        unvisited = set(endpoints)
+        start = endpoints[self.rng.choice(len(endpoints))]
+        seq = []
+        while True:
+
+            # Follow the path from one endpoint to the other
+            unvisited.discard(start)
+            prev = None
+            node = start
+            while True:
+                seq.append(node)
+                nxt = [j for j in adj[node] if j != prev]
+                if len(nxt) == 0:
+                    break
+                prev = node
+                node = nxt[0]
+            unvisited.discard(node)
+            if len(unvisited) == 0:
+                break
+
+            # Continue from the nearest endpoint of another path
+            start = next((j for j in nearest[node] if j in unvisited), None)
+            if start is None:
+                start = min(unvisited, key=lambda j: (self.problem.dist(node, j), j))
+        self._build_tour(seq)
+
+
+class Savings(GreedyEdge):
+
+    def edge_cost(self, i: int, j: int) -> float:
+        # Savings of serving i and j in a single route from the hub, as negative costs
+        if i == self._hub or j == self._hub:
+            return float("inf")
+        return self.problem.dist(i, j) - self.problem.dist(self._hub, i) - self.problem.dist(j, self._hub)
+
+    def do(self, problem: Problem):
+        self._hub = int(self.rng.random() * problem.n_nodes)
+        return super().do(problem)
+
+
 class HistoryGreedyArc(CheapestArc):
 
     history: List[List[int]]
@@ -167,3 +488,21 @@ class HistoryGreedyInsertion(CheapestInsertion):
     def insert(self, new: Node):
         super().insert(new)
         self.history.append(self.tour.solution)
+
+
+def hilbert_index(side: int, x: np.ndarray, y: np.ndarray) -> np.ndarray:
+    x = np.array(x, dtype=np.int64)
+    y = np.array(y, dtype=np.int64)
+    d = np.zeros(x.shape, dtype=np.int64)
+    s = side // 2
+    while s > 0:
+        rx = ((x & s) > 0).astype(np.int64)
+        ry = ((y & s) > 0).astype(np.int64)
+        d += s * s * ((3 * rx) ^ ry)
+        flip = (ry == 0) & (rx == 1)
+        x = np.where(flip, side - 1 - x, x)
+        y = np.where(flip, side - 1 - y, y)
+        swap = ry == 0
+        x, y = np.where(swap, y, x), np.where(swap, x, y)
+        s = s // 2
+    return d
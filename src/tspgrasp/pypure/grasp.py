@@ -1,9 +1,12 @@
+from typing import List, Optional, Sequence
+
 import numpy as np
 
 from tspgrasp.base import BaseGrasp
+from tspgrasp.parallel import solve_batch, solve_parallel
 from tspgrasp.pypure.constructive import CheapestArc
 from tspgrasp.pypure.local_search import LocalSearch
-from tspgrasp.pypure.problem import Problem
+from tspgrasp.pypure.problem import as_problem, problem_type
 from tspgrasp.solution import Solution
 
 
@@ -13,9 +16,12 @@ MAX_ITER = 10000
 
 class GrasPy(BaseGrasp):
 
-    def __init__(self, constructive=None, local_search=None, seed=None):
+    def __init__(self, constructive=None, local_search=None, seed=None, n_jobs=1, backend="processes"):
         self.seed = seed
+        self.n_jobs = n_jobs
+        self.backend = backend
         self.costs = []
+        self._problem = None
         if constructive is None:
             constructive = CheapestArc(seed=seed)
         if local_search is None:
@@ -30,18 +36,66 @@ class GrasPy(BaseGrasp):
         max_moves: int = MAX_MOVES,
         time_limit: float = float("inf"),
         target: float = -float("inf"),
-        verbose: bool = False
+        verbose: bool = False,
+        stats: bool = False,
+        initial_tour: Optional[Sequence[int]] = None,
+        perturbation: float = 0.0,
+        elite_size: int = 0,
+        cache_size: int = 0
     ) -> Solution:
         # Initialize problem
-        n_nodes = D.shape[0]
-        assert D.shape[0] == D.shape[1], "D must be a squared matrix"
-        problem = Problem(n_nodes, D)
+        problem = self._get_problem(D, as_problem, problem_type)
+        if self.n_jobs != 1:
+            return solve_parallel(
+                self,
+                problem,
+                problem_type,
+                self.n_jobs,
+                max_iter=max_iter,
+                max_moves=max_moves,
+                time_limit=time_limit,
+                target=target,
+                verbose=verbose,
+                backend=self.backend,
+                stats=stats,
+                initial_tour=initial_tour,
+                perturbation=perturbation,
+                elite_size=elite_size,
+                cache_size=cache_size
+            )
         sol = self.solve(
             problem,
             max_iter=max_iter,
             max_moves=max_moves,
             time_limit=time_limit,
             target=target,
-            verbose=verbose
+            verbose=verbose,
+            stats=stats,
+            initial_tour=initial_tour,
+            perturbation=perturbation,
+            elite_size=elite_size,
+            cache_size=cache_size
         )
         return sol
+
+    def solve_many(
+        self,
+        matrices: Sequence[np.ndarray],
+        max_iter: int = MAX_ITER,
+        max_moves: int = MAX_MOVES,
+        time_limit: float = float("inf"),
+        target: float = -float("inf"),
+        stats: bool = False
+    ) -> List[Solution]:
+        return solve_batch(
+            self,
+            matrices,
+            as_problem,
+            self.n_jobs,
+            max_iter=max_iter,
+            max_moves=max_moves,
+            time_limit=time_limit,
+            target=target,
+            backend=self.backend,
+            stats=stats
+        )
@@ -0,0 +1,145 @@
+from typing import List
+
+import numpy as np
+
+from tspgrasp.pypure.node import Node
+from tspgrasp.pypure.tour import Tour
+from tspgrasp.pypure.local_search import LocalSearch
+
+
+class LinKernighan(LocalSearch):
+
+    _nodes: List[Node]
+
+    def __init__(
+        self, seed=None, n_neighbors=None, dont_look_bits=False, max_segment=2, reverse_segments=True,
+        max_depth=5, breadth=5
+    ):
+        super().__init__(seed, n_neighbors, dont_look_bits, max_segment, reverse_segments)
+        assert max_depth >= 1, "max_depth must be a positive integer"
+        assert breadth >= 1, "breadth must be a positive integer"
+        self.max_depth = max_depth
+        self.breadth = breadth
+        self._nodes = []
+
+    def __reduce__(self):
+        return (
+            type(self),
+            (
+                self.seed, self.n_neighbors, self.dont_look_bits, self.max_segment, self.reverse_segments,
+                self.max_depth, self.breadth
+            )
+        )
+
+    def _prepare_search(self, tour: Tour):
+        super()._prepare_search(tour)
+        self._nodes = sorted(self.tour._linked_nodes, key=lambda x: x.index)
+
+    def _improve_node(self, u: Node) -> bool:
+        # Sequential exchanges rely on reversals, hence on symmetric distances
+        if not self._symmetric:
+            return False
+        if self._lk_move(u, True):
+            return True
+        return self._lk_move(u, False)
+
+    def _neighbors(self, node: Node) -> List[Node]:
+        return [self._nodes[i] for i in self._nb_idx[self._nb_ptr[node.index]:self._nb_ptr[node.index + 1]]]
+
+    def _lk_move(self, t1: Node, forward: bool) -> bool:
+        dist = self._problem.dist
+
+        # Candidates for the first exchange, breaking arc (t1, e) and adding (e, c)
+        e = self._next(t1, forward)
+        candidates = []
+        for c in self._neighbors(e):
+            if c is e or c is t1 or c is self._next(e, forward):
+                continue
+            if dist(t1.index, e.index) - dist(e.index, c.index) <= 0:
+                continue
+            f = self._prev(c, forward)
+            candidates.append((dist(f.index, c.index) - dist(e.index, c.index), c))
+
+        # Try the most promising first exchanges, each followed by a greedy chain
+        candidates.sort(key=lambda x: -x[0])
+        for _, c in candidates[:self.breadth]:
+
+            # First exchange
+            chain = []
+            e = self._next(t1, forward)
+            f = self._prev(c, forward)
+            gain = dist(t1.index, e.index) - dist(e.index, c.index) + dist(f.index, c.index)
+            self._reverse(e, f, forward)
+            chain.append((e, f, c))
+            best_gain = self._problem.tolerance
+            best_level = 0
+            closed = gain - dist(t1.index, f.index)
+            if closed > best_gain:
+                best_gain = closed
+                best_level = len(chain)
+
+            # Deeper exchanges, always breaking the arc that closes the tour at t1
+            while len(chain) < self.max_depth:
+                e = self._next(t1, forward)
+                c = None
+                best_value = -np.inf
+                for i in self._neighbors(e):
+                    if i is e or i is t1 or i is self._next(e, forward):
+                        continue
+                    if gain - dist(e.index, i.index) <= 0:
+                        continue
+                    value = dist(self._prev(i, forward).index, i.index) - dist(e.index, i.index)
+                    if value > best_value:
+                        best_value = value
+                        c = i
+                if c is None:
+                    break
+                f = self._prev(c, forward)
+                gain = gain - dist(e.index, c.index) + dist(f.index, c.index)
+                self._reverse(e, f, forward)
+                chain.append((e, f, c))
+                closed = gain - dist(t1.index, f.index)
+                if closed > best_gain:
+                    best_gain = closed
+                    best_level = len(chain)
+
+            # Keep the best prefix of the chain
+            for e, f, _ in reversed(chain[best_level:]):
+                self._reverse(f, e, forward)
+            if best_level > 0:
+                self._activate(t1)
+                for e, f, c in chain[:best_level]:
+                    self._activate(e)
+                    self._activate(f)
+                    self._activate(c)
+                self._outdated = True
+                self.n_moves = self.n_moves + 1
+                return True
+
+        return False
+
+    def _next(self, node: Node, forward: bool) -> Node:
+        return node.next if forward else node.prev
+
+    def _prev(self, node: Node, forward: bool) -> Node:
+        return node.prev if forward else node.next
+
+    def _reverse(self, a: Node, b: Node, forward: bool):
+
+        # Path a -> b in the given orientation is path b -> a in the opposite one
+        if not forward:
+            a, b = b, a
+        p = a.prev
+        n = b.next
+        node = a
+        while True:
+            temp = node.next
+            node.next = node.prev
+            node.prev = temp
+            if node is b:
+                break
+            node = temp
+        p.next = b
+        b.prev = p
+        a.next = n
+        n.prev = a
@@ -1,42 +1,96 @@
-import math
+from collections import deque
+import time
 from typing import List
 
 import numpy as np
 
 from tspgrasp.pypure.node import Node
-from tspgrasp.pypure.problem import Problem
+from tspgrasp.pypure.problem import Problem, as_problem
 from tspgrasp.solution import Solution
 from tspgrasp.pypure.tour import Tour
 
 
+# Number of node evaluations between checks of the clock
+CLOCK_INTERVAL = 256
+
+# Number of pairwise move types (move_1 to move_8)
+N_MOVE_TYPES = 8
+
+
 class LocalSearch:
 
+    n_neighbors: int
+    _problem: Problem
     _correlated_nodes: list
-
-    def __init__(self, seed=None):
+    _symmetric: bool
+    _outdated: bool
+
+    def __init__(
+        self, seed=None, n_neighbors=None, dont_look_bits=False, max_segment=2, reverse_segments=True
+    ):
+        assert n_neighbors is None or n_neighbors >= 1, "n_neighbors must be a positive integer"
+        assert max_segment >= 2, "max_segment must be at least 2"
         self.n_moves = 0
+        self.timed_out = False
+        self.collect_stats = False
+        self.move_evals = [0] * N_MOVE_TYPES
+        self.move_accepts = [0] * N_MOVE_TYPES
+        self.n_passes = 0
+        self.n_cost_updates = 0
+        self.corr_nodes_time = 0.0
+        self.seed = seed
+        self.n_neighbors = n_neighbors
+        self.dont_look_bits = dont_look_bits
+        self.max_segment = max_segment
+        self.reverse_segments = reverse_segments
+        self._queue = deque()
+        self._active = []
         self._rng = np.random.default_rng(seed)
-        self._D = np.empty((0, 0), dtype=np.double)
+        self._problem = None
         self._correlated_nodes = []
+        self._nb_ptr = np.zeros(1, dtype=np.intc)
+        self._nb_idx = np.zeros(0, dtype=np.intc)
+        self._symmetric = False
+        self._outdated = True
+        self._deadline = float("inf")
+        self._n_evals = 0
+
+    def __reduce__(self):
+        return (
+            type(self),
+            (self.seed, self.n_neighbors, self.dont_look_bits, self.max_segment, self.reverse_segments)
+        )
+
+    def set_seed(self, seed):
+        self.seed = seed
+        self._rng = np.random.default_rng(seed)
 
-    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000):
-        assert D.shape[0] == D.shape[1], "D must be a squared matrix"
-        assert D.shape[0] == len(seq), "D must be the same length as seq"
-        problem = Problem(len(seq), D)
+    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000, time_limit=float("inf")):
+        problem = as_problem(D)
+        assert problem.n_nodes == len(seq), "D must be the same length as seq"
         self.set_problem(problem)
         tour = Tour.new(seq)
-        self.do(tour, max_iter=max_iter)
+        self.do(tour, max_iter=max_iter, time_limit=time_limit)
         sol = Solution(self.tour)
         return sol
 
-    def do(self, tour: Tour, max_iter: int = 100000):
+    def do(self, tour: Tour, max_iter: int = 100000, time_limit: float = float("inf")):
         self._prepare_search(tour)
-        nodes = sorted(self.tour.nodes, key=lambda x: x.index)
+        # The search stops with the current tour once time_limit (s) is exhausted
+        self.timed_out = False
+        self._n_evals = 0
+        self._deadline = time.monotonic() + time_limit
+        nodes = sorted(self.tour._linked_nodes, key=lambda x: x.index)
         customers = [n.index for n in nodes if not n.is_depot]
+        if self.dont_look_bits:
+            self._search_queue(nodes, customers, max_iter)
+            self.update_costs()
+            return
         n_iter = 0
         proceed = True
-        while proceed and n_iter < max_iter:
+        while proceed and n_iter < max_iter and not self.timed_out:
             n_iter = n_iter + 1
+            self.n_passes = n_iter
             proceed = False or n_iter <= 1
             self._rng.shuffle(customers)
             for u_index in customers:
@@ -44,43 +98,128 @@ class LocalSearch:
                 correlated_nodes = self._correlated_nodes[u.index]
                 self._rng.shuffle(correlated_nodes)
                 for v_index in correlated_nodes:
+                    if self._expired():
+                        break
                     v = nodes[v_index]
                     if self.moves(u, v):
                         proceed = True
                         continue
+                if self._expired():
+                    break
+                if self._improve_node(u):
+                    proceed = True
             if not proceed:
                 break
+        self.update_costs()
+
+    def _search_queue(self, nodes: List[Node], customers: List[int], max_iter: int):
+
+        # Every customer starts active in random order
+        self._rng.shuffle(customers)
+        self._queue = deque(customers)
+        self._active = [False] * len(nodes)
+        for u_index in customers:
+            self._active[u_index] = True
+
+        # Each pass over as many nodes as customers counts as one iteration
+        n_pops = 0
+        max_pops = max_iter * len(customers)
+        while self._queue and n_pops < max_pops:
+            u_index = self._queue.popleft()
+            self._active[u_index] = False
+            n_pops = n_pops + 1
+            self.n_passes = -(-n_pops // len(customers))
+            u = nodes[u_index]
+            correlated_nodes = self._correlated_nodes[u.index]
+            self._rng.shuffle(correlated_nodes)
+            for v_index in correlated_nodes:
+                if self._expired():
+                    return
+                v = nodes[v_index]
+                self.moves(u, v)
+            if self._expired():
+                return
+            self._improve_node(u)
+
+    def _expired(self) -> bool:
+        # Polls the clock only every CLOCK_INTERVAL evaluations
+        if self.timed_out:
+            return True
+        self._n_evals = self._n_evals + 1
+        if self._n_evals < CLOCK_INTERVAL:
+            return False
+        self._n_evals = 0
+        if time.monotonic() >= self._deadline:
+            self.timed_out = True
+        return self.timed_out
+
+    def _improve_node(self, u: Node) -> bool:
+        # Node based moves of subclasses, applied after pairwise moves of u
+        return False
+
+    def _activate(self, node: Node):
+        # Queue endpoints of modified arcs again (only used with don't look bits)
+        if self.dont_look_bits and not node.is_depot and not self._active[node.index]:
+            self._active[node.index] = True
+            self._queue.append(node.index)
 
     def set_problem(self, problem: Problem):
-        self._D = problem.D
+        self._problem = problem
+        self._symmetric = problem.symmetric
+        self._nb_ptr, self._nb_idx = problem.neighbors(self.n_neighbors)
 
     def _prepare_search(self, tour: Tour):
         self.n_moves = 0
+        self.move_evals = [0] * N_MOVE_TYPES
+        self.move_accepts = [0] * N_MOVE_TYPES
+        self.n_passes = 0
+        self.n_cost_updates = 0
         self.tour = tour
+        self._outdated = True
+        start = time.monotonic()
         self._initialize_corr_nodes()
+        self.corr_nodes_time = time.monotonic() - start
+
+    def update_costs(self):
+        if self._outdated:
+            self.n_cost_updates = self.n_cost_updates + 1
+            self.tour.calc_costs(self._problem)
+            self._outdated = False
+
+    def _counted(self, k: int, accepted: bool) -> bool:
+        # Evaluations and acceptances per move type, only counted on demand
+        if self.collect_stats:
+            self.move_evals[k] = self.move_evals[k] + 1
+            if accepted:
+                self.move_accepts[k] = self.move_accepts[k] + 1
+        return accepted
 
     def moves(self, u: Node, v: Node) -> bool:
-        if self.move_1(u, v):
+        if self._counted(0, self.move_1(u, v)):
+            return True
+        elif self._counted(1, self.move_2(u, v)):
             return True
-        elif self.move_2(u, v):
+        elif self._counted(2, self.move_3(u, v)):
             return True
-        elif self.move_3(u, v):
+        elif self._counted(3, self.move_4(u, v)):
             return True
-        elif self.move_4(u, v):
+        elif self._counted(4, self.move_5(u, v)):
             return True
-        elif self.move_5(u, v):
+        elif self._counted(5, self.move_6(u, v)):
             return True
-        elif self.move_6(u, v):
+        elif self._counted(6, self.move_7(u, v)):
             return True
-        elif self.move_7(u, v):
+        elif self._counted(7, self.move_8(u, v)):
             return True
         elif v.prev.is_depot:
             v = v.prev
-            if self.move_1(u, v):
+            if self._counted(0, self.move_1(u, v)):
                 return True
-            elif self.move_2(u, v):
+            elif self._counted(1, self.move_2(u, v)):
                 return True
-            elif self.move_3(u, v):
+            elif self._counted(2, self.move_3(u, v)):
+                return True
+            elif self._counted(7, self.move_8(u, v)):
                 return True
             else:
                 return False
@@ -99,10 +238,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.index] - self._D[u.prev.index, u.index] \
-                - self._D[u.index, x.index]
-            cs_v = self._D[v.index, u.index] + self._D[u.index, y.index] \
-                - self._D[v.index, y.index]
+            cs_u = self._problem.dist(u.prev.index, x.index) - self._problem.dist(u.prev.index, u.index) \
+                - self._problem.dist(u.index, x.index)
+            cs_v = self._problem.dist(v.index, u.index) + self._problem.dist(u.index, y.index) \
+                - self._problem.dist(v.index, y.index)
             cost = cs_u + cs_v
 
             # Update
@@ -110,7 +249,7 @@ class LocalSearch:
                 return False
             else:
                 self.insert_node(u, v)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
@@ -126,10 +265,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.next.index] - self._D[u.prev.index, u.index] \
-                - self._D[x.index, x.next.index]
-            cs_v = self._D[v.index, u.index] + self._D[x.index, y.index] \
-                - self._D[v.index, y.index]
+            cs_u = self._problem.dist(u.prev.index, x.next.index) - self._problem.dist(u.prev.index, u.index) \
+                - self._problem.dist(x.index, x.next.index)
+            cs_v = self._problem.dist(v.index, u.index) + self._problem.dist(x.index, y.index) \
+                - self._problem.dist(v.index, y.index)
             cost = cs_u + cs_v
 
             # Update
@@ -138,7 +277,7 @@ class LocalSearch:
             else:
                 self.insert_node(u, v)
                 self.insert_node(x, u)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
@@ -154,10 +293,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, x.next.index] - self._D[u.prev.index, u.index] \
-                - self._D[u.index, x.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.index, x.index] + self._D[x.index, u.index] \
-                + self._D[u.index, y.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(u.prev.index, x.next.index) - self._problem.dist(u.prev.index, u.index) \
+                - self._problem.dist(u.index, x.index) - self._problem.dist(x.index, x.next.index)
+            cs_v = self._problem.dist(v.index, x.index) + self._problem.dist(x.index, u.index) \
+                + self._problem.dist(u.index, y.index) - self._problem.dist(v.index, y.index)
             cost = cs_u + cs_v
 
             # Update
@@ -166,7 +305,7 @@ class LocalSearch:
             else:
                 self.insert_node(x, v)
                 self.insert_node(u, x)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
@@ -182,10 +321,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[v.index, x.index] \
-                - self._D[u.prev.index, u.index] - self._D[u.index, x.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[u.index, y.index] \
-                - self._D[v.prev.index, v.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(u.prev.index, v.index) + self._problem.dist(v.index, x.index) \
+                - self._problem.dist(u.prev.index, u.index) - self._problem.dist(u.index, x.index)
+            cs_v = self._problem.dist(v.prev.index, u.index) + self._problem.dist(u.index, y.index) \
+                - self._problem.dist(v.prev.index, v.index) - self._problem.dist(v.index, y.index)
             cost = cs_u + cs_v
 
             # Update
@@ -193,7 +332,7 @@ class LocalSearch:
                 return False
             else:
                 self.swap_node(u, v)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
 
         return True
@@ -211,10 +350,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[v.index, x.next.index] \
-                - self._D[u.prev.index, u.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[x.index, y.index] \
-                - self._D[v.prev.index, v.index] - self._D[v.index, y.index]
+            cs_u = self._problem.dist(u.prev.index, v.index) + self._problem.dist(v.index, x.next.index) \
+                - self._problem.dist(u.prev.index, u.index) - self._problem.dist(x.index, x.next.index)
+            cs_v = self._problem.dist(v.prev.index, u.index) + self._problem.dist(x.index, y.index) \
+                - self._problem.dist(v.prev.index, v.index) - self._problem.dist(v.index, y.index)
             cost = cs_u + cs_v
 
             # Update
@@ -223,7 +362,7 @@ class LocalSearch:
             else:
                 self.swap_node(u, v)
                 self.insert_node(x, u)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
@@ -240,10 +379,10 @@ class LocalSearch:
 
         # Else compute costs
         else:
-            cs_u = self._D[u.prev.index, v.index] + self._D[y.index, x.next.index] \
-                - self._D[u.prev.index, u.index] - self._D[x.index, x.next.index]
-            cs_v = self._D[v.prev.index, u.index] + self._D[x.index, y.next.index] \
-                - self._D[v.prev.index, v.index] - self._D[y.index, y.next.index]
+            cs_u = self._problem.dist(u.prev.index, v.index) + self._problem.dist(y.index, x.next.index) \
+                - self._problem.dist(u.prev.index, u.index) - self._problem.dist(x.index, x.next.index)
+            cs_v = self._problem.dist(v.prev.index, u.index) + self._problem.dist(x.index, y.next.index) \
+                - self._problem.dist(v.prev.index, v.index) - self._problem.dist(y.index, y.next.index)
             cost = cs_u + cs_v
 
             # Update
@@ -252,7 +391,7 @@ class LocalSearch:
             else:
                 self.swap_node(u, v)
                 self.swap_node(x, y)
-                self.tour.calc_costs(self._D)
+                self._outdated = True
                 self.n_moves = self.n_moves + 1
         return True
 
@@ -266,11 +405,13 @@ class LocalSearch:
         if (u.index == y.index) or (v.prev.is_depot) or (u.next.index == v.index):
             return False
 
-        # Else compute costs
+        # Else compute costs (reverse costs are only required for asymmetric problems)
         else:
-            cost = self._D[u.index, v.index] + self._D[x.index, y.index] \
-                - self._D[u.index, x.index] - self._D[v.index, y.index] \
-                    + v.cum_rdist - x.cum_rdist
+            cost = self._problem.dist(u.index, v.index) + self._problem.dist(x.index, y.index) \
+                - self._problem.dist(u.index, x.index) - self._problem.dist(v.index, y.index)
+            if not self._symmetric:
+                self.update_costs()
+                cost = cost + self.reverse_cost(x, v)
 
         # If poor move stop
         if self.eval_move(cost):
@@ -293,18 +434,129 @@ class LocalSearch:
         v.prev = u
         u.next = v
         y.prev = x
+        self._activate(u)
+        self._activate(x)
+        self._activate(v)
+        self._activate(y)
 
         # Update
-        self.tour.calc_costs(self._D)
+        self._outdated = True
         self.n_moves = self.n_moves + 1
 
         return True
 
+    def move_8(self, u: Node, v: Node) -> bool:
+
+        # Segments of up to two nodes are covered by moves 1 to 3
+        if self.max_segment <= 2:
+            return False
+
+        # Set neighbors of u and v
+        p = u.prev
+        y = v.next
+
+        # Stop if v precedes u
+        if v.index == p.index:
+            return False
+
+        # Extend segment u -> e one node at a time, accumulating its reversal cost
+        e = u
+        rdist = 0.0
+        for length in range(2, self.max_segment + 1):
+            n = e.next
+            if n.is_depot or n.index == v.index:
+                return False
+            if not self._symmetric:
+                rdist = rdist + self._problem.dist(n.index, e.index) - self._problem.dist(e.index, n.index)
+            e = n
+            if length < 3:
+                continue
+
+            # Costs of removing the segment and inserting it after v
+            n = e.next
+            cs_u = self._problem.dist(p.index, n.index) - self._problem.dist(p.index, u.index) \
+                - self._problem.dist(e.index, n.index)
+            cs_v = self._problem.dist(v.index, u.index) + self._problem.dist(e.index, y.index) \
+                - self._problem.dist(v.index, y.index)
+            cost = cs_u + cs_v
+            if not self.eval_move(cost):
+                self.move_segment(u, e, v, False)
+                return True
+
+            # Reversed insertion
+            if self.reverse_segments:
+                cs_rev = self._problem.dist(v.index, e.index) + self._problem.dist(u.index, y.index) \
+                    - self._problem.dist(v.index, y.index)
+                cost = cs_u + cs_rev + rdist
+                if not self.eval_move(cost):
+                    self.move_segment(u, e, v, True)
+                    return True
+
+        return False
+
+    def move_segment(self, u: Node, e: Node, v: Node, reverse: bool):
+
+        # Set neighbors
+        p = u.prev
+        n = e.next
+        y = v.next
+        for node in (u, e, p, n, v, y):
+            self._activate(node)
+
+        # Remove segment
+        p.next = n
+        n.prev = p
+
+        # Insert after v
+        if reverse:
+            node = u
+            while True:
+                temp = node.next
+                node.next = node.prev
+                node.prev = temp
+                if node is e:
+                    break
+                node = temp
+            v.next = e
+            e.prev = v
+            u.next = y
+            y.prev = u
+        else:
+            v.next = u
+            u.prev = v
+            e.next = y
+            y.prev = e
+
+        # Update
+        self._outdated = True
+        self.n_moves = self.n_moves + 1
+
+    def reverse_cost(self, x: Node, v: Node) -> float:
+
+        # Segment starting at the depot
+        if x.is_depot:
+            return v.cum_rdist
+
+        # Segment that does not cross the depot
+        elif x.position <= v.position:
+            return v.cum_rdist - x.cum_rdist
+
+        # Segment wrapping around the depot
+        else:
+            return v.cum_rdist - x.cum_rdist + self.tour.depot.cum_rdist
+
     def eval_move(self, cost: float):
-        return cost > -0.0001
+        return cost > -self._problem.tolerance
 
     def insert_node(self, u: Node, v: Node):
 
+        # Endpoints of removed arcs
+        self._activate(u)
+        self._activate(u.prev)
+        self._activate(u.next)
+        self._activate(v)
+        self._activate(v.next)
+
         # Remove u from existing
         u.prev.next = u.next
         u.next.prev = u.prev
@@ -322,6 +574,12 @@ class LocalSearch:
         u_succeeding = u.next
         v_preceding = v.prev
         v_succeeding = v.next
+        self._activate(u)
+        self._activate(u_preceding)
+        self._activate(u_succeeding)
+        self._activate(v)
+        self._activate(v_preceding)
+        self._activate(v_succeeding)
 
         # Swap on neighbors
         u_preceding.next = v
@@ -336,26 +594,22 @@ class LocalSearch:
         v.next = u_succeeding
 
     def _initialize_corr_nodes(self):
-        n_nodes = self._D.shape[0]
-        mid_size = math.ceil(self._D.shape[0] / 2)
-        corr_nodes = np.argpartition(self._D, mid_size, axis=1)[:, :mid_size].tolist()
-        corr_sets = [set() for _ in range(n_nodes)]
-        customers = [n.index for n in self.tour.nodes if not n.is_depot]
-        for i in customers:
-            for j in corr_nodes[i]:
-                if (j != self.tour.depot.index) and (i != j):
-                    corr_sets[i].add(j)
-                    corr_sets[j].add(i)
-        self._correlated_nodes = [list(corr_sets[i]) for i in range(n_nodes)]
+        depot = self.tour.depot.index
+        self._correlated_nodes = [[] for _ in range(len(self._nb_ptr) - 1)]
+        for i in range(len(self._nb_ptr) - 1):
+            if i != depot:
+                self._correlated_nodes[i] = [
+                    j for j in self._nb_idx[self._nb_ptr[i]:self._nb_ptr[i + 1]].tolist() if j != depot
+                ]
 
 
 class HistoryLS(LocalSearch):
 
     history: List[List[int]]
 
-    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000):
+    def __call__(self, seq: List[int], D: np.ndarray, max_iter=100000, time_limit=float("inf")):
         self.history = []
-        return super().__call__(seq, D, max_iter)
+        return super().__call__(seq, D, max_iter, time_limit)
 
     def moves(self, u: Node, v: Node) -> bool:
         if super().moves(u, v):
@@ -6,6 +6,7 @@ class Node:
     is_depot: bool
     cum_dist: float
     cum_rdist: float
+    position: int
 
     def __init__(
         self,
@@ -16,9 +17,11 @@ class Node:
         self.is_depot = is_depot
         self.cum_dist = 0.0
         self.cum_rdist = 0.0
+        self.position = 0
         self.next = None
         self.prev = None
 
     def reset_dimensions(self):
         self.cum_dist = 0.0
         self.cum_rdist = 0.0
+        self.position = 0
@@ -1,11 +1,383 @@
+import heapq
+import math
+import mmap
+
 import numpy as np
 
 
+# Metrics available for coordinates, named as in TSPLIB
+METRICS = ("euclidean", "euc_2d", "ceil_2d", "geo", "att")
+
+# Number of distances evaluated at once when searching for nearest nodes
+BLOCK_SIZE = 4194304
+
+# Nearest nodes of planar coordinates are searched on a grid when at most this fraction of nodes
+GRID_FRACTION = 0.125
+
+# Average number of nodes per cell of the grid
+GRID_OCCUPANCY = 2
+
+# Smallest cost reduction of an improving move
+TOLERANCE = 0.0001
+
+# Constants of TSPLIB geographical distances
+PI = 3.141592
+RRR = 6378.388
+
+
 class Problem:
 
     n_nodes: int
     D: np.ndarray
+    symmetric: bool
+    tolerance: float = TOLERANCE
+
+    def __init__(self, n_nodes: int, D: np.ndarray, copy: bool = True) -> None:
+        self._set_matrix(n_nodes, D, np.double, copy)
+
+    def _set_matrix(self, n_nodes: int, D: np.ndarray, dtype: type, copy: bool):
+        self.n_nodes = n_nodes
+        if copy:
+            self.D = np.array(D, dtype=dtype)
+        else:
+            self.D = np.asanyarray(D, dtype=dtype)
+        assert self.D.ndim == 2, "D must be a 2-dimensional matrix"
+        self.symmetric = np.array_equal(self.D, np.transpose(self.D))
+        self._neighbors = {}
+        self._nearest = {}
+
+    def __reduce__(self):
+        # Memory-mapped matrices are reopened from their file instead of copied
+        if is_file_backed(self.D):
+            return (from_memmap, (type(self), self.n_nodes) + memmap_args(self.D))
+        return super().__reduce__()
+
+    def dist(self, i: int, j: int) -> float:
+        return self.D[i, j]
+
+    def nearest(self, size: int) -> np.ndarray:
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+        kth = min(size, self.n_nodes - 1)
+        return np.argpartition(self.D, kth, axis=1)[:, :size]
+
+    def nearest_sorted(self, size: int) -> np.ndarray:
+        """Indexes of the `size` nearest nodes of each node sorted by distance and then by index,
+        computed once per value of `size`"""
+        if size not in self._nearest:
+            rows = np.sort(self.nearest(size), axis=1)
+            dist = np.array([[self.dist(i, j) for j in row] for i, row in enumerate(rows)])
+            order = np.argsort(dist.reshape(rows.shape), axis=1, kind="stable")
+            self._nearest[size] = np.take_along_axis(rows, order, axis=1)
+        return self._nearest[size]
+
+    def neighbors(self, n_neighbors: int = None):
+        """Symmetric neighborhood of each node in compressed sparse row format.
+
+        Parameters
+        ----------
+        n_neighbors : int, optional
+            Number of nearest nodes of each node, by default None, which uses half of the nodes
+
+        Returns
+        -------
+        Tuple[np.ndarray, np.ndarray]
+            Row pointers and sorted neighbor indexes, computed once per value of `n_neighbors`
+        """
+        if n_neighbors not in self._neighbors:
+            if n_neighbors is None:
+                # Half of the nodes rounded down, as in the original neighborhood of local search
+                size = self.n_nodes // 2
+            else:
+                size = min(n_neighbors + 1, self.n_nodes)
+            self._neighbors[n_neighbors] = symmetric_neighbors(self.nearest(size))
+        return self._neighbors[n_neighbors]
+
+
+class CoordinateProblem(Problem):
+
+    X: np.ndarray
+    metric: str
+
+    def __init__(self, X: np.ndarray, metric: str = "euclidean") -> None:
+        metric = metric.lower()
+        assert metric in METRICS, f"metric must be one of {list(METRICS)}"
+        X = np.array(X, dtype=np.double)
+        assert X.ndim == 2 and X.shape[1] == 2, "X must be a (n, 2) array of coordinates"
+        self.n_nodes = X.shape[0]
+        self.D = np.empty((0, 0), dtype=np.double)
+        self.symmetric = True
+        self._neighbors = {}
+        self._nearest = {}
+        self.X = X
+        self.metric = metric
+        if metric == "geo":
+            self._coords = geo_coordinates(X)
+        else:
+            self._coords = X
+
+        # TSPLIB metrics other than the Euclidean are rounded to integers
+        if metric != "euclidean":
+            self.tolerance = 0.5
+
+    def dist(self, i: int, j: int) -> float:
+
+        # Latitude and longitude (radians) distance on the idealized sphere
+        if self.metric == "geo":
+            if i == j:
+                return 0.0
+            q1 = math.cos(self._coords[i, 1] - self._coords[j, 1])
+            q2 = math.cos(self._coords[i, 0] - self._coords[j, 0])
+            q3 = math.cos(self._coords[i, 0] + self._coords[j, 0])
+            return float(int(RRR * math.acos(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3)) + 1.0))
+
+        dx = self._coords[i, 0] - self._coords[j, 0]
+        dy = self._coords[i, 1] - self._coords[j, 1]
+        if self.metric == "euclidean":
+            return math.sqrt(dx * dx + dy * dy)
+        elif self.metric == "euc_2d":
+            return float(int(math.sqrt(dx * dx + dy * dy) + 0.5))
+        elif self.metric == "ceil_2d":
+            return float(math.ceil(math.sqrt(dx * dx + dy * dy)))
+        else:
+            r = math.sqrt((dx * dx + dy * dy) / 10.0)
+            t = int(r + 0.5)
+            return float(t + 1 if t < r else t)
+
+    def distances(self, i: int, cols: np.ndarray) -> np.ndarray:
+        """Distances from node `i` to each node in `cols`"""
+
+        # Latitude and longitude (radians) distance on the idealized sphere
+        if self.metric == "geo":
+            q1 = np.cos(self._coords[i, 1] - self._coords[cols, 1])
+            q2 = np.cos(self._coords[i, 0] - self._coords[cols, 0])
+            q3 = np.cos(self._coords[i, 0] + self._coords[cols, 0])
+            d = np.trunc(RRR * np.arccos(np.clip(0.5 * ((1.0 + q1) * q2 - (1.0 - q1) * q3), -1.0, 1.0)) + 1.0)
+            return np.where(cols == i, 0.0, d)
+
+        sq = np.sum((self._coords[cols] - self._coords[i]) ** 2, axis=1)
+        if self.metric == "euclidean":
+            return np.sqrt(sq)
+        elif self.metric == "euc_2d":
+            return np.trunc(np.sqrt(sq) + 0.5)
+        elif self.metric == "ceil_2d":
+            return np.ceil(np.sqrt(sq))
+        else:
+            r = np.sqrt(sq / 10.0)
+            t = np.trunc(r + 0.5)
+            return np.where(t < r, t + 1.0, t)
+
+    def nearest(self, size: int) -> np.ndarray:
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+
+        # Planar metrics do not decrease with the Euclidean distance, so a grid finds the same nodes
+        if self.metric != "geo" and size <= GRID_FRACTION * self.n_nodes:
+            return grid_nearest(self._coords, size)
+
+        # Distances are evaluated for blocks of rows to keep memory bounded
+        kth = min(size, self.n_nodes - 1)
+        chunk = max(1, BLOCK_SIZE // self.n_nodes)
+        cols = np.arange(self.n_nodes)
+        out = np.empty((self.n_nodes, size), dtype=np.intp)
+        for start in range(0, self.n_nodes, chunk):
+            stop = min(start + chunk, self.n_nodes)
+            rows = np.array([self.distances(i, cols) for i in range(start, stop)])
+            out[start:stop] = np.argpartition(rows, kth, axis=1)[:, :size]
+        return out
+
+
+class Float32Problem(Problem):
+
+    def __init__(self, n_nodes: int, D: np.ndarray, copy: bool = True) -> None:
+        self._set_matrix(n_nodes, D, np.float32, copy)
+
+    def dist(self, i: int, j: int) -> float:
+        return float(self.D[i, j])
 
-    def __init__(self, n_nodes: int, D: np.ndarray) -> None:
+
+class Int32Problem(Problem):
+
+    # Integer costs only improve by whole units
+    tolerance = 0.5
+
+    def __init__(self, n_nodes: int, D: np.ndarray, copy: bool = True) -> None:
+        assert fits_int32(D), "D must have integer distances within the int32 range"
+        self._set_matrix(n_nodes, D, np.intc, copy)
+
+    def dist(self, i: int, j: int) -> float:
+        return int(self.D[i, j])
+
+
+class CondensedProblem(Problem):
+
+    def __init__(self, n_nodes: int, D: np.ndarray, copy: bool = True) -> None:
         self.n_nodes = n_nodes
-        self.D = D
+        self.D = np.array(D, dtype=np.double) if copy else np.asanyarray(D, dtype=np.double)
+        assert self.D.shape == (n_nodes * (n_nodes - 1) // 2,), \
+            "D must be the condensed upper triangle of a symmetric matrix, as returned by pdist"
+        self.symmetric = True
+        self._neighbors = {}
+        self._nearest = {}
+
+    def dist(self, i: int, j: int) -> float:
+        # Upper triangle of the matrix stored row by row
+        if i == j:
+            return 0.0
+        elif i > j:
+            i, j = j, i
+        return self.D[i * (2 * self.n_nodes - i - 1) // 2 + j - i - 1]
+
+    def nearest(self, size: int) -> np.ndarray:
+        """Indexes of the `size` nearest nodes of each node (unordered and including itself)"""
+
+        # Rows are expanded from the condensed vector in blocks to keep memory bounded
+        n = self.n_nodes
+        kth = min(size, n - 1)
+        chunk = max(1, BLOCK_SIZE // n)
+        cols = np.arange(n, dtype=np.int64)
+        out = np.empty((n, size), dtype=np.intp)
+        for start in range(0, n, chunk):
+            stop = min(start + chunk, n)
+            rows = np.arange(start, stop, dtype=np.int64)[:, None]
+            a = np.minimum(rows, cols)
+            b = np.maximum(rows, cols)
+            index = a * (2 * n - a - 1) // 2 + b - a - 1
+            block = np.where(a == b, 0.0, self.D[np.maximum(index, 0)])
+            out[start:stop] = np.argpartition(block, kth, axis=1)[:, :size]
+        return out
+
+
+def condensed_size(D) -> int:
+    """Number of nodes of a condensed upper triangle with the length of D"""
+    n_nodes = int(round((1 + math.sqrt(1 + 8 * len(D))) / 2))
+    assert n_nodes * (n_nodes - 1) // 2 == len(D), "D is not a condensed upper triangle"
+    return n_nodes
+
+
+def fits_int32(D) -> bool:
+    """Whether all distances of D are integers within the int32 range"""
+    D = np.asarray(D)
+    if D.size == 0:
+        return True
+    if not np.issubdtype(D.dtype, np.integer) and not np.array_equal(D, np.round(D)):
+        return False
+    return np.iinfo(np.intc).min <= D.min() and D.max() <= np.iinfo(np.intc).max
+
+
+def grid_nearest(X: np.ndarray, size: int) -> np.ndarray:
+    """Indexes of the `size` nearest points of each point by Euclidean distance
+    (unordered and including itself), searched on a uniform grid in O(n k log k)"""
+    n = X.shape[0]
+    size = min(size, n)
+    xmin, ymin = X.min(axis=0)
+    xmax, ymax = X.max(axis=0)
+
+    # Square cells for the target occupancy, not too thin for nearly collinear points
+    h = max(
+        math.sqrt((xmax - xmin) * (ymax - ymin) * GRID_OCCUPANCY / n),
+        max(xmax - xmin, ymax - ymin) * GRID_OCCUPANCY / n,
+    )
+    if h <= 0.0:
+        h = 1.0
+    gx = int((xmax - xmin) / h) + 1
+    gy = int((ymax - ymin) / h) + 1
+    cells = {}
+    for i in range(n):
+        cx = min(int((X[i, 0] - xmin) / h), gx - 1)
+        cy = min(int((X[i, 1] - ymin) / h), gy - 1)
+        cells.setdefault((cx, cy), []).append(i)
+
+    out = np.empty((n, size), dtype=np.intc)
+    for i in range(n):
+        cx = min(int((X[i, 0] - xmin) / h), gx - 1)
+        cy = min(int((X[i, 1] - ymin) / h), gy - 1)
+        heap = []
+        r = 0
+        while True:
+
+            # Cells at Chebyshev distance r from the cell of i, in a max-heap of (distance, index)
+            for y in range(cy - r, cy + r + 1):
+                step = 1 if abs(y - cy) == r else max(2 * r, 1)
+                for x in range(cx - r, cx + r + 1, step):
+                    for j in cells.get((x, y), ()):
+                        d = float(np.sum((X[j] - X[i]) ** 2))
+                        if len(heap) < size:
+                            heapq.heappush(heap, (-d, -j))
+                        elif (-d, -j) > heap[0]:
+                            heapq.heapreplace(heap, (-d, -j))
+
+            # Nodes in cells not visited are farther than r cells away
+            if len(heap) == size and -heap[0][0] <= (r * h) ** 2:
+                break
+            if r > gx and r > gy:
+                break
+            r = r + 1
+        out[i] = [-j for _, j in heap]
+    return out
+
+
+def as_problem(D) -> Problem:
+    """Problem from a pairwise distance matrix, or the problem itself if one is given.
+    Float32 and integer matrices are kept in 32 bits instead of converted to double,
+    and memory-mapped or read-only matrices are used without copies when their type fits."""
+    if isinstance(D, Problem):
+        return D
+    D = np.asanyarray(D)
+    if D.ndim == 1:
+        return CondensedProblem(condensed_size(D), D, copy=not is_shared(D))
+    assert D.shape[0] == D.shape[1], "D must be a squared matrix"
+    return problem_type(D)(D.shape[0], D, copy=not is_shared(D))
+
+
+def is_shared(D) -> bool:
+    """Whether D is memory-mapped or read-only, so a problem may use it without a copy"""
+    return isinstance(D, np.memmap) or not D.flags.writeable
+
+
+def is_file_backed(D) -> bool:
+    """Whether D maps a whole file region, so that it can be reopened by file name"""
+    return isinstance(D, np.memmap) and isinstance(D.base, mmap.mmap)
+
+
+def memmap_args(D):
+    order = "F" if D.flags.f_contiguous and not D.flags.c_contiguous else "C"
+    return (D.filename, D.dtype.str, D.shape, D.offset, order)
+
+
+def from_memmap(problem_class, n_nodes, filename, dtype, shape, offset, order):
+    """Problem backed by a memory-mapped distance matrix, opened read-only"""
+    D = np.memmap(filename, dtype=dtype, mode="r", shape=shape, offset=offset, order=order)
+    return problem_class(n_nodes, D, copy=False)
+
+
+def problem_type(D):
+    """Problem class matching the data type of the pairwise distance matrix D"""
+    if D.ndim == 1:
+        return CondensedProblem
+    if D.dtype == np.float32:
+        return Float32Problem
+    if np.issubdtype(D.dtype, np.integer) and fits_int32(D):
+        return Int32Problem
+    return Problem
+
+
+def geo_coordinates(X: np.ndarray) -> np.ndarray:
+    # TSPLIB convention: integer part in degrees and decimal part in minutes
+    deg = np.trunc(X)
+    return PI * (deg + 5.0 * (X - deg) / 3.0) / 180.0
+
+
+def symmetric_neighbors(nearest: np.ndarray):
+    n_nodes, size = nearest.shape
+    rows = np.repeat(np.arange(n_nodes, dtype=np.int64), size)
+    cols = np.asarray(nearest, dtype=np.int64).ravel()
+    keep = rows != cols
+    rows = rows[keep]
+    cols = cols[keep]
+    keys = np.sort(np.concatenate((rows * n_nodes + cols, cols * n_nodes + rows)))
+    unique = np.ones(keys.size, dtype=np.bool_)
+    unique[1:] = keys[1:] != keys[:-1]
+    keys = keys[unique]
+    indptr = np.zeros(n_nodes + 1, dtype=np.intc)
+    np.cumsum(np.bincount(keys // n_nodes, minlength=n_nodes), out=indptr[1:])
+    indices = (keys % n_nodes).astype(np.intc)
+    return indptr, indices
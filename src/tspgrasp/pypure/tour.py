@@ -1,9 +1,10 @@
-import copy
 from typing import List
 
-import numpy as np
-
 from tspgrasp.pypure.node import Node
+from tspgrasp.pypure.problem import Problem
+
+
+MASK64 = (1 << 64) - 1
 
 
 class Tour:
@@ -21,6 +22,7 @@ class Tour:
 
     @classmethod
     def new(cls, seq: List[int]):
+        seq = list(seq)
         i = seq.pop(0)
         node = Node(i, is_depot=True)
         tour = cls(node)
@@ -42,7 +44,12 @@ class Tour:
         return sol
 
     @property
-    def nodes(self) -> List[Node]:
+    def nodes(self) -> List[int]:
+        return self.solution[:-1]
+
+    @property
+    def _linked_nodes(self) -> List[Node]:
+        # Node objects in tour order, starting from the depot
         sol = []
         first_it = True
         node = self.depot
@@ -53,31 +60,64 @@ class Tour:
         return sol
 
     def copy(self):
-        return copy.deepcopy(self)
+        # Rebuild the linked list iteratively instead of recursing through it
+        other = type(self).new(self.solution[:-1])
+        for node, new in zip(self._linked_nodes, other._linked_nodes):
+            new.cum_dist = node.cum_dist
+            new.cum_rdist = node.cum_rdist
+            new.position = node.position
+        return other
 
     @property
     def cost(self):
         return self.depot.cum_dist
 
+    def canonical_hash(self, symmetric: bool = True) -> int:
+        """64-bit hash of the set of arcs of the tour, which does not depend on its starting node,
+        nor on its direction if symmetric (arcs are then taken as undirected edges)"""
+        nodes = self._linked_nodes
+        n = len(nodes)
+        h = 0
+        for node in nodes:
+            i, j = int(node.index), int(node.next.index)
+            if symmetric and j < i:
+                i, j = j, i
+            h = (h + _mix64(i * n + j)) & MASK64
+        return h
+
     def insert(self, new: Node):
         new.prev = self.depot.prev
         self.depot.prev.next = new
         new.next = self.depot
         self.depot.prev = new
 
-    def calc_costs(self, D: np.ndarray):
+    def calc_costs(self, problem: Problem):
 
         first_it = True
         node = self.depot
         dist = 0.0
         rdist = 0.0
+        position = 0
 
         node.cum_dist = dist
         node.cum_rdist = rdist
         while (not node.is_depot) or (first_it):
             node = node.next
-            dist = dist + D[node.prev.index, node.index]
-            rdist = rdist + D[node.index, node.prev.index] - D[node.prev.index, node.index]
+            position = position + 1
+            dist = dist + problem.dist(node.prev.index, node.index)
+
+            # Reversing segments only changes costs of asymmetric problems
+            if not problem.symmetric:
+                rdist = rdist + problem.dist(node.index, node.prev.index) - problem.dist(node.prev.index, node.index)
             node.cum_dist = dist
             node.cum_rdist = rdist
+            node.position = position
             first_it = False
+        node.position = 0
+
+
+def _mix64(x: int) -> int:
+    # Finalizer of splitmix64, so that sums of keys rarely collide
+    x = ((x ^ (x >> 30)) * 0xbf58476d1ce4e5b9) & MASK64
+    x = ((x ^ (x >> 27)) * 0x94d049bb133111eb) & MASK64
+    return x ^ (x >> 31)
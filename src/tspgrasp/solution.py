@@ -1,4 +1,4 @@
-from typing import List
+from typing import List, Optional
 
 try:
     from tspgrasp.cython.tour import Tour
@@ -17,11 +17,132 @@ class Solution:
     cost: float
     """Cost of solution
     """
+    stats: Optional["SearchStats"]
+    """Counters of the run that found the solution, when solved with `stats=True`
+    """
 
     def __init__(self, tour: Tour):
         self._tour = tour
         self.tour = tour.solution
         self.cost = tour.cost
+        self.stats = None
+
+    def __getstate__(self):
+        # Linked tour is not kept when pickled (e.g. returned from worker processes)
+        state = self.__dict__.copy()
+        state["_tour"] = None
+        return state
 
     def __repr__(self) -> str:
         return f"Cost: {self.cost}\nTour: {self.tour}"
+
+
+class SearchStats:
+    """Counters of a GRASP run, collected when solving with `stats=True`
+    """
+
+    n_iter: int
+    """Number of iterations
+    """
+    construction_time: List[float]
+    """Wall time (s) of the construction in each iteration
+    """
+    search_time: List[float]
+    """Wall time (s) of the local search in each iteration
+    """
+    n_moves: int
+    """Total number of improving moves applied by local search
+    """
+    n_passes: int
+    """Total number of local search passes over all customers
+    """
+    n_cost_updates: int
+    """Total number of recomputations of cumulative tour costs in local search
+    """
+    corr_nodes_time: float
+    """Total time (s) spent initializing correlated nodes in local search
+    """
+    move_evals: List[int]
+    """Evaluations of each pairwise move type (move_1 to move_8)
+    """
+    move_accepts: List[int]
+    """Acceptances of each pairwise move type (move_1 to move_8)
+    """
+    n_duplicate_starts: int
+    """Iterations whose starting tour was already searched, skipping local search
+    """
+    n_duplicate_optima: int
+    """Iterations whose local optimum was already found
+    """
+
+    def __init__(self):
+        self.n_iter = 0
+        self.construction_time = []
+        self.search_time = []
+        self.n_moves = 0
+        self.n_passes = 0
+        self.n_cost_updates = 0
+        self.corr_nodes_time = 0.0
+        self.move_evals = []
+        self.move_accepts = []
+        self.n_duplicate_starts = 0
+        self.n_duplicate_optima = 0
+
+    def record(self, local_search, construction_time: float, search_time: float):
+        """Add the counters of an iteration, read from the local search after `do`"""
+        self.n_iter = self.n_iter + 1
+        self.construction_time.append(construction_time)
+        self.search_time.append(search_time)
+        self.n_moves = self.n_moves + local_search.n_moves
+        self.n_passes = self.n_passes + local_search.n_passes
+        self.n_cost_updates = self.n_cost_updates + local_search.n_cost_updates
+        self.corr_nodes_time = self.corr_nodes_time + local_search.corr_nodes_time
+        self.move_evals = _add(self.move_evals, local_search.move_evals)
+        self.move_accepts = _add(self.move_accepts, local_search.move_accepts)
+
+    def record_duplicate(self, construction_time: float):
+        """Add an iteration whose local search was skipped for a repeated starting tour"""
+        self.n_iter = self.n_iter + 1
+        self.construction_time.append(construction_time)
+        self.search_time.append(0.0)
+        self.n_duplicate_starts = self.n_duplicate_starts + 1
+
+    @property
+    def duplicate_rate(self) -> float:
+        """Share of iterations with a repeated starting tour or local optimum"""
+        if self.n_iter == 0:
+            return 0.0
+        return (self.n_duplicate_starts + self.n_duplicate_optima) / self.n_iter
+
+    def merge(self, other: "SearchStats"):
+        """Add the counters of another run (e.g. from parallel workers)"""
+        self.n_iter = self.n_iter + other.n_iter
+        self.construction_time.extend(other.construction_time)
+        self.search_time.extend(other.search_time)
+        self.n_moves = self.n_moves + other.n_moves
+        self.n_passes = self.n_passes + other.n_passes
+        self.n_cost_updates = self.n_cost_updates + other.n_cost_updates
+        self.corr_nodes_time = self.corr_nodes_time + other.corr_nodes_time
+        self.move_evals = _add(self.move_evals, other.move_evals)
+        self.move_accepts = _add(self.move_accepts, other.move_accepts)
+        self.n_duplicate_starts = self.n_duplicate_starts + other.n_duplicate_starts
+        self.n_duplicate_optima = self.n_duplicate_optima + other.n_duplicate_optima
+
+    def __repr__(self) -> str:
+        return (
+            f"Iterations: {self.n_iter}\n"
+            f"Construction time: {sum(self.construction_time):.4g}s\n"
+            f"Search time: {sum(self.search_time):.4g}s\n"
+            f"Moves: {self.n_moves}\n"
+            f"Passes: {self.n_passes}\n"
+            f"Move evaluations: {self.move_evals}\n"
+            f"Move acceptances: {self.move_accepts}\n"
+            f"Duplicate rate: {self.duplicate_rate:.1%}"
+        )
+
+
+def _add(a: List[int], b: List[int]) -> List[int]:
+    # Element-wise sum of counters, where an empty list stands for zeros
+    if not a:
+        return list(b)
+    return [x + y for x, y in zip(a, b)]
@@ -1,12 +1,23 @@
+import pickle
+import time
+import threading
 import pytest
 
 # Imports
 import numpy as np
 from scipy.spatial.distance import pdist, squareform
 from tspgrasp import (
-    Grasp, CheapestArc, SemiGreedyArc, CheapestInsertion, RandomInsertion,
-    SemiGreedyInsertion, LocalSearch, SimulatedAnnealing,
+    Grasp, CoordinateProblem, CheapestArc, SemiGreedyArc, CheapestInsertion, RandomInsertion,
+    SemiGreedyInsertion, SpaceFillingCurve, GreedyEdge, Savings, LocalSearch, SimulatedAnnealing,
+    LinKernighan, save_distance_matrix, load_distance_matrix,
 )
+from tspgrasp.bench import (
+    make_instances, run_benchmark, save_results, load_results, compare_results,
+)
+from tspgrasp.elite import (
+    ElitePool, relink, tour_edges, edge_distance,
+)
+from tspgrasp.cache import TourCache
 
 
 np.random.seed(12)
@@ -92,3 +103,387 @@ def test_ls_vs_sa():
     ls = LocalSearch(seed=12)
     sol2 = ls(list(range(D.shape[0])), D)
     assert sol1.cost != sol2.cost, "LS and SA are the same!"
+
+
+def test_ls_asymmetric():
+    rng = np.random.default_rng(12)
+    A = rng.random((50, 50))
+    np.fill_diagonal(A, 0.0)
+    ls = LocalSearch(seed=12)
+    sol = ls(list(range(A.shape[0])), A)
+    cost = sum(A[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))
+    assert np.isclose(sol.cost, cost), "Local Search cost differs from tour cost"
+
+
+@pytest.mark.parametrize('n_neighbors', [1, 5, 20, 100])
+def test_ls_neighbors(n_neighbors):
+    ls = LocalSearch(seed=12, n_neighbors=n_neighbors)
+    sol = ls(list(range(D.shape[0])), D)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Local Search with neighbors failed"
+
+
+@pytest.mark.parametrize('n_nodes', [1, 2, 3])
+def test_small_problems(n_nodes):
+    A = np.array([[0.0, 1.0, 2.0], [1.0, 0.0, 1.5], [2.0, 1.5, 0.0]])[:n_nodes, :n_nodes]
+    seq = list(range(n_nodes))
+    sol = Grasp(seed=12)(A, max_iter=3)
+    assert sorted(sol.tour[:-1]) == seq, "Grasp failed on a small problem"
+    for local_search in (LocalSearch(seed=12), SimulatedAnnealing(seed=12), LinKernighan(seed=12)):
+        sol = local_search(seq, A)
+        assert sorted(sol.tour[:-1]) == seq, "Local search failed on a small problem"
+
+
+def test_grasp_cached_problem():
+    ls = LocalSearch(seed=12, n_neighbors=10)
+    grasp = Grasp(local_search=ls, seed=12)
+    grasp(D, max_iter=3)
+    sol = grasp(D, max_iter=3)
+    ls = LocalSearch(seed=12, n_neighbors=10)
+    grasp = Grasp(local_search=ls, seed=12)
+    grasp(D, max_iter=3)
+    sol2 = grasp(D.copy(), max_iter=3)
+    assert sol.cost == sol2.cost, "Cached problem changed results"
+
+
+@pytest.mark.parametrize('metric', ["euclidean", "euc_2d", "ceil_2d", "att", "geo"])
+def test_coordinate_problem(metric):
+    problem = CoordinateProblem(X * 100, metric=metric)
+    grasp = Grasp(local_search=LocalSearch(seed=12, n_neighbors=10), seed=12)
+    sol = grasp(problem, max_iter=3)
+    assert sorted(sol.tour[:-1]) == list(range(X.shape[0])), "Grasp with coordinates failed"
+
+
+def test_coordinate_problem_distances():
+    sol = Grasp(seed=12)(CoordinateProblem(X), max_iter=3)
+    cost = sum(D[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))
+    assert np.isclose(sol.cost, cost), "Coordinate distances differ from distance matrix"
+
+
+def test_grasp_parallel():
+    grasp = Grasp(seed=12, n_jobs=2)
+    sol = grasp(D, max_iter=6)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Parallel Grasp produced invalid tour"
+    assert len(grasp.costs) == 6, "Parallel Grasp missed iterations"
+    sol2 = Grasp(seed=12, n_jobs=2)(D, max_iter=6)
+    assert sol.tour == sol2.tour, "Random seed failed to produce repeated parallel results"
+
+
+def test_grasp_parallel_coordinates():
+    problem = CoordinateProblem(X)
+    grasp = Grasp(SemiGreedyArc(seed=12), LocalSearch(seed=12, n_neighbors=10), seed=12, n_jobs=2)
+    sol = grasp(problem, max_iter=4)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Parallel Grasp produced invalid tour"
+
+
+def test_grasp_threads():
+    sol = Grasp(seed=12, n_jobs=2, backend="threads")(D, max_iter=6)
+    sol2 = Grasp(seed=12, n_jobs=2)(D, max_iter=6)
+    assert sol.tour == sol2.tour, "Thread and process backends produced different results"
+
+
+@pytest.mark.parametrize('backend', ["threads", "processes"])
+def test_grasp_parallel_target(backend):
+    target = Grasp(seed=12)(D, max_iter=3).cost
+    grasp = Grasp(seed=12, n_jobs=2, backend=backend)
+    sol = grasp(D, max_iter=10000, target=target)
+    assert sol.cost <= target, "Parallel Grasp missed target"
+    assert len(grasp.costs) < 10000, "Parallel Grasp did not stop at target"
+
+
+def test_grasp_stop_event():
+    grasp = Grasp(seed=12)
+    stop = threading.Event()
+    stop.set()
+    sol = grasp.solve(CoordinateProblem(X), max_iter=10, max_moves=100, stop=stop)
+    assert sol is None and len(grasp.costs) == 0, "Grasp ignored stop event"
+
+
+def test_tour_copy():
+    sol = LocalSearch(seed=12)(list(range(D.shape[0])), D)
+    tour = sol._tour.copy()
+    assert tour.solution == sol.tour, "Copied tour differs from original"
+    assert tour.cost == sol.cost, "Copied tour cost differs from original"
+    assert tour.nodes == sol.tour[:-1], "Tour nodes differ from solution"
+    assert all(isinstance(node, int) for node in tour.nodes), "Tour nodes are not indexes"
+
+
+@pytest.mark.parametrize('n_neighbors', [None, 10])
+def test_ls_dont_look_bits(n_neighbors):
+    seq = list(range(D.shape[0]))
+    sol = LocalSearch(seed=12, n_neighbors=n_neighbors, dont_look_bits=True)(seq, D)
+    ref = LocalSearch(seed=12, n_neighbors=n_neighbors)(seq, D)
+    assert sorted(sol.tour[:-1]) == seq, "Local Search with don't look bits failed"
+    assert sol.cost <= 1.1 * ref.cost, "Local Search with don't look bits stopped too early"
+
+
+@pytest.mark.parametrize('reverse_segments', [False, True])
+def test_ls_or_opt(reverse_segments):
+    seq = list(range(D.shape[0]))
+    ls = LocalSearch(seed=12, n_neighbors=10, max_segment=5, reverse_segments=reverse_segments)
+    sol = ls(seq, D)
+    assert sorted(sol.tour[:-1]) == seq, "Local Search with Or-opt failed"
+    assert np.isclose(sol.cost, sum(D[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+
+
+def test_ls_or_opt_asymmetric():
+    rng = np.random.default_rng(3)
+    DA = D + rng.random(D.shape) * 0.2
+    np.fill_diagonal(DA, 0.0)
+    seq = list(range(D.shape[0]))
+    sol = LocalSearch(seed=12, max_segment=4)(seq, DA)
+    assert sorted(sol.tour[:-1]) == seq, "Local Search with Or-opt failed"
+    assert np.isclose(sol.cost, sum(DA[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+
+
+@pytest.mark.parametrize('n_neighbors', [None, 10])
+def test_lin_kernighan(n_neighbors):
+    seq = list(range(D.shape[0]))
+    sol = LinKernighan(seed=12, n_neighbors=n_neighbors)(seq, D)
+    assert sorted(sol.tour[:-1]) == seq, "Lin-Kernighan failed"
+    assert np.isclose(sol.cost, sum(D[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+
+
+def test_grasp_lin_kernighan():
+    grasp = Grasp(local_search=LinKernighan(seed=12, n_neighbors=10, dont_look_bits=True), seed=12)
+    sol = grasp(D, max_iter=3)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Grasp with Lin-Kernighan failed"
+
+
+def test_cheapest_insertion_ties():
+    # Integer distances produce ties, which must follow the order of a complete scan
+    DI = np.round(D * 10)
+    sol = CheapestInsertion(seed=12)(DI)
+    tour = [sol.tour[0]]
+    queue = [i for i in range(D.shape[0]) if i != tour[0]]
+    while queue:
+        best = None
+        for new in queue:
+            arcs = zip(tour, tour[1:] + tour[:1])
+            cost, pos = min((DI[i, new] + DI[new, j] - DI[i, j], k) for k, (i, j) in enumerate(arcs))
+            if best is None or cost < best[0]:
+                best = (cost, new, pos)
+        tour.insert(best[2] + 1, best[1])
+        queue.remove(best[1])
+    assert sol.tour[:-1] == tour, "Cheapest insertion differs from a complete scan"
+
+
+def test_cheapest_arc_ties():
+    # Nearest neighbor rows must pick the same node as a complete scan, ties by index
+    DI = np.round(D * 10)
+    sol = CheapestArc(seed=12)(DI)
+    tour = [sol.tour[0]]
+    queue = [i for i in range(D.shape[0]) if i != tour[0]]
+    while queue:
+        new = min(queue, key=lambda j: (DI[tour[-1], j], j))
+        tour.append(new)
+        queue.remove(new)
+    assert sol.tour[:-1] == tour, "Cheapest arc differs from a complete scan"
+
+
+@pytest.mark.parametrize('constructive', [SpaceFillingCurve, GreedyEdge, Savings])
+def test_large_constructives(constructive):
+    problem = CoordinateProblem(X)
+    greedy = constructive(seed=12)
+    sol = greedy(problem)
+    assert sorted(sol.tour[:-1]) == list(range(X.shape[0])), "Constructive produced invalid tour"
+    assert np.isclose(sol.cost, sum(D[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+    assert greedy(problem).tour != sol.tour, "Constructive is not randomized"
+
+
+@pytest.mark.parametrize('constructive', [GreedyEdge, Savings])
+def test_grasp_edge_constructives(constructive):
+    grasp = Grasp(constructive=constructive(seed=12), seed=12)
+    sol = grasp(D, max_iter=3)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Grasp with edge constructive failed"
+
+
+def test_coordinate_problem_grid_nearest():
+    nearest = np.asarray(CoordinateProblem(X).nearest_sorted(6))
+    ref = np.array([sorted(range(D.shape[0]), key=lambda j: (D[i, j], j))[:6] for i in range(D.shape[0])])
+    assert (nearest == ref).all(), "Grid nearest nodes differ from a complete search"
+
+
+@pytest.mark.parametrize('constructive', [CheapestInsertion, RandomInsertion, SemiGreedyInsertion])
+def test_insertion_neighbors(constructive):
+    problem = CoordinateProblem(X)
+    sol = constructive(seed=12, n_neighbors=5)(problem)
+    assert sorted(sol.tour[:-1]) == list(range(X.shape[0])), "Insertion with neighbors failed"
+    assert np.isclose(sol.cost, sum(D[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+
+
+@pytest.mark.filterwarnings("ignore::RuntimeWarning")
+@pytest.mark.parametrize('constructive', [CheapestInsertion, RandomInsertion])
+@pytest.mark.parametrize('n_neighbors', [None, 5])
+def test_insertion_infinite_distances(constructive, n_neighbors):
+    A = D.copy()
+    A[0, 1:] = np.inf
+    sol = constructive(seed=12, n_neighbors=n_neighbors)(A)
+    assert sorted(sol.tour[:-1]) == list(range(A.shape[0])), "Insertion with infinite distances failed"
+
+
+@pytest.mark.parametrize('dtype', [np.float32, np.int32])
+def test_grasp_32_bits(dtype):
+    D32 = np.round(D * 1000).astype(dtype)
+    sol = Grasp(seed=12)(D32, max_iter=3)
+    ref = Grasp(seed=12)(D32.astype(np.double), max_iter=3)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Grasp with 32 bits matrix failed"
+    assert np.isclose(sol.cost, sum(D32[i, j] for i, j in zip(sol.tour[:-1], sol.tour[1:]))), "Wrong cost"
+    assert sol.tour == ref.tour, "32 bits matrix changed results"
+
+
+def test_sa_tolerance():
+    # Below its final temperature, simulated annealing accepts the same moves as local search
+    D32 = np.round(D * 1000).astype(np.int32)
+    seq = list(range(D.shape[0]))
+    sol = SimulatedAnnealing(T_start=0.0, T_final=1.0, seed=12)(seq, D32)
+    ref = LocalSearch(seed=12)(seq, D32)
+    assert sol.tour == ref.tour, "Simulated annealing without annealing differs from local search"
+
+
+def test_memmap_matrix(tmp_path):
+    path = str(tmp_path / "D.npy")
+    save_distance_matrix(path, D)
+    DM = load_distance_matrix(path)
+    grasp = Grasp(seed=12)
+    sol = grasp(DM, max_iter=3)
+    assert np.shares_memory(grasp._problem.D, DM), "Memory-mapped matrix was copied"
+    assert pickle.loads(pickle.dumps(grasp._problem)).D.filename == DM.filename, "Problem pickled the matrix"
+    ref = Grasp(seed=12)(D, max_iter=3)
+    assert sol.tour == ref.tour, "Memory-mapped matrix changed results"
+
+
+def test_condensed_matrix():
+    sol = Grasp(local_search=LocalSearch(seed=12, n_neighbors=10), seed=12)(pdist(X), max_iter=3)
+    ref = Grasp(local_search=LocalSearch(seed=12, n_neighbors=10), seed=12)(D, max_iter=3)
+    assert sol.tour == ref.tour, "Condensed matrix changed results"
+    assert np.isclose(sol.cost, ref.cost), "Condensed matrix changed costs"
+
+
+@pytest.mark.parametrize('local_search', [LocalSearch, SimulatedAnnealing, LinKernighan])
+def test_ls_time_limit(local_search):
+    XL = np.random.default_rng(12).random((2000, 2))
+    ls = local_search(seed=12)
+    sol = ls(list(range(XL.shape[0])), CoordinateProblem(XL), time_limit=0.05)
+    assert ls.timed_out, "Local search ignored the time limit"
+    assert sorted(sol.tour[:-1]) == list(range(XL.shape[0])), "Interrupted local search returned an invalid tour"
+
+
+def test_grasp_time_limit():
+    XL = np.random.default_rng(12).random((2000, 2))
+    start = time.monotonic()
+    sol = Grasp(seed=12)(CoordinateProblem(XL), time_limit=0.2)
+    assert sol is not None, "Grasp did not keep the best solution"
+    assert time.monotonic() - start < 2.0, "Grasp exceeded the time limit"
+
+
+def test_bench(tmp_path):
+    instances = make_instances(sizes=[30], files=["examples/instances/dja1436.txt"])
+    assert instances["dja1436"].shape == (1436, 2), "Failed to read bundled instance"
+    results = run_benchmark(
+        {"uniform30": instances["uniform30"]}, constructives=["CheapestArc", "GreedyEdge"],
+        local_searches=["LocalSearch"], max_iter=2
+    )
+    assert len(results["cases"]) == 2, "Missing benchmark cases"
+    assert min(case["gap"] for case in results["cases"]) == 0.0, "Wrong reference of gaps"
+    path = str(tmp_path / "results.json")
+    save_results(path, results)
+    assert compare_results(load_results(path), results) == [], "Identical results regressed"
+    worse = load_results(path)
+    worse["cases"][0]["cost"] *= 2
+    assert len(compare_results(results, worse)) == 1, "Cost regression not found"
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_grasp_stats(n_jobs):
+    sol = Grasp(seed=12, n_jobs=n_jobs, backend="threads")(D, max_iter=4, stats=True)
+    ref = Grasp(seed=12, n_jobs=n_jobs, backend="threads")(D, max_iter=4)
+    assert ref.stats is None, "Stats collected without being requested"
+    assert sol.tour == ref.tour, "Collecting stats changed results"
+    stats = sol.stats
+    assert stats.n_iter == 4 and len(stats.construction_time) == len(stats.search_time) == 4, "Wrong iterations"
+    assert len(stats.move_evals) == len(stats.move_accepts) == 8, "Wrong number of move types"
+    assert sum(stats.move_accepts) == stats.n_moves, "Acceptances differ from moves"
+    assert all(a <= e for a, e in zip(stats.move_accepts, stats.move_evals)), "More acceptances than evaluations"
+    assert stats.n_passes >= 4 and stats.n_cost_updates >= 1, "Missing search counters"
+
+
+@pytest.mark.parametrize('backend', ["threads", "processes"])
+def test_solve_many(backend):
+    rng = np.random.default_rng(12)
+    matrices = [squareform(pdist(rng.random((n, 2)))) for n in (20, 35, 50, 8)]
+    max_iter = [3, 2, 3, 1]
+    sols = Grasp(seed=12, n_jobs=2, backend=backend).solve_many(matrices, max_iter=max_iter, stats=True)
+    ref = Grasp(seed=12).solve_many(matrices, max_iter=max_iter)
+    assert [sol.tour for sol in sols] == [sol.tour for sol in ref], "Batch results depend on n_jobs"
+    for DM, n_iter, sol in zip(matrices, max_iter, sols):
+        assert sorted(sol.tour[:-1]) == list(range(DM.shape[0])), "Batch returned solutions out of order"
+        assert sol.stats.n_iter == n_iter, "Per instance budget ignored"
+    single = Grasp(seed=12)(matrices[2], max_iter=3)
+    assert ref[2].tour == single.tour, "Batch differs from solving a single instance"
+
+
+@pytest.mark.parametrize('n_jobs', [1, 2])
+def test_warm_start(n_jobs):
+    ref = Grasp(seed=12)(D, max_iter=5)
+    initial_tour = list(np.random.default_rng(12).permutation(D.shape[0]))
+    sol = Grasp(seed=12, n_jobs=n_jobs, backend="threads")(D, max_iter=0, initial_tour=initial_tour)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Warm start returned an invalid tour"
+    assert sol.cost < sum(D[i, j] for i, j in zip(initial_tour, initial_tour[1:] + initial_tour[:1])), \
+        "Initial tour not improved"
+    grasp = Grasp(seed=12, n_jobs=n_jobs, backend="threads")
+    sol = grasp(D, max_iter=6, initial_tour=ref.tour, perturbation=0.5)
+    assert sol.cost <= ref.cost + 1e-9, "Warm start lost the incumbent"
+    assert len(grasp.costs) >= 7, "Missing warm start iterations"
+
+
+def test_path_relinking():
+    rng = np.random.default_rng(12)
+    source, target = rng.permutation(20).tolist(), rng.permutation(20).tolist()
+    points = relink(source, target, n_points=3)
+    assert points and all(sorted(p) == list(range(20)) for p in points), "Relinking produced invalid tours"
+    distances = [edge_distance(tour_edges(p), tour_edges(target)) for p in points]
+    assert distances[-1] < edge_distance(tour_edges(source), tour_edges(target)), "Relinking did not approach target"
+    pool = ElitePool(2)
+    assert pool.add(source, 2.0) and pool.add(target, 3.0), "Failed to fill elite pool"
+    assert not pool.add(list(reversed(source)), 1.0), "Duplicate tour added to elite pool"
+    assert pool.add(points[0], 1.0) and pool.members[0].cost == 1.0, "Elite pool not ranked by cost"
+    sol = Grasp(constructive=SemiGreedyArc(seed=12), seed=12)(D, max_iter=5, elite_size=3)
+    assert sorted(sol.tour[:-1]) == list(range(D.shape[0])), "Grasp with elite pool failed"
+
+
+@pytest.mark.parametrize('constructive', [SemiGreedyArc, SemiGreedyInsertion])
+def test_reactive_alpha(constructive):
+    operator = constructive(seed=12, reactive=True)
+    grasp = Grasp(constructive=operator, seed=12)
+    sol = grasp(D, max_iter=20)
+    ref = Grasp(constructive=constructive(seed=12, reactive=True), seed=12)(D, max_iter=20)
+    assert sol.tour == ref.tour, "Reactive alpha is not reproducible"
+    assert np.isclose(sum(operator.alpha_probs), 1.0), "Alpha probabilities do not sum to one"
+    assert len(set(np.round(operator.alpha_probs, 12))) > 1, "Alpha probabilities were not updated"
+    assert pickle.loads(pickle.dumps(operator)).reactive, "Reactive flag lost when pickled"
+    operator.do(CoordinateProblem(X))
+    assert np.allclose(operator.alpha_probs, 0.1), "Feedback kept across problems"
+
+
+def test_tour_cache():
+    seq = list(np.random.default_rng(12).permutation(D.shape[0]))
+    grasp = Grasp(seed=12)
+    tour = grasp.constructive(D)._tour
+    keys = {
+        type(tour).new(s).canonical_hash() for s in (seq, seq[::-1], seq[7:] + seq[:7])
+    }
+    assert len(keys) == 1, "Tour hash depends on rotation or direction"
+    assert type(tour).new(seq).canonical_hash(False) != type(tour).new(seq[::-1]).canonical_hash(False), \
+        "Directed tour hash ignores direction"
+    cache = TourCache(2)
+    cache.put(1, 10.0)
+    cache.put(2, 20.0)
+    assert cache.get(1) == 10.0, "Cached value lost"
+    cache.put(3, 30.0)
+    assert 2 not in cache and 1 in cache and len(cache) == 2, "Least recently used key not discarded"
+    n_nodes = 12
+    sol = Grasp(seed=12)(D[:n_nodes, :n_nodes], max_iter=40, cache_size=100, stats=True)
+    ref = Grasp(seed=12)(D[:n_nodes, :n_nodes], max_iter=40)
+    assert sol.stats.n_duplicate_starts >= 40 - n_nodes, "Repeated starting tours not detected"
+    assert sol.stats.duplicate_rate > 0.5, "Wrong duplicate rate"
+    assert np.isclose(sol.cost, ref.cost), "Skipping repeated tours changed the best cost"